@@ -0,0 +1,121 @@
+import logging
+from pathlib import Path
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+from covid_berlin_scraper.utils.http_utils import (
+    RawContent, detect_charset, http_get_bytes, safe_filename,
+)
+from covid_berlin_scraper.utils.profile_utils import count, stage
+
+logger = logging.getLogger(__name__)
+
+ARTICLES_DIR = 'articles'
+PAGES_DIR = 'pages'
+DEFAULT_ARTICLE_SELECTOR = '#layout-grid__area--maincontent'
+
+
+def get_article_kwargs(config: dict) -> dict:
+    article_config = config.get('download_press_release', {})
+    return dict(
+        article_selector=article_config.get(
+            'article_selector', DEFAULT_ARTICLE_SELECTOR
+        ),
+        keep_full_page=bool(article_config.get('keep_full_page', False)),
+    )
+
+
+def extract_article(page: RawContent, selector: str) -> Optional[bytes]:
+    with stage('ingest.article'):
+        soup = BeautifulSoup(page.content, 'lxml', from_encoding=page.charset)
+        article = soup.select_one(selector)
+        if article is None:
+            return None
+        return str(article).encode()
+
+
+def trim_page(page: RawContent, article_selector: str) -> RawContent:
+    """Reduce a press release page to its article.
+
+    The article is re-encoded as UTF-8. A page without the article is kept
+    whole so that nothing is lost when the layout changes.
+    """
+    article = extract_article(page, article_selector)
+    if article is None:
+        logger.warning('Article "%s" not found in page', article_selector)
+        count('ingest.articles.not_found')
+        return page
+    count('ingest.articles')
+    count('ingest.bytes_trimmed', len(page.content) - len(article))
+    return RawContent(content=article, charset='utf-8')
+
+
+def fetch_article(
+    url: str,
+    cache_path: Path,
+    article_selector: str = DEFAULT_ARTICLE_SELECTOR,
+    keep_full_page: bool = False,
+    **http_get_kwargs,
+) -> RawContent:
+    """Return the article of a press release, downloading it if needed.
+
+    Articles are cached in the `articles` directory. A full page cached in
+    the `pages` directory by an earlier version is trimmed instead of
+    downloaded again, and removed unless `keep_full_page` is set.
+    """
+    filename = safe_filename(url)
+    article_path = cache_path / ARTICLES_DIR / filename
+    if article_path.is_file():
+        count('http.cache_hit')
+        with stage('http.cache_read'):
+            content = article_path.read_bytes()
+        return RawContent(content=content, charset=detect_charset(content))
+    page_path = cache_path / PAGES_DIR / filename
+    page = http_get_bytes(
+        url,
+        cache_dir=(
+            page_path.parent if keep_full_page or page_path.is_file() else None
+        ),
+        **http_get_kwargs,
+    )
+    article = trim_page(page, article_selector)
+    article_path.parent.mkdir(parents=True, exist_ok=True)
+    article_path.write_bytes(article.content)
+    if not keep_full_page and page_path.is_file():
+        page_path.unlink()
+    return article
+
+
+def migrate_pages(
+    cache_path: Path,
+    article_selector: str = DEFAULT_ARTICLE_SELECTOR,
+    keep_full_page: bool = False,
+) -> int:
+    """Trim all full pages in the cache to their articles.
+
+    Anything else in the pages directory, e.g. a subdirectory, is left alone
+    and the directory is only removed when it's empty.
+    """
+    pages_path = cache_path / PAGES_DIR
+    if not pages_path.is_dir():
+        return 0
+    articles_path = cache_path / ARTICLES_DIR
+    articles_path.mkdir(parents=True, exist_ok=True)
+    n = 0
+    for page_path in sorted(pages_path.iterdir()):
+        if not page_path.is_file():
+            logger.warning('Skipping %s, which is not a page', page_path)
+            continue
+        article_path = articles_path / page_path.name
+        if not article_path.is_file():
+            content = page_path.read_bytes()
+            page = RawContent(content=content, charset=detect_charset(content))
+            article_path.write_bytes(trim_page(page, article_selector).content)
+            n += 1
+        if not keep_full_page:
+            page_path.unlink()
+    if not keep_full_page and not any(pages_path.iterdir()):
+        pages_path.rmdir()
+    logger.info('Trimmed %d cached pages to their articles', n)
+    return n
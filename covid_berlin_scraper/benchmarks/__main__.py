@@ -0,0 +1,83 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from covid_berlin_scraper.benchmarks import (  # noqa: F401
+    bench_http, bench_output, bench_parse, bench_store, bench_watch,
+)
+from covid_berlin_scraper.benchmarks.runner import (
+    BENCHMARKS, compare_results, dump_results, format_results, load_json,
+    run_benchmarks, write_json,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m covid_berlin_scraper.benchmarks'
+    )
+    parser.add_argument(
+        '-v', '--verbose', action='store_true', help='Enable debugging output'
+    )
+    parser.add_argument(
+        'names',
+        nargs='*',
+        help='Benchmarks to run; default: all; available: {}'.format(
+            ', '.join(BENCHMARKS.keys())
+        ),
+    )
+    parser.add_argument(
+        '-s',
+        '--scale',
+        type=int,
+        default=1,
+        help='Size multiplier of the synthetic corpora',
+    )
+    parser.add_argument(
+        '-m',
+        '--memory',
+        action='store_true',
+        help=(
+            'Also measure the peak memory allocated by each benchmark '
+            'in one more run'
+        ),
+    )
+    parser.add_argument('-o', '--output', help='Output JSON file path')
+    parser.add_argument(
+        '-b', '--baseline', help='Baseline JSON file path to compare against'
+    )
+    parser.add_argument(
+        '-t',
+        '--threshold',
+        type=float,
+        default=1.25,
+        help=(
+            'Fail when a benchmark is slower than the baseline '
+            'by more than this factor'
+        ),
+    )
+    args = parser.parse_args()
+    unknown_names = set(args.names) - set(BENCHMARKS.keys())
+    if unknown_names:
+        parser.error(f'Unknown benchmarks: {", ".join(unknown_names)}')
+    if args.verbose:
+        logging.basicConfig(
+            stream=sys.stderr, level=logging.INFO, format='%(message)s'
+        )
+
+    results = run_benchmarks(args.names, args.scale, args.memory)
+    print(format_results(results))
+    data = dump_results(results, args.scale)
+    if args.output:
+        write_json(data, Path(args.output))
+    if args.baseline:
+        regressions = compare_results(
+            data, load_json(Path(args.baseline)), args.threshold
+        )
+        if regressions:
+            print('Regressions:', *regressions, sep='\n', file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
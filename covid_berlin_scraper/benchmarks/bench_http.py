@@ -0,0 +1,103 @@
+import datetime
+import threading
+from pathlib import Path
+
+from covid_berlin_scraper.benchmarks.corpus import (
+    START_DATE, generate_district_table_content, load_config,
+    load_dashboard_contents,
+)
+from covid_berlin_scraper.benchmarks.runner import BenchmarkRun, benchmark
+from covid_berlin_scraper.download_district_table import (
+    download_district_table,
+)
+from covid_berlin_scraper.replay_server import ReplayServer
+from covid_berlin_scraper.utils.http_replay_utils import (
+    HttpArchive, RecordedResponse, ReplayingAdapter,
+)
+from covid_berlin_scraper.utils.http_utils import (
+    HTTP_ADAPTER_KWARGS, http_get_raw, mount_http_adapter, reset_http_session,
+)
+
+LATENCY = 0.001
+BANDWIDTH = 10 * 1024 * 1024
+
+
+def start_replay_server(archive: HttpArchive) -> ReplayServer:
+    """Serve the archive on a free local port until the benchmark process
+    exits and send all requests of the shared session to it."""
+    server = ReplayServer(
+        ('127.0.0.1', 0), archive, latency=LATENCY, bandwidth=BANDWIDTH
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    reset_http_session()
+    mount_http_adapter(ReplayingAdapter(server.url, **HTTP_ADAPTER_KWARGS))
+    return server
+
+
+def create_response(url: str, headers: dict, body: bytes) -> RecordedResponse:
+    return RecordedResponse(
+        url=url,
+        status=200,
+        reason='OK',
+        headers=list(headers.items()),
+        body=body,
+        recorded_at=START_DATE,
+    )
+
+
+@benchmark('http_replay_district_table')
+def bench_district_table(scale: int, tmp_path: Path) -> BenchmarkRun:
+    config = load_config()
+    url = config['download_district_table']['url']
+    n = 20 * scale
+    archive = HttpArchive(
+        responses=[
+            create_response(
+                url,
+                {
+                    'Content-Type': 'text/csv; charset=utf-8',
+                    'Last-Modified': (
+                        START_DATE + datetime.timedelta(days=i)
+                    ).strftime('%a, %d %b %Y %H:%M:%S GMT'),
+                },
+                generate_district_table_content(1000 + i * 100).encode(),
+            )
+            for i in range(n)
+        ]
+    )
+    start_replay_server(archive)
+
+    def run() -> int:
+        for _ in range(n):
+            download_district_table(url, timeout=10, user_agent='benchmark')
+        return n
+
+    return run
+
+
+@benchmark('http_replay_dashboard')
+def bench_dashboard(scale: int, tmp_path: Path) -> BenchmarkRun:
+    config = load_config()
+    url = config['download_dashboard']['urls'][0]
+    archive = HttpArchive(
+        responses=[
+            create_response(
+                url,
+                {
+                    'Content-Type': 'text/html; charset=utf-8',
+                    'Content-Encoding': 'gzip',
+                },
+                content,
+            )
+            for content in load_dashboard_contents()
+        ]
+    )
+    start_replay_server(archive)
+    n = 2 * scale
+
+    def run() -> int:
+        for _ in range(n):
+            http_get_raw(url, timeout=10, user_agent='benchmark').read()
+        return n
+
+    return run
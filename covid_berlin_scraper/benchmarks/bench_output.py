@@ -0,0 +1,173 @@
+import datetime
+import itertools
+import os
+from pathlib import Path
+
+from covid_berlin_scraper.benchmarks.corpus import (
+    START_DATE, generate_cache, load_config,
+)
+from covid_berlin_scraper.benchmarks.runner import BenchmarkRun, benchmark
+from covid_berlin_scraper.derived_metrics import (
+    DEFAULT_POPULATION, write_derived_csv,
+)
+from covid_berlin_scraper.model import DailyStatsStore
+from covid_berlin_scraper.parse_press_releases import (
+    OUTPUT_HOSP_FIELDS, SOURCES, PressReleaseStats, get_parse_dashboard_kwargs,
+    iter_daily_stats, list_daily_stats, main, merge_daily_stats,
+    parse_dashboards, write_csv, write_stream,
+)
+
+
+@benchmark('write_csv')
+def bench_write_csv(scale: int, tmp_path: Path) -> BenchmarkRun:
+    stats_list = [
+        PressReleaseStats(
+            timestamp=START_DATE + datetime.timedelta(hours=12 * i),
+            cases=i,
+            recovered=i // 2,
+            deaths=None,
+            hospitalized=i // 20,
+            icu=None,
+        )
+        for i in range(1000 * scale)
+    ]
+
+    def run() -> int:
+        write_csv(stats_list, tmp_path / 'output.csv', OUTPUT_HOSP_FIELDS)
+        return len(stats_list)
+
+    return run
+
+
+def fill_daily_stats(db_path: Path, n: int):
+    store = DailyStatsStore(db_path)
+    merge_daily_stats(
+        store,
+        SOURCES['district_tables'],
+        (
+            PressReleaseStats(
+                timestamp=START_DATE + datetime.timedelta(days=i, hours=14),
+                cases=i,
+                recovered=i // 2,
+                deaths=None,
+                hospitalized=i // 20,
+                icu=None,
+            )
+            for i in range(n)
+        ),
+    )
+    store.commit()
+
+
+@benchmark('stream_daily_stats', repeat=3)
+def bench_stream_daily_stats(scale: int, tmp_path: Path) -> BenchmarkRun:
+    """Stream the daily_stats table to a pipe as NDJSON, one flushed record
+    at a time."""
+    db_path = tmp_path / 'db.sqlite3'
+    n = 20000 * scale
+    fill_daily_stats(db_path, n)
+
+    def run() -> int:
+        with open(os.devnull, 'w') as f:
+            write_stream(iter_daily_stats(db_path), f, 'ndjson')
+        return n
+
+    return run
+
+
+@benchmark('list_daily_stats_write_csv', repeat=3)
+def bench_list_daily_stats(scale: int, tmp_path: Path) -> BenchmarkRun:
+    """The same table as `stream_daily_stats`, loaded whole and written by
+    write_csv."""
+    db_path = tmp_path / 'db.sqlite3'
+    n = 20000 * scale
+    fill_daily_stats(db_path, n)
+
+    def run() -> int:
+        write_csv(
+            list_daily_stats(db_path),
+            tmp_path / 'output.csv',
+            OUTPUT_HOSP_FIELDS,
+        )
+        return n
+
+    return run
+
+
+@benchmark('parse_press_releases_pipeline', repeat=3)
+def bench_pipeline(scale: int, tmp_path: Path) -> BenchmarkRun:
+    config = load_config()
+    cache_path = tmp_path / 'cache'
+    n_press_releases = 20 * scale
+    n_district_tables = 100 * scale
+    n_dashboards = 2 * scale
+    generate_cache(
+        cache_path,
+        n_press_releases=n_press_releases,
+        n_district_tables=n_district_tables,
+        n_dashboards=n_dashboards,
+    )
+    counter = itertools.count()
+
+    def run() -> int:
+        i = next(counter)
+        main(
+            cache_path,
+            config,
+            output_path=tmp_path / f'output-{i}.csv',
+            output_hosp_path=tmp_path / f'output-hosp-{i}.csv',
+        )
+        return n_press_releases + n_district_tables + n_dashboards
+
+    return run
+
+
+@benchmark('parse_dashboards_pipeline', repeat=3)
+def bench_parse_dashboards(scale: int, tmp_path: Path) -> BenchmarkRun:
+    kwargs = get_parse_dashboard_kwargs(load_config())
+    cache_path = tmp_path / 'cache'
+    n_dashboards = 4 * scale
+    generate_cache(
+        cache_path,
+        n_press_releases=0,
+        n_district_tables=0,
+        n_dashboards=n_dashboards,
+    )
+
+    def run() -> int:
+        return sum(
+            1
+            for _ in parse_dashboards(
+                cache_path / 'db.sqlite3',
+                parse_workers=2,
+                **kwargs,
+            )
+        )
+
+    return run
+
+
+@benchmark('derived_metrics', repeat=3)
+def bench_derived_metrics(scale: int, tmp_path: Path) -> BenchmarkRun:
+    """Compute and write the derived metrics of a multi-year daily series
+    with missing days, missing deaths and downward corrections."""
+    n = 3 * 365 * scale
+    stats_list = [
+        PressReleaseStats(
+            timestamp=START_DATE + datetime.timedelta(days=i, hours=14),
+            cases=i * 100 - (50 if i % 30 == 0 else 0),
+            recovered=None,
+            deaths=i if i % 5 else None,
+            hospitalized=None,
+            icu=None,
+        )
+        for i in range(n)
+        if i % 11 != 10
+    ]
+    output_path = tmp_path / 'output_derived.csv'
+
+    def run() -> int:
+        write_derived_csv(stats_list, output_path, DEFAULT_POPULATION)
+        return len(stats_list)
+
+    return run
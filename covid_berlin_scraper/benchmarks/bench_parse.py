@@ -0,0 +1,177 @@
+import gzip
+from pathlib import Path
+
+from covid_berlin_scraper.articles import trim_page
+from covid_berlin_scraper.benchmarks.corpus import (
+    generate_dashboards, generate_district_tables,
+    generate_press_release_contents, load_config, load_dashboard_contents,
+)
+from covid_berlin_scraper.benchmarks.runner import BenchmarkRun, benchmark
+from covid_berlin_scraper.model import encode_fixing_mojibake
+from covid_berlin_scraper.parse_press_releases import (
+    PressReleaseContent, get_parse_dashboard_kwargs,
+    get_parse_district_table_kwargs, get_parse_press_release_kwargs,
+    parse_dashboard, parse_district_table, parse_district_table_columns,
+    parse_district_table_districts, parse_press_release, read_district_table,
+)
+from covid_berlin_scraper.utils.http_utils import RawContent, detect_charset
+
+
+@benchmark('parse_press_release')
+def bench_parse_press_release(scale: int, tmp_path: Path) -> BenchmarkRun:
+    kwargs = get_parse_press_release_kwargs(load_config())
+    contents = list(generate_press_release_contents(20 * scale))
+
+    def run() -> int:
+        for content in contents:
+            parse_press_release(content, **kwargs)
+        return len(contents)
+
+    return run
+
+
+def bench_parse_press_release_layout(
+    scale: int, with_table: bool
+) -> BenchmarkRun:
+    kwargs = get_parse_press_release_kwargs(load_config())
+    contents = list(
+        generate_press_release_contents(20 * scale, with_table=with_table)
+    )
+
+    def run() -> int:
+        for content in contents:
+            parse_press_release(content, **kwargs)
+        return len(contents)
+
+    return run
+
+
+@benchmark('parse_press_release_table')
+def bench_parse_press_release_table(
+    scale: int, tmp_path: Path
+) -> BenchmarkRun:
+    return bench_parse_press_release_layout(scale, with_table=True)
+
+
+@benchmark('parse_press_release_prose')
+def bench_parse_press_release_prose(
+    scale: int, tmp_path: Path
+) -> BenchmarkRun:
+    return bench_parse_press_release_layout(scale, with_table=False)
+
+
+@benchmark('parse_press_release_article')
+def bench_parse_press_release_article(
+    scale: int, tmp_path: Path
+) -> BenchmarkRun:
+    config = load_config()
+    kwargs = get_parse_press_release_kwargs(config)
+    article_selector = config['download_press_release']['article_selector']
+    contents = [
+        PressReleaseContent(
+            press_release=content.press_release,
+            html=trim_page(
+                RawContent(content=content.html.encode(), charset='utf-8'),
+                article_selector,
+            ).text,
+        )
+        for content in generate_press_release_contents(20 * scale)
+    ]
+
+    def run() -> int:
+        for content in contents:
+            parse_press_release(content, **kwargs)
+        return len(contents)
+
+    return run
+
+
+@benchmark('trim_press_release_page')
+def bench_trim_press_release_page(scale: int, tmp_path: Path) -> BenchmarkRun:
+    article_selector = load_config()['download_press_release'][
+        'article_selector'
+    ]
+    pages = [
+        RawContent(content=content.html.encode(), charset='utf-8')
+        for content in generate_press_release_contents(20 * scale)
+    ]
+
+    def run() -> int:
+        for page in pages:
+            trim_page(page, article_selector)
+        return len(pages)
+
+    return run
+
+
+@benchmark('parse_district_table')
+def bench_parse_district_table(scale: int, tmp_path: Path) -> BenchmarkRun:
+    kwargs = get_parse_district_table_kwargs(load_config())
+    district_tables = list(generate_district_tables(100 * scale))
+
+    def run() -> int:
+        for district_table in district_tables:
+            parse_district_table(district_table, **kwargs)
+        return len(district_tables)
+
+    return run
+
+
+@benchmark('parse_district_table_districts')
+def bench_parse_district_table_districts(
+    scale: int, tmp_path: Path
+) -> BenchmarkRun:
+    kwargs = get_parse_district_table_kwargs(load_config())
+    district_tables = list(generate_district_tables(100 * scale))
+
+    def run() -> int:
+        for district_table in district_tables:
+            table = read_district_table(district_table, kwargs['delimiter'])
+            parse_district_table_columns(table, **kwargs)
+            parse_district_table_districts(table, **kwargs)
+        return len(district_tables)
+
+    return run
+
+
+@benchmark('parse_dashboard', repeat=3)
+def bench_parse_dashboard(scale: int, tmp_path: Path) -> BenchmarkRun:
+    kwargs = get_parse_dashboard_kwargs(load_config())
+    dashboards = list(generate_dashboards(2 * scale))
+
+    def run() -> int:
+        for dashboard in dashboards:
+            parse_dashboard(dashboard, **kwargs)
+        return len(dashboards)
+
+    return run
+
+
+@benchmark('encode_dashboard_fixing_mojibake', repeat=3)
+def bench_encode_fixing_mojibake(scale: int, tmp_path: Path) -> BenchmarkRun:
+    # Dashboards used to be stored as UTF-8 mis-decoded as ISO-8859-1.
+    contents = [
+        gzip.decompress(content).decode('iso-8859-1')
+        for content in load_dashboard_contents()
+    ] * scale
+
+    def run() -> int:
+        for content in contents:
+            encode_fixing_mojibake(content)
+        return len(contents)
+
+    return run
+
+
+@benchmark('detect_charset_dashboard')
+def bench_detect_charset(scale: int, tmp_path: Path) -> BenchmarkRun:
+    contents = [
+        gzip.decompress(content) for content in load_dashboard_contents()
+    ] * scale
+
+    def run() -> int:
+        for content in contents:
+            detect_charset(content, 'text/html')
+        return len(contents)
+
+    return run
@@ -0,0 +1,195 @@
+import datetime
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from covid_berlin_scraper.benchmarks.corpus import (
+    generate_dashboards, generate_district_tables, generate_press_releases,
+)
+from covid_berlin_scraper.benchmarks.runner import BenchmarkRun, benchmark
+from covid_berlin_scraper.model import (
+    DashboardStore, DistrictTable, DistrictTableStore, PressRelease,
+    PressReleasesStore, get_engine,
+)
+from covid_berlin_scraper.writer import DatabaseWriter
+
+
+@benchmark('store_append_press_releases')
+def bench_store_append(scale: int, tmp_path: Path) -> BenchmarkRun:
+    press_releases = [
+        press_release
+        for press_release, _ in generate_press_releases(50 * scale)
+    ]
+    counter = itertools.count()
+
+    def run() -> int:
+        store = PressReleasesStore(tmp_path / f'{next(counter)}.sqlite3')
+        for press_release in press_releases:
+            store.append(
+                PressRelease(
+                    timestamp=press_release.timestamp,
+                    title=press_release.title,
+                    url=press_release.url,
+                )
+            )
+        return len(press_releases)
+
+    return run
+
+
+@benchmark('store_list_district_tables')
+def bench_store_list(scale: int, tmp_path: Path) -> BenchmarkRun:
+    db_path = tmp_path / 'db.sqlite3'
+    store = DistrictTableStore(db_path)
+    for district_table in generate_district_tables(200 * scale):
+        store.append(district_table)
+
+    def run() -> int:
+        return sum(1 for _ in DistrictTableStore(db_path).list())
+
+    return run
+
+
+def fill_press_releases(db_path: Path, n: int):
+    PressReleasesStore(db_path)
+    timestamp = datetime.datetime(2020, 3, 1)
+    with get_engine(db_path).begin() as conn:
+        conn.execute(
+            insert(PressRelease),
+            [
+                dict(
+                    timestamp=timestamp + datetime.timedelta(minutes=i),
+                    title=f'Corona-Virus: Aktuelle Fallzahlen {i}',
+                    url=f'https://www.berlin.de/presse/{i}.php',
+                )
+                for i in range(n)
+            ],
+        )
+
+
+@benchmark('store_list_press_releases', repeat=3)
+def bench_store_list_press_releases(
+    scale: int, tmp_path: Path
+) -> BenchmarkRun:
+    db_path = tmp_path / 'db.sqlite3'
+    fill_press_releases(db_path, 100000 * scale)
+
+    def run() -> int:
+        return sum(1 for _ in PressReleasesStore(db_path).list())
+
+    return run
+
+
+@benchmark('store_list_press_releases_orm', repeat=3)
+def bench_store_list_press_releases_orm(
+    scale: int, tmp_path: Path
+) -> BenchmarkRun:
+    """The same listing as `store_list_press_releases` via ORM entities."""
+    db_path = tmp_path / 'db.sqlite3'
+    fill_press_releases(db_path, 100000 * scale)
+
+    def run() -> int:
+        with Session(get_engine(db_path)) as session:
+            return sum(
+                1
+                for _ in session.scalars(
+                    select(PressRelease).order_by(PressRelease.timestamp)
+                )
+            )
+
+    return run
+
+
+@benchmark('store_read_dashboards', repeat=3)
+def bench_store_read_dashboards(scale: int, tmp_path: Path) -> BenchmarkRun:
+    db_path = tmp_path / 'db.sqlite3'
+    store = DashboardStore(db_path)
+    for dashboard in generate_dashboards(10 * scale):
+        store.append(dashboard)
+
+    def run() -> int:
+        store = DashboardStore(db_path)
+        n = 0
+        for dashboard in store.list(with_content=False):
+            with store.open_decompressed_content(dashboard) as f:
+                while f.read(64 * 1024):
+                    pass
+            n += 1
+        return n
+
+    return run
+
+
+def bench_append_parallel(
+    scale: int, tmp_path: Path, n_writers: int, use_writer: bool
+) -> BenchmarkRun:
+    """Append district tables from n_writers threads.
+
+    Each thread either appends through its own store, committing every row,
+    or submits the rows to one shared `DatabaseWriter`.
+    """
+    n_rows = 1600 * scale // n_writers
+    district_tables = list(generate_district_tables(1))
+    counter = itertools.count()
+
+    def generate(writer: int) -> Iterator[DistrictTable]:
+        for i in range(n_rows):
+            yield DistrictTable(
+                timestamp=district_tables[0].timestamp
+                + datetime.timedelta(minutes=writer * n_rows + i),
+                content=district_tables[0].content,
+                charset=district_tables[0].charset,
+            )
+
+    def write(db_path: Path, writer: int):
+        store = DistrictTableStore(db_path)
+        for district_table in generate(writer):
+            store.append(district_table)
+
+    def run() -> int:
+        db_path = tmp_path / f'{next(counter)}.sqlite3'
+        DistrictTableStore(db_path)
+        with ThreadPoolExecutor(max_workers=n_writers) as executor:
+            if use_writer:
+                with DatabaseWriter(db_path) as database_writer:
+                    futures = [
+                        executor.submit(
+                            database_writer.write_all, generate(writer)
+                        )
+                        for writer in range(n_writers)
+                    ]
+                    for future in futures:
+                        future.result()
+            else:
+                for future in [
+                    executor.submit(write, db_path, writer)
+                    for writer in range(n_writers)
+                ]:
+                    future.result()
+        return n_writers * n_rows
+
+    return run
+
+
+@benchmark('store_append_parallel_writers', repeat=3)
+def bench_store_append_parallel(scale: int, tmp_path: Path) -> BenchmarkRun:
+    return bench_append_parallel(scale, tmp_path, 4, use_writer=False)
+
+
+@benchmark('store_append_16_writers', repeat=3)
+def bench_store_append_16_writers(scale: int, tmp_path: Path) -> BenchmarkRun:
+    return bench_append_parallel(scale, tmp_path, 16, use_writer=False)
+
+
+@benchmark('db_writer_4_producers', repeat=3)
+def bench_db_writer_4_producers(scale: int, tmp_path: Path) -> BenchmarkRun:
+    return bench_append_parallel(scale, tmp_path, 4, use_writer=True)
+
+
+@benchmark('db_writer_16_producers', repeat=3)
+def bench_db_writer_16_producers(scale: int, tmp_path: Path) -> BenchmarkRun:
+    return bench_append_parallel(scale, tmp_path, 16, use_writer=True)
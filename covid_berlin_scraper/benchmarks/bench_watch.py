@@ -0,0 +1,45 @@
+import datetime
+import itertools
+from pathlib import Path
+
+from covid_berlin_scraper.benchmarks.corpus import (
+    START_DATE, generate_cache, generate_district_table_content, load_config,
+)
+from covid_berlin_scraper.benchmarks.runner import BenchmarkRun, benchmark
+from covid_berlin_scraper.model import DistrictTable, DistrictTableStore
+from covid_berlin_scraper.watch import Watcher
+
+
+@benchmark('watch_refresh_district_table', repeat=5)
+def bench_watch_refresh(scale: int, tmp_path: Path) -> BenchmarkRun:
+    """Latency from a new district table to the refreshed outputs, with the
+    whole history already merged."""
+    n_district_tables = 300 * scale
+    generate_cache(tmp_path, 100 * scale, n_district_tables, 10 * scale)
+    watcher = Watcher(
+        tmp_path,
+        load_config(),
+        tmp_path / 'output.csv',
+        output_hosp_path=tmp_path / 'output_hosp.csv',
+        output_districts_path=tmp_path / 'output_districts.csv',
+    )
+    watcher.refresh()
+    store = DistrictTableStore(tmp_path / 'db.sqlite3')
+    counter = itertools.count(n_district_tables)
+
+    def run() -> int:
+        i = next(counter)
+        store.append(
+            DistrictTable(
+                timestamp=START_DATE + datetime.timedelta(days=i),
+                content=generate_district_table_content(
+                    1000 + i * 100
+                ).encode(),
+                charset='utf-8',
+            )
+        )
+        if not watcher.refresh():
+            raise Exception('The new district table was not detected')
+        return 1
+
+    return run
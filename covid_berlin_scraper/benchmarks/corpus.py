@@ -0,0 +1,210 @@
+import datetime
+import json
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import dateutil.tz
+
+from covid_berlin_scraper.articles import ARTICLES_DIR, trim_page
+from covid_berlin_scraper.model import (
+    Dashboard, DashboardStore, DistrictTable, DistrictTableStore, PressRelease,
+    PressReleasesStore,
+)
+from covid_berlin_scraper.parse_press_releases import PressReleaseContent
+from covid_berlin_scraper.utils.http_utils import RawContent, safe_filename
+
+TEST_DATA_PATH = Path(__file__).parent.parent / 'tests' / 'test_data'
+CONFIG_PATH = Path(__file__).parent.parent / 'config.sample.json'
+DASHBOARD_FIXTURES = ['corona.html.gz', 'corona-230827.html.gz']
+DISTRICTS = [
+    'Mitte',
+    'Friedrichshain-Kreuzberg',
+    'Pankow',
+    'Charlottenburg-Wilmersdorf',
+    'Spandau',
+    'Steglitz-Zehlendorf',
+    'Tempelhof-Schöneberg',
+    'Neukölln',
+    'Treptow-Köpenick',
+    'Marzahn-Hellersdorf',
+    'Lichtenberg',
+    'Reinickendorf',
+]
+START_DATE = datetime.datetime(
+    2020, 3, 1, 15, 0, tzinfo=dateutil.tz.gettz('Europe/Berlin')
+)
+PRESS_RELEASE_URL = (
+    'https://www.berlin.de/sen/gpg/service/presse/2020/'
+    'pressemitteilung.{}.php'
+)
+PAGE_HEADER = '''<!DOCTYPE html>
+<html lang="de">
+<head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+<div id="layout-grid__area--header">{navigation}</div>
+<div id="layout-grid__area--maincontent">
+<div class="article">
+<h1 class="title">{title}</h1>
+<div class="textile">
+'''
+PAGE_FOOTER = '''</div>
+</div>
+</div>
+<div id="layout-grid__area--footer">{navigation}</div>
+</body>
+</html>
+'''
+NAVIGATION = ''.join(
+    f'<li><a href="/sen/gpg/service/{i}/">Navigation {i}</a></li>'
+    for i in range(200)
+)
+
+
+def load_config() -> dict:
+    with CONFIG_PATH.open() as f:
+        return json.load(f)
+
+
+def format_number(n: int) -> str:
+    return f'{n:,}'.replace(',', '.')
+
+
+def generate_press_release_html(
+    title: str, cases: int, deaths: int, with_table: bool
+) -> str:
+    parts = [PAGE_HEADER.format(title=title, navigation=NAVIGATION)]
+    if with_table:
+        parts.append(
+            '<p>Die Senatsverwaltung für Gesundheit meldet die aktuellen '
+            'Fallzahlen.</p>\n'
+            '<table><tr><th>Bezirk</th><th>Fallzahl</th>'
+            '<th>Differenz</th><th>Genesen</th></tr>\n'
+        )
+        for district in DISTRICTS:
+            parts.append(
+                f'<tr><td>{district}</td>'
+                f'<td>{format_number(cases // len(DISTRICTS))}</td>'
+                f'<td>12</td>'
+                f'<td>{format_number(cases // len(DISTRICTS) // 2)}</td>'
+                '</tr>\n'
+            )
+        parts.append(
+            f'<tr><td>Summe</td><td>{format_number(cases)}</td>'
+            f'<td>144</td><td>{format_number(cases // 2)}</td></tr>\n'
+            '</table>\n'
+        )
+    else:
+        parts.append(
+            f'<p>In Berlin gibt es {cases} bestätigte Fälle. '
+            'Die Gesundheitsämter ermitteln die Kontaktpersonen.</p>\n'
+        )
+    parts.append(
+        f'<p>{deaths} Personen sind bislang an dem neuartigen Coronavirus '
+        'verstorben. Im Krankenhaus isoliert und behandelt werden '
+        f'{cases // 20}, davon {cases // 100} intensivmedizinisch '
+        'behandelt.</p>\n'
+    )
+    parts.append(PAGE_FOOTER.format(navigation=NAVIGATION))
+    return ''.join(parts)
+
+
+def generate_press_releases(
+    n: int, with_table: Optional[bool] = None
+) -> Iterator[Tuple[PressRelease, str]]:
+    """Generate press releases and their HTML alternating between the table
+    and the prose layout, or only of one layout if `with_table` is
+    passed."""
+    for i in range(n):
+        timestamp = START_DATE + datetime.timedelta(days=i)
+        title = f'Coronavirus in Berlin: {100 + i * 10} bestätigte Fälle'
+        press_release = PressRelease(
+            timestamp=timestamp,
+            title=title,
+            url=PRESS_RELEASE_URL.format(1000000 + i),
+        )
+        html = generate_press_release_html(
+            title,
+            cases=100 + i * 10,
+            deaths=i // 10,
+            with_table=i % 2 == 0 if with_table is None else with_table,
+        )
+        yield press_release, html
+
+
+def generate_press_release_contents(
+    n: int, with_table: Optional[bool] = None
+) -> Iterator[PressReleaseContent]:
+    for press_release, html in generate_press_releases(n, with_table):
+        yield PressReleaseContent(press_release=press_release, html=html)
+
+
+def generate_district_table_content(cases: int, delimiter=';') -> str:
+    lines = [delimiter.join(['Bezirk', 'Fallzahl', 'Differenz', 'Genesen'])]
+    for district in DISTRICTS:
+        lines.append(
+            delimiter.join(
+                [
+                    district,
+                    str(cases // len(DISTRICTS)),
+                    '12',
+                    str(cases // len(DISTRICTS) // 2),
+                ]
+            )
+        )
+    lines.append(
+        delimiter.join(['Berlin', str(cases), '144', str(cases // 2)])
+    )
+    return '\n'.join(lines) + '\n'
+
+
+def generate_district_tables(n: int) -> Iterator[DistrictTable]:
+    for i in range(n):
+        yield DistrictTable(
+            timestamp=START_DATE + datetime.timedelta(days=i),
+            content=generate_district_table_content(1000 + i * 100).encode(),
+            charset='utf-8',
+        )
+
+
+def load_dashboard_contents() -> List[bytes]:
+    return [
+        (TEST_DATA_PATH / filename).read_bytes()
+        for filename in DASHBOARD_FIXTURES
+    ]
+
+
+def generate_dashboards(n: int) -> Iterator[Dashboard]:
+    contents = load_dashboard_contents()
+    for i in range(n):
+        yield Dashboard(
+            timestamp=START_DATE + datetime.timedelta(days=i),
+            content=contents[i % len(contents)],
+        )
+
+
+def generate_cache(
+    cache_path: Path,
+    n_press_releases: int,
+    n_district_tables: int,
+    n_dashboards: int,
+):
+    db_path = cache_path / 'db.sqlite3'
+    articles_path = cache_path / ARTICLES_DIR
+    articles_path.mkdir(parents=True, exist_ok=True)
+    config = load_config()
+    press_releases_store = PressReleasesStore(db_path)
+    for press_release, html in generate_press_releases(n_press_releases):
+        article = trim_page(
+            RawContent(content=html.encode(), charset='utf-8'),
+            config['download_press_release']['article_selector'],
+        )
+        (articles_path / safe_filename(press_release.url)).write_bytes(
+            article.content
+        )
+        press_releases_store.append(press_release)
+    district_table_store = DistrictTableStore(db_path)
+    for district_table in generate_district_tables(n_district_tables):
+        district_table_store.append(district_table)
+    dashboard_store = DashboardStore(db_path)
+    for dashboard in generate_dashboards(n_dashboards):
+        dashboard_store.append(dashboard)
@@ -0,0 +1,181 @@
+import json
+import logging
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from covid_berlin_scraper.model import dispose_engines
+
+logger = logging.getLogger(__name__)
+
+BenchmarkRun = Callable[[], int]
+BenchmarkSetup = Callable[[int, Path], BenchmarkRun]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: BenchmarkSetup
+    repeat: int
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    min: float
+    median: float
+    items: int
+    repeat: int
+    peak_memory: Optional[int] = None
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.min if self.min else 0.0
+
+    def asdict(self) -> dict:
+        data = {
+            'min': self.min,
+            'median': self.median,
+            'items': self.items,
+            'repeat': self.repeat,
+            'items_per_second': self.items_per_second,
+        }
+        if self.peak_memory is not None:
+            data['peak_memory'] = self.peak_memory
+        return data
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, repeat: int = 5):
+    """Register a benchmark.
+
+    The decorated function receives the corpus scale and a temporary
+    directory, prepares its inputs and returns the function to be timed,
+    which must return the number of items it processed.
+    """
+
+    def decorator(setup: BenchmarkSetup) -> BenchmarkSetup:
+        BENCHMARKS[name] = Benchmark(name=name, setup=setup, repeat=repeat)
+        return setup
+
+    return decorator
+
+
+def measure_peak_memory(run: BenchmarkRun) -> int:
+    """Run once more with tracemalloc and return the peak of the memory
+    allocated during the run."""
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_benchmark(
+    bench: Benchmark, scale: int, memory: bool = False
+) -> BenchmarkResult:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run = bench.setup(scale, Path(tmp_dir))
+        durations = []
+        items = 0
+        for _ in range(bench.repeat):
+            start = time.perf_counter()
+            items = run()
+            durations.append(time.perf_counter() - start)
+        peak_memory = measure_peak_memory(run) if memory else None
+        dispose_engines()
+    return BenchmarkResult(
+        name=bench.name,
+        min=min(durations),
+        median=statistics.median(durations),
+        items=items,
+        repeat=bench.repeat,
+        peak_memory=peak_memory,
+    )
+
+
+def run_benchmarks(
+    names: Optional[Iterable[str]], scale: int, memory: bool = False
+) -> List[BenchmarkResult]:
+    results = []
+    for name in names or BENCHMARKS.keys():
+        logger.info('Running benchmark %s', name)
+        result = run_benchmark(BENCHMARKS[name], scale, memory)
+        logger.info(
+            '%s: min %.4fs, median %.4fs, %d items',
+            name,
+            result.min,
+            result.median,
+            result.items,
+        )
+        results.append(result)
+    return results
+
+
+def dump_results(results: Iterable[BenchmarkResult], scale: int) -> dict:
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scale': scale,
+        'benchmarks': {result.name: result.asdict() for result in results},
+    }
+
+
+def compare_results(
+    results: dict, baseline: dict, threshold: float
+) -> List[str]:
+    if results['scale'] != baseline['scale']:
+        raise Exception(
+            f'Cannot compare scale {results["scale"]} '
+            f'with baseline scale {baseline["scale"]}'
+        )
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        baseline_result = baseline['benchmarks'].get(name)
+        if not baseline_result:
+            continue
+        ratio = result['min'] / baseline_result['min']
+        if ratio > threshold:
+            regressions.append(
+                f'{name}: {result["min"]:.4f}s vs. baseline '
+                f'{baseline_result["min"]:.4f}s ({ratio:.2f}x)'
+            )
+    return regressions
+
+
+def format_results(results: Iterable[BenchmarkResult]) -> str:
+    lines = [
+        f'{"benchmark":<40} {"min":>10} {"median":>10} {"items/s":>12} '
+        f'{"peak MiB":>10}'
+    ]
+    for result in results:
+        peak_memory = (
+            f'{result.peak_memory / 1024 / 1024:>10.1f}'
+            if result.peak_memory is not None
+            else f'{"-":>10}'
+        )
+        lines.append(
+            f'{result.name:<40} {result.min:>10.4f} {result.median:>10.4f} '
+            f'{result.items_per_second:>12.1f} {peak_memory}'
+        )
+    return '\n'.join(lines)
+
+
+def load_json(path: Path) -> dict:
+    with path.open() as f:
+        return json.load(f)
+
+
+def write_json(data: dict, path: Path):
+    with path.open('w') as f:
+        json.dump(data, f, indent=2)
+        f.write('\n')
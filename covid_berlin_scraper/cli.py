@@ -1,10 +1,26 @@
 import argparse
+import datetime
+import importlib
 import json
 import logging
+import os
 import sys
+import time
 from pathlib import Path
 
 from covid_berlin_scraper import __title__
+from covid_berlin_scraper.utils.http_replay_utils import (
+    HttpArchive, RecordingAdapter, ReplayingAdapter,
+)
+from covid_berlin_scraper.utils.http_utils import (
+    HTTP_ADAPTER_KWARGS, mount_http_adapter,
+)
+from covid_berlin_scraper.utils.metrics_utils import (
+    MetricsCollector, get_registry, start_metrics_server,
+)
+from covid_berlin_scraper.utils.profile_utils import (
+    capture_profile, enable_profiler,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -33,18 +49,163 @@ def download_archives(cache_path, config, args):
     main(cache_path, config)
 
 
-def compress_dashboards(cache_path, config, args):
-    from covid_berlin_scraper.compress_dashboards import main
+def migrate(cache_path, config, args):
+    from covid_berlin_scraper.migrations import main
 
-    main(cache_path, config)
+    main(
+        cache_path,
+        config,
+        target=args.to,
+        chunk_size=args.chunk_size,
+        vacuum=args.vacuum,
+        trim_pages=args.trim_pages,
+    )
 
 
 def parse_press_releases(cache_path, config, args):
+    from covid_berlin_scraper.model import Partition
     from covid_berlin_scraper.parse_press_releases import main
 
+    output_path = Path(args.output) if args.output else None
+    output_hosp_path = Path(args.output_hosp) if args.output_hosp else None
+    output_districts_path = (
+        Path(args.output_districts) if args.output_districts else None
+    )
+    partition = Partition.from_spec(args.partition) if args.partition else None
+    partial_output_path = (
+        Path(args.partial_output) if args.partial_output else None
+    )
+    try:
+        main(
+            cache_path,
+            config,
+            output_path,
+            output_hosp_path,
+            output_districts_path=output_districts_path,
+            partition=partition,
+            partial_output_path=partial_output_path,
+            source_names=args.source,
+            rebuild=args.rebuild,
+            stream_format=args.stream,
+            output_derived_path=(
+                Path(args.output_derived) if args.output_derived else None
+            ),
+        )
+    except BrokenPipeError:
+        # The consumer of --stream exited; keep Python from failing again
+        # when it flushes standard output at exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+
+def merge_stats(cache_path, config, args):
+    from covid_berlin_scraper.merge_stats import main
+
+    main(
+        [Path(path) for path in args.partials],
+        Path(args.output),
+        Path(args.output_hosp) if args.output_hosp else None,
+    )
+
+
+def list_failures(cache_path, config, args):
+    from covid_berlin_scraper.quarantine import main
+
+    main(cache_path, config, clear=args.clear, source=args.source)
+
+
+def run_all(cache_path, config, args):
+    from covid_berlin_scraper.run_all import main
+
     output_path = Path(args.output)
     output_hosp_path = Path(args.output_hosp) if args.output_hosp else None
-    main(cache_path, config, output_path, output_hosp_path)
+    output_districts_path = (
+        Path(args.output_districts) if args.output_districts else None
+    )
+    schedule = main(
+        cache_path,
+        config,
+        output_path,
+        output_hosp_path,
+        output_districts_path=output_districts_path,
+        archives=args.archives,
+        max_workers=args.jobs,
+    )
+    print(schedule.format_report(), file=sys.stderr)
+    if schedule.failed:
+        sys.exit(1)
+
+
+def poll(cache_path, config, args):
+    from covid_berlin_scraper.poll import format_report, main
+
+    policy_kwargs = dict(
+        dense_interval=datetime.timedelta(minutes=args.dense_interval),
+        sparse_interval=datetime.timedelta(minutes=args.sparse_interval),
+    )
+    history = datetime.timedelta(days=args.history_days)
+    if args.report:
+        print(
+            format_report(
+                cache_path,
+                config,
+                history=history,
+                fixed_interval=datetime.timedelta(minutes=args.fixed_interval),
+                **policy_kwargs,
+            )
+        )
+        return
+    main(
+        cache_path,
+        config,
+        history=history,
+        max_polls=args.max_polls,
+        **policy_kwargs,
+    )
+
+
+def watch(cache_path, config, args):
+    from covid_berlin_scraper.watch import main
+
+    main(
+        cache_path,
+        config,
+        Path(args.output),
+        Path(args.output_hosp) if args.output_hosp else None,
+        output_districts_path=(
+            Path(args.output_districts) if args.output_districts else None
+        ),
+        history=datetime.timedelta(days=args.history_days),
+        max_polls=args.max_polls,
+        dense_interval=datetime.timedelta(minutes=args.dense_interval),
+        sparse_interval=datetime.timedelta(minutes=args.sparse_interval),
+    )
+
+
+def serve_api(cache_path, config, args):
+    from covid_berlin_scraper.serve_api import main
+
+    main(
+        cache_path,
+        address=args.address,
+        port=args.port,
+        refresh_interval=args.refresh_interval,
+    )
+
+
+def replay_server(cache_path, config, args):
+    from covid_berlin_scraper.replay_server import main
+
+    main(
+        Path(args.archive),
+        address=args.address,
+        port=args.port,
+        latency=args.latency / 1000,
+        bandwidth=args.bandwidth * 1024 if args.bandwidth else None,
+        error_rate=args.error_rate,
+        reset_rate=args.reset_rate,
+        seed=args.seed,
+    )
 
 
 def main():
@@ -61,8 +222,60 @@ def main():
         help='Configuration JSON file path',
         default=str(Path(__file__).parent / 'config.sample.json'),
     )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Print per-stage timings and counters to stderr',
+    )
+    parser.add_argument(
+        '--profile-output',
+        help='Write per-stage timings and counters to this JSON file path',
+    )
+    parser.add_argument(
+        '--profile-capture',
+        choices=['cprofile', 'pyinstrument'],
+        help='Capture a function-level profile with this profiler',
+    )
+    parser.add_argument(
+        '--profile-capture-output',
+        help=(
+            'Output file path of the captured profile (cProfile stats '
+            'or pyinstrument HTML); default: print to stderr'
+        ),
+    )
 
-    subparsers = parser.add_subparsers()
+    parser.add_argument(
+        '--metrics-textfile',
+        help=(
+            'Write Prometheus metrics to this file path '
+            '(for the node exporter textfile collector)'
+        ),
+    )
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        help='Serve Prometheus metrics on this port at /metrics',
+    )
+    parser.add_argument(
+        '--metrics-address',
+        default='127.0.0.1',
+        help='Address to serve Prometheus metrics on',
+    )
+
+    http_group = parser.add_mutually_exclusive_group()
+    http_group.add_argument(
+        '--http-record',
+        help='Record all HTTP responses into this archive file path',
+    )
+    http_group.add_argument(
+        '--http-replay',
+        help=(
+            'Send all HTTP requests to the replay server at this URL '
+            '(e.g. http://127.0.0.1:8081)'
+        ),
+    )
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
 
     download_feed_parser = subparsers.add_parser(
         'download-feed', help='Download feed'
@@ -84,10 +297,29 @@ def main():
     )
     download_archives_parser.set_defaults(func=download_archives)
 
-    compress_dashboards_parser = subparsers.add_parser(
-        'compress-dashboards', help='Compress dashboards'
-    )
-    compress_dashboards_parser.set_defaults(func=compress_dashboards)
+    for name, help in (
+        ('migrate', 'Migrate the database schema'),
+        ('compress-dashboards', 'Compress dashboards (alias of migrate)'),
+    ):
+        migrate_parser = subparsers.add_parser(name, help=help)
+        migrate_parser.add_argument(
+            '--to',
+            type=int,
+            help='Target schema version; default: latest',
+        )
+        migrate_parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help='Number of rows migrated per transaction',
+        )
+        migrate_parser.add_argument(
+            '--vacuum',
+            action='store_true',
+            help='Vacuum the database after migrating',
+        )
+        # The alias only migrates the database.
+        migrate_parser.set_defaults(func=migrate, trim_pages=name == 'migrate')
 
     parse_press_releases_parser = subparsers.add_parser(
         'parse-press-releases', help='Parse press releases'
@@ -96,7 +328,6 @@ def main():
         '-o',
         '--output',
         help='Output CSV file path; columns: date, cases, recovered, deaths',
-        required=True,
     )
     parse_press_releases_parser.add_argument(
         '--output-hosp',
@@ -105,9 +336,307 @@ def main():
             'date, cases, recovered, deaths, hospitalized, icu'
         ),
     )
+    parse_press_releases_parser.add_argument(
+        '--output-districts',
+        help=(
+            'Output CSV file path of the district tables per district; '
+            'columns: date, district, cases, recovered'
+        ),
+    )
+    parse_press_releases_parser.add_argument(
+        '--output-derived',
+        help=(
+            'Output CSV file path; columns: date, cases, new_cases, '
+            'new_cases_7d, incidence_7d (per 100,000 inhabitants), deaths, '
+            'new_deaths, new_deaths_7d'
+        ),
+    )
+    parse_press_releases_parser.add_argument(
+        '--stream',
+        choices=['csv', 'ndjson'],
+        help=(
+            'Write the stats to standard output one record at a time, as CSV '
+            'with the columns of --output-hosp or as NDJSON'
+        ),
+    )
+    parse_press_releases_parser.add_argument(
+        '--partition',
+        help=(
+            'Parse only a part of the stored rows: a time range '
+            'START..END (e.g. 2020-03-01..2020-07-01, either may be '
+            'omitted) or a shard INDEX/COUNT (e.g. 0/4)'
+        ),
+    )
+    parse_press_releases_parser.add_argument(
+        '--partial-output',
+        help='Output file path of the partial stats for merge-stats',
+    )
+    parse_press_releases_parser.add_argument(
+        '--source',
+        action='append',
+        help=(
+            'Parse only this source (e.g. press_releases, district_tables, '
+            'dashboards or a source added by a plugin); may be repeated'
+        ),
+    )
+    parse_press_releases_parser.add_argument(
+        '--rebuild',
+        action='store_true',
+        help='Parse all stored rows again instead of only the changed ones',
+    )
     parse_press_releases_parser.set_defaults(func=parse_press_releases)
 
+    merge_stats_parser = subparsers.add_parser(
+        'merge-stats',
+        help='Merge partial stats written by parse-press-releases',
+    )
+    merge_stats_parser.add_argument(
+        'partials', nargs='+', help='Partial stats file paths'
+    )
+    merge_stats_parser.add_argument(
+        '-o',
+        '--output',
+        help='Output CSV file path; columns: date, cases, recovered, deaths',
+        required=True,
+    )
+    merge_stats_parser.add_argument(
+        '--output-hosp',
+        help=(
+            'Output CSV file path; columns: '
+            'date, cases, recovered, deaths, hospitalized, icu'
+        ),
+    )
+    merge_stats_parser.set_defaults(func=merge_stats)
+
+    list_failures_parser = subparsers.add_parser(
+        'list-failures',
+        help=(
+            'List the stored items that failed to parse and are skipped '
+            'until their content or the parsing config changes'
+        ),
+    )
+    list_failures_parser.add_argument(
+        '--source',
+        choices=[
+            'press_releases',
+            'district_tables',
+            'district_rows',
+            'dashboards',
+        ],
+        help='Only list the failures of this source',
+    )
+    list_failures_parser.add_argument(
+        '--clear',
+        action='store_true',
+        help='Remove the failures, so that the items are parsed again',
+    )
+    list_failures_parser.set_defaults(func=list_failures)
+
+    run_all_parser = subparsers.add_parser(
+        'run-all',
+        help=(
+            'Download all sources concurrently and parse them '
+            'as soon as they are ready'
+        ),
+    )
+    run_all_parser.add_argument(
+        '-o',
+        '--output',
+        help='Output CSV file path; columns: date, cases, recovered, deaths',
+        required=True,
+    )
+    run_all_parser.add_argument(
+        '--output-hosp',
+        help=(
+            'Output CSV file path; columns: '
+            'date, cases, recovered, deaths, hospitalized, icu'
+        ),
+    )
+    run_all_parser.add_argument(
+        '--output-districts',
+        help=(
+            'Output CSV file path of the district tables per district; '
+            'columns: date, district, cases, recovered'
+        ),
+    )
+    run_all_parser.add_argument(
+        '--archives',
+        action='store_true',
+        help='Also download press releases from the archive',
+    )
+    run_all_parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=4,
+        help='Maximum number of jobs to run concurrently',
+    )
+    run_all_parser.set_defaults(func=run_all)
+
+    poll_parser = subparsers.add_parser(
+        'poll',
+        help=(
+            'Poll the feed, district table and dashboard, densely around '
+            'the times at which they usually publish'
+        ),
+    )
+    poll_parser.add_argument(
+        '--dense-interval',
+        type=float,
+        default=2,
+        help='Minutes between polls inside publication windows',
+    )
+    poll_parser.add_argument(
+        '--sparse-interval',
+        type=float,
+        default=60,
+        help='Maximum minutes between polls outside publication windows',
+    )
+    poll_parser.add_argument(
+        '--history-days',
+        type=float,
+        default=28,
+        help='Days of publications to learn the publication windows from',
+    )
+    poll_parser.add_argument(
+        '--max-polls', type=int, help='Stop after this many polls'
+    )
+    poll_parser.add_argument(
+        '--report',
+        action='store_true',
+        help=(
+            'Instead of polling, print the freshness latency and number of '
+            'requests of the recorded polls and of the adaptive and fixed '
+            'polling replayed over the history'
+        ),
+    )
+    poll_parser.add_argument(
+        '--fixed-interval',
+        type=float,
+        default=15,
+        help='Minutes between polls of the fixed polling in the report',
+    )
+    poll_parser.set_defaults(func=poll)
+
+    watch_parser = subparsers.add_parser(
+        'watch',
+        help=(
+            'Poll like the poll command and update the outputs '
+            'as soon as a poll changed the database'
+        ),
+    )
+    watch_parser.add_argument(
+        '-o',
+        '--output',
+        help='Output CSV file path; columns: date, cases, recovered, deaths',
+        required=True,
+    )
+    watch_parser.add_argument(
+        '--output-hosp',
+        help=(
+            'Output CSV file path; columns: '
+            'date, cases, recovered, deaths, hospitalized, icu'
+        ),
+    )
+    watch_parser.add_argument(
+        '--output-districts',
+        help=(
+            'Output CSV file path of the district tables per district; '
+            'columns: date, district, cases, recovered'
+        ),
+    )
+    watch_parser.add_argument(
+        '--dense-interval',
+        type=float,
+        default=2,
+        help='Minutes between polls inside publication windows',
+    )
+    watch_parser.add_argument(
+        '--sparse-interval',
+        type=float,
+        default=60,
+        help='Maximum minutes between polls outside publication windows',
+    )
+    watch_parser.add_argument(
+        '--history-days',
+        type=float,
+        default=28,
+        help='Days of publications to learn the publication windows from',
+    )
+    watch_parser.add_argument(
+        '--max-polls', type=int, help='Stop after this many polls'
+    )
+    watch_parser.set_defaults(func=watch)
+
+    serve_api_parser = subparsers.add_parser(
+        'serve-api',
+        help='Serve the merged statistics over a read-only HTTP API',
+    )
+    serve_api_parser.add_argument(
+        '--address', default='127.0.0.1', help='Address to listen on'
+    )
+    serve_api_parser.add_argument(
+        '--port', type=int, default=8080, help='Port to listen on'
+    )
+    serve_api_parser.add_argument(
+        '--refresh-interval',
+        type=float,
+        default=60,
+        help='Seconds between checks whether the database changed',
+    )
+    serve_api_parser.set_defaults(func=serve_api)
+
+    replay_server_parser = subparsers.add_parser(
+        'replay-server',
+        help='Serve HTTP responses recorded with --http-record',
+    )
+    replay_server_parser.add_argument('archive', help='Archive file path')
+    replay_server_parser.add_argument(
+        '--address', default='127.0.0.1', help='Address to listen on'
+    )
+    replay_server_parser.add_argument(
+        '--port', type=int, default=8081, help='Port to listen on'
+    )
+    replay_server_parser.add_argument(
+        '--latency',
+        type=float,
+        default=0,
+        help='Milliseconds to wait before each response',
+    )
+    replay_server_parser.add_argument(
+        '--bandwidth',
+        type=float,
+        help='Maximum KiB per second sent per response; default: unlimited',
+    )
+    replay_server_parser.add_argument(
+        '--error-rate',
+        type=float,
+        default=0,
+        help='Share of requests answered with 503 Service Unavailable',
+    )
+    replay_server_parser.add_argument(
+        '--reset-rate',
+        type=float,
+        default=0,
+        help='Share of requests whose connection is closed without answer',
+    )
+    replay_server_parser.add_argument(
+        '--seed', type=int, help='Seed of the injected errors'
+    )
+    replay_server_parser.set_defaults(func=replay_server)
+
     args = parser.parse_args()
+    if (
+        args.command == 'parse-press-releases'
+        and not args.output
+        and not args.partial_output
+        and not args.stream
+        and not args.output_derived
+    ):
+        parser.error(
+            'one of the arguments -o/--output --partial-output --stream '
+            '--output-derived is required'
+        )
     if args.verbose:
         logging.basicConfig(
             stream=sys.stderr, level=logging.INFO, format='%(message)s'
@@ -116,8 +645,63 @@ def main():
     cache_path = Path(args.cache)
     with open(args.config, 'r') as f:
         config = json.load(f)
+    # Modules that register additional sources of stats.
+    for module_name in config.get('source_plugins', []):
+        importlib.import_module(module_name)
 
-    args.func(cache_path, config, args)
+    metrics_enabled = bool(
+        args.metrics_textfile or args.metrics_port is not None
+    )
+    profiler = (
+        enable_profiler()
+        if args.profile or args.profile_output or metrics_enabled
+        else None
+    )
+    if profiler and metrics_enabled:
+        registry = get_registry()
+        collector = MetricsCollector(registry, command=args.command)
+        profiler.listeners.append(collector)
+        if args.metrics_port is not None:
+            start_metrics_server(
+                registry, args.metrics_port, args.metrics_address
+            )
+    capture_output_path = (
+        Path(args.profile_capture_output)
+        if args.profile_capture_output
+        else None
+    )
+    http_archive = None
+    if args.http_record:
+        http_archive = HttpArchive()
+        mount_http_adapter(
+            RecordingAdapter(http_archive, **HTTP_ADAPTER_KWARGS)
+        )
+    elif args.http_replay:
+        mount_http_adapter(
+            ReplayingAdapter(args.http_replay, **HTTP_ADAPTER_KWARGS)
+        )
+    start = time.perf_counter()
+    success = False
+    try:
+        with capture_profile(args.profile_capture, capture_output_path):
+            args.func(cache_path, config, args)
+        success = True
+    finally:
+        if http_archive:
+            http_archive.write(Path(args.http_record))
+        if profiler and metrics_enabled:
+            collector.observe_command(
+                duration=time.perf_counter() - start,
+                success=success,
+                end=time.time(),
+            )
+            if args.metrics_textfile:
+                registry.write_textfile(Path(args.metrics_textfile))
+    if profiler:
+        if args.profile:
+            print(profiler.format_table(), file=sys.stderr)
+        if args.profile_output:
+            profiler.write_json(Path(args.profile_output))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,134 @@
+import csv
+import datetime
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+from covid_berlin_scraper.parse_press_releases import (
+    PressReleaseStats, ensure_str, get_unique_stats,
+)
+from covid_berlin_scraper.utils.profile_utils import count, stage
+
+# Population of Berlin on 31 December 2020 (Amt für Statistik
+# Berlin-Brandenburg).
+DEFAULT_POPULATION = 3664088
+ROLLING_DAYS = 7
+
+Column = List[Optional[int]]
+
+DERIVED_FIELDS = [
+    'date',
+    'cases',
+    'new_cases',
+    'new_cases_7d',
+    'incidence_7d',
+    'deaths',
+    'new_deaths',
+    'new_deaths_7d',
+]
+
+
+def get_population(config: dict) -> int:
+    return int(
+        config.get('derived_metrics', {}).get('population', DEFAULT_POPULATION)
+    )
+
+
+def shift(column: Sequence[Optional[int]], n: int) -> Column:
+    """Return the column moved n days later, padded with None."""
+    return [None] * n + list(column[: len(column) - n])
+
+
+def subtract(a: Sequence[Optional[int]], b: Sequence[Optional[int]]) -> Column:
+    """Subtract two columns element by element; None if either is None."""
+    return [
+        x - y if x is not None and y is not None else None
+        for x, y in zip(a, b)
+    ]
+
+
+@dataclass
+class DerivedMetrics:
+    """Daily columns of a cumulative series over consecutive dates.
+
+    Dates without stats are None in every column. New cases and deaths are
+    the differences of the cumulative values to the previous day and
+    therefore None after a missing day. The 7-day sums are the differences
+    to seven days before, which only need the two ends of the window, so
+    that missing days inside the window do not matter. A downward
+    correction of a cumulative value shows as negative new cases, so that
+    the new cases always add up to the cumulative cases.
+    """
+
+    dates: List[datetime.date]
+    cases: Column
+    new_cases: Column
+    new_cases_7d: Column
+    incidence_7d: List[Optional[float]]
+    deaths: Column
+    new_deaths: Column
+    new_deaths_7d: Column
+
+    def rows(self) -> Iterable[tuple]:
+        return zip(
+            self.dates,
+            self.cases,
+            self.new_cases,
+            self.new_cases_7d,
+            self.incidence_7d,
+            self.deaths,
+            self.new_deaths,
+            self.new_deaths_7d,
+        )
+
+
+def compute_derived_metrics(
+    stats_list: Iterable[PressReleaseStats], population: int
+) -> DerivedMetrics:
+    """Compute the derived columns of merged stats; the stats of each date
+    are the last ones, like in the CSV output."""
+    stats_by_date = {
+        stats.date: stats for stats in get_unique_stats(stats_list)
+    }
+    if not stats_by_date:
+        return DerivedMetrics([], [], [], [], [], [], [], [])
+    start = min(stats_by_date)
+    n_days = (max(stats_by_date) - start).days + 1
+    dates = [start + datetime.timedelta(days=i) for i in range(n_days)]
+    day_stats = [stats_by_date.get(date) for date in dates]
+    cases = [stats.cases if stats else None for stats in day_stats]
+    deaths = [stats.deaths if stats else None for stats in day_stats]
+    new_cases_7d = subtract(cases, shift(cases, ROLLING_DAYS))
+    return DerivedMetrics(
+        dates=dates,
+        cases=cases,
+        new_cases=subtract(cases, shift(cases, 1)),
+        new_cases_7d=new_cases_7d,
+        incidence_7d=[
+            round(n * 100000 / population, 1) if n is not None else None
+            for n in new_cases_7d
+        ],
+        deaths=deaths,
+        new_deaths=subtract(deaths, shift(deaths, 1)),
+        new_deaths_7d=subtract(deaths, shift(deaths, ROLLING_DAYS)),
+    )
+
+
+def write_derived_csv(
+    stats_list: Iterable[PressReleaseStats], path: Path, population: int
+):
+    """Write the derived metrics of the dates that have stats, by date."""
+    with stage('output.derived_metrics'):
+        derived_metrics = compute_derived_metrics(stats_list, population)
+    n = 0
+    with stage('output.write_csv'), path.open('w') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(DERIVED_FIELDS)
+        for date, cases, *values in derived_metrics.rows():
+            if cases is None:
+                continue
+            writer.writerow(
+                [date.isoformat(), cases, *(ensure_str(v) for v in values)]
+            )
+            n += 1
+    count('output.rows', n)
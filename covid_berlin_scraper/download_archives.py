@@ -2,7 +2,7 @@ import datetime
 import logging
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Iterator
+from typing import Iterable, Iterator, Optional
 from urllib.parse import urlsplit, urlunsplit
 
 import dateutil.tz
@@ -15,6 +15,8 @@ from covid_berlin_scraper.download_feed import (
 from covid_berlin_scraper.model import PressRelease
 from covid_berlin_scraper.utils.http_utils import http_get
 from covid_berlin_scraper.utils.parse_utils import parse_datetime
+from covid_berlin_scraper.utils.profile_utils import stage
+from covid_berlin_scraper.writer import DatabaseWriter
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +32,8 @@ def download_archives(
     **http_kwargs,
 ) -> Iterator[Archive]:
     for url in urls:
-        html = http_get(url, **http_kwargs)
+        with stage('fetch.archives'):
+            html = http_get(url, **http_kwargs)
         u = urlsplit(url)
         base_url = urlunsplit((u.scheme, u.netloc, '', '', ''))
         yield Archive(html=html, base_url=base_url)
@@ -61,7 +64,9 @@ def parse_archives(
         yield from parse_archive(archive, default_tz)
 
 
-def main(cache_path: Path, config: dict):
+def main(
+    cache_path: Path, config: dict, writer: Optional[DatabaseWriter] = None
+):
     archives = download_archives(
         urls=config['download_archives']['urls'],
         timeout=int(config['http']['timeout']),
@@ -79,5 +84,7 @@ def main(cache_path: Path, config: dict):
         title_regex=regex.compile(config['download_feed']['title_regex']),
     )
     save_press_releases(
-        filtered_press_releases, db_path=cache_path / 'db.sqlite3'
+        filtered_press_releases,
+        db_path=cache_path / 'db.sqlite3',
+        writer=writer,
     )
@@ -2,7 +2,7 @@ import datetime
 import gzip
 import logging
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional
 
 import dateutil.tz
 import regex
@@ -10,6 +10,8 @@ from bs4 import BeautifulSoup
 
 from covid_berlin_scraper.model import Dashboard, DashboardStore
 from covid_berlin_scraper.utils.http_utils import http_get_raw
+from covid_berlin_scraper.utils.profile_utils import count, stage
+from covid_berlin_scraper.writer import DatabaseWriter
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +24,13 @@ def download_dashboard(
     default_tz: datetime.tzinfo,
     **http_kwargs,
 ) -> Dashboard:
-    content = http_get_raw(url, **http_kwargs).read()
-    soup = BeautifulSoup(gzip.decompress(content), 'lxml')
+    with stage('fetch.dashboard'):
+        content = http_get_raw(url, **http_kwargs).read()
+    count('http.bytes', len(content))
+    with stage('gzip.decompress'):
+        html = gzip.decompress(content)
+    with stage('parse.dashboard.soup'):
+        soup = BeautifulSoup(html, 'lxml')
     date_line = soup.select(date_selector)[0].contents[0]
     m = date_regex.search(date_line)
     if not m:
@@ -37,13 +44,22 @@ def download_dashboard(
     )
 
 
-def save_dashboards(dashboards: Iterable[Dashboard], db_path: Path):
+def save_dashboards(
+    dashboards: Iterable[Dashboard],
+    db_path: Path,
+    writer: Optional[DatabaseWriter] = None,
+):
+    if writer:
+        writer.write_all(dashboards)
+        return
     dashboard_store = DashboardStore(db_path)
     for dashboard in dashboards:
         dashboard_store.append(dashboard)
 
 
-def main(cache_path: Path, config: dict):
+def main(
+    cache_path: Path, config: dict, writer: Optional[DatabaseWriter] = None
+):
     default_tz = dateutil.tz.gettz(config['download_feed']['default_tz'])
     if not default_tz:
         raise Exception('Invalid time zone')
@@ -63,4 +79,6 @@ def main(cache_path: Path, config: dict):
         )
         for url in urls
     )
-    save_dashboards(dashboards, db_path=cache_path / 'db.sqlite3')
+    save_dashboards(
+        dashboards, db_path=cache_path / 'db.sqlite3', writer=writer
+    )
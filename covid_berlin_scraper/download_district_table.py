@@ -1,10 +1,15 @@
 import logging
 from pathlib import Path
+from typing import Optional
 
 import dateparser
-import requests
 
 from covid_berlin_scraper.model import DistrictTable, DistrictTableStore
+from covid_berlin_scraper.utils.http_utils import (
+    detect_charset, get_http_session,
+)
+from covid_berlin_scraper.utils.profile_utils import count, stage
+from covid_berlin_scraper.writer import DatabaseWriter
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +18,13 @@ def download_district_table(
     url: str, timeout: int, user_agent: str
 ) -> DistrictTable:
     logger.info('Downloading %s', url)
-    r = requests.get(url, headers={'User-Agent': user_agent}, timeout=timeout)
-    r.raise_for_status()
+    with stage('fetch.district_table'), stage('http.get'):
+        r = get_http_session().get(
+            url, headers={'User-Agent': user_agent}, timeout=timeout
+        )
+        r.raise_for_status()
+    count('http.requests')
+    count('http.bytes', len(r.content))
     last_modified = r.headers['Last-Modified']
     timestamp = dateparser.parse(last_modified)
     if not timestamp:
@@ -23,24 +33,36 @@ def download_district_table(
         )
     if not timestamp.tzinfo:
         raise Exception('Missing time zone')
-    content = r.text
+    content = r.content
     if not content:
         raise Exception('Missing content')
     return DistrictTable(
         timestamp=timestamp,
         content=content,
+        charset=detect_charset(content, r.headers.get('Content-Type')),
     )
 
 
-def save_district_table(district_table: DistrictTable, db_path: Path):
+def save_district_table(
+    district_table: DistrictTable,
+    db_path: Path,
+    writer: Optional[DatabaseWriter] = None,
+):
+    if writer:
+        writer.write(district_table)
+        return
     district_table_store = DistrictTableStore(db_path)
     district_table_store.append(district_table)
 
 
-def main(cache_path: Path, config: dict):
+def main(
+    cache_path: Path, config: dict, writer: Optional[DatabaseWriter] = None
+):
     district_table = download_district_table(
         url=config['download_district_table']['url'],
         timeout=int(config['http']['timeout']),
         user_agent=config['http']['user_agent'],
     )
-    save_district_table(district_table, db_path=cache_path / 'db.sqlite3')
+    save_district_table(
+        district_table, db_path=cache_path / 'db.sqlite3', writer=writer
+    )
@@ -1,35 +1,142 @@
 import datetime
 import logging
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Iterator
+from typing import AbstractSet, Iterable, Iterator, Optional, Union
+from xml.etree import ElementTree
 
 import dateutil.tz
 import feedparser
 import regex
 
 from covid_berlin_scraper.model import PressRelease, PressReleasesStore
-from covid_berlin_scraper.utils.http_utils import http_get
-from covid_berlin_scraper.utils.parse_utils import parse_datetime
+from covid_berlin_scraper.utils.http_utils import http_get_bytes
+from covid_berlin_scraper.utils.parse_utils import parse_rfc822_datetime
+from covid_berlin_scraper.utils.profile_utils import count, stage
+from covid_berlin_scraper.writer import DatabaseWriter
 
 logger = logging.getLogger(__name__)
 
+FEED_CHUNK_SIZE = 16 * 1024
 
-def download_feed(
-    url: str,
+
+@dataclass
+class FeedEntry:
+    title: str
+    link: str
+    published: str
+
+
+def get_local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def read_feed_entry(el: ElementTree.Element) -> FeedEntry:
+    fields = {'title': '', 'link': '', 'published': ''}
+    for child in el:
+        name = get_local_name(child.tag)
+        if name == 'title':
+            fields['title'] = (child.text or '').strip()
+        elif name == 'link':
+            fields['link'] = (child.text or child.get('href') or '').strip()
+        elif name in ('pubDate', 'published') or (
+            name == 'updated' and not fields['published']
+        ):
+            fields['published'] = (child.text or '').strip()
+    return FeedEntry(**fields)
+
+
+def iter_feed_entries(feed: Union[str, bytes]) -> Iterator[FeedEntry]:
+    """Parse RSS items or Atom entries one by one.
+
+    The feed is fed to the parser in chunks, so when the caller stops
+    iterating, the rest of the feed is never parsed. A feed passed as bytes
+    is decoded by the parser according to its XML declaration.
+    """
+    parser: 'ElementTree.XMLPullParser[ElementTree.Element]' = (
+        ElementTree.XMLPullParser(events=('end',))
+    )
+    for start in range(0, len(feed), FEED_CHUNK_SIZE):
+        end = start + FEED_CHUNK_SIZE
+        parser.feed(feed[start:end])
+        for _, el in parser.read_events():  # type: ignore
+            if isinstance(el, ElementTree.Element) and get_local_name(
+                el.tag
+            ) in ('item', 'entry'):
+                yield read_feed_entry(el)
+                el.clear()
+    parser.close()
+
+
+def iter_feed_entries_lenient(feed: Union[str, bytes]) -> Iterator[FeedEntry]:
+    """Parse the feed with feedparser, which also accepts malformed XML.
+
+    Entries that were already yielded by the strict parser before it failed
+    are skipped.
+    """
+    n = 0
+    try:
+        for entry in iter_feed_entries(feed):
+            n += 1
+            yield entry
+    except ElementTree.ParseError as e:
+        logger.warning('Failed to parse feed as XML, falling back: %s', e)
+        for entry in feedparser.parse(feed).entries[n:]:
+            yield FeedEntry(
+                title=entry.title, link=entry.link, published=entry.published
+            )
+
+
+def parse_feed(
+    feed: Union[str, bytes],
     default_tz: datetime.tzinfo,
-    **http_kwargs,
+    title_regex: regex.Pattern,
+    known_urls: AbstractSet[str] = frozenset(),
+    known_timestamps: AbstractSet[datetime.datetime] = frozenset(),
 ) -> Iterator[PressRelease]:
-    feed_text = http_get(url, **http_kwargs)
-    feed = feedparser.parse(feed_text)
-    for entry in feed.entries:
+    """Yield the new press releases in a feed that match the title regex.
+
+    The feed lists the newest entries first, so parsing stops at the first
+    entry that is already stored, identified by its URL or its timestamp.
+    Stored timestamps are naive, so the parsed timestamps are compared
+    without their time zone.
+    """
+    for entry in iter_feed_entries_lenient(feed):
+        count('parse.items.feed')
+        if not title_regex.search(entry.title):
+            continue
+        if entry.link in known_urls:
+            logger.info('Found known press release %s', entry.title)
+            return
+        timestamp = parse_rfc822_datetime(entry.published, default_tz)
+        if timestamp.replace(tzinfo=None) in known_timestamps:
+            logger.info('Found known press release %s', entry.title)
+            return
         logger.info('Found press release %s', entry.title)
         yield PressRelease(
-            timestamp=parse_datetime(entry.published, default_tz),
-            title=entry.title,
-            url=entry.link,
+            timestamp=timestamp, title=entry.title, url=entry.link
         )
 
 
+def download_feed(
+    url: str,
+    default_tz: datetime.tzinfo,
+    title_regex: regex.Pattern,
+    known_urls: AbstractSet[str] = frozenset(),
+    known_timestamps: AbstractSet[datetime.datetime] = frozenset(),
+    **http_kwargs,
+) -> Iterator[PressRelease]:
+    with stage('fetch.feed'):
+        feed = http_get_bytes(url, **http_kwargs).content
+    return parse_feed(
+        feed,
+        default_tz,
+        title_regex,
+        known_urls=known_urls,
+        known_timestamps=known_timestamps,
+    )
+
+
 def filter_press_releases(
     press_releases: Iterable[PressRelease], title_regex: regex.Pattern
 ) -> Iterator[PressRelease]:
@@ -39,26 +146,34 @@ def filter_press_releases(
             yield press_release
 
 
-def save_press_releases(press_releases: Iterable[PressRelease], db_path: Path):
+def save_press_releases(
+    press_releases: Iterable[PressRelease],
+    db_path: Path,
+    writer: Optional[DatabaseWriter] = None,
+):
+    if writer:
+        writer.write_all(press_releases)
+        return
     press_releases_store = PressReleasesStore(db_path)
     for press_release in press_releases:
         press_releases_store.append(press_release)
 
 
-def main(cache_path: Path, config: dict):
+def main(
+    cache_path: Path, config: dict, writer: Optional[DatabaseWriter] = None
+):
     default_tz = dateutil.tz.gettz(config['download_feed']['default_tz'])
     if not default_tz:
         raise Exception('Invalid time zone')
+    db_path = cache_path / 'db.sqlite3'
+    known_urls, known_timestamps = PressReleasesStore(db_path).list_keys()
     press_releases = download_feed(
         url=config['download_feed']['url'],
         default_tz=default_tz,
+        title_regex=regex.compile(config['download_feed']['title_regex']),
+        known_urls=known_urls,
+        known_timestamps=known_timestamps,
         timeout=int(config['http']['timeout']),
         user_agent=config['http']['user_agent'],
     )
-    filtered_press_releases = filter_press_releases(
-        press_releases,
-        title_regex=regex.compile(config['download_feed']['title_regex']),
-    )
-    save_press_releases(
-        filtered_press_releases, db_path=cache_path / 'db.sqlite3'
-    )
+    save_press_releases(press_releases, db_path=db_path, writer=writer)
@@ -0,0 +1,95 @@
+import csv
+import datetime
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from covid_berlin_scraper.parse_press_releases import (
+    PARTIAL_FIELDS, SOURCES, PressReleaseStats, write_outputs,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PartialStats:
+    source: str
+    first_timestamp: datetime.datetime
+    stats: PressReleaseStats
+
+    @property
+    def first_key(self) -> Tuple[int, datetime.datetime]:
+        return SOURCES[self.source].priority, self.first_timestamp
+
+    @property
+    def last_key(self) -> Tuple[int, datetime.datetime]:
+        return SOURCES[self.source].priority, self.stats.timestamp
+
+
+def parse_optional_int(s: str) -> Optional[int]:
+    return int(s) if s else None
+
+
+def read_partial(path: Path) -> Iterator[PartialStats]:
+    with path.open() as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames != PARTIAL_FIELDS:
+            raise Exception(f'{path} is not a partial stats file')
+        for row in reader:
+            if row['source'] not in SOURCES:
+                raise Exception(f'Unknown source "{row["source"]}" in {path}')
+            yield PartialStats(
+                source=row['source'],
+                first_timestamp=datetime.datetime.fromisoformat(
+                    row['first_timestamp']
+                ),
+                stats=PressReleaseStats(
+                    timestamp=datetime.datetime.fromisoformat(
+                        row['timestamp']
+                    ),
+                    cases=int(row['cases']),
+                    recovered=parse_optional_int(row['recovered']),
+                    deaths=parse_optional_int(row['deaths']),
+                    hospitalized=parse_optional_int(row['hospitalized']),
+                    icu=parse_optional_int(row['icu']),
+                ),
+            )
+
+
+def merge_partials(
+    partial_stats_list: Iterable[PartialStats],
+) -> List[PressReleaseStats]:
+    """Merge partial stats into a list that write_csv writes as if unsplit.
+
+    For each date, the stats from the latest source and, within it, with
+    the latest timestamp win, and the dates are ordered by the source and
+    timestamp in which they first appear.
+    """
+    first: Dict[datetime.date, Tuple[int, datetime.datetime]] = {}
+    last: Dict[datetime.date, PartialStats] = {}
+    for partial_stats in partial_stats_list:
+        date = partial_stats.stats.date
+        if date not in first or partial_stats.first_key < first[date]:
+            first[date] = partial_stats.first_key
+        if date not in last or partial_stats.last_key > last[date].last_key:
+            last[date] = partial_stats
+    return [last[date].stats for date in sorted(first, key=first.__getitem__)]
+
+
+def main(
+    partial_paths: List[Path],
+    output_path: Path,
+    output_hosp_path: Optional[Path] = None,
+):
+    partial_stats_list: List[PartialStats] = []
+    for path in partial_paths:
+        logger.info('Reading %s', path)
+        partial_stats_list.extend(read_partial(path))
+    stats_list = merge_partials(partial_stats_list)
+    logger.info(
+        'Merged %d partial files into %d dates',
+        len(partial_paths),
+        len(stats_list),
+    )
+    write_outputs(stats_list, output_path, output_hosp_path)
@@ -0,0 +1,458 @@
+import gzip
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import Engine
+
+from covid_berlin_scraper.articles import get_article_kwargs, migrate_pages
+from covid_berlin_scraper.model import encode_fixing_mojibake, get_engine
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationError(Exception):
+    pass
+
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[sqlite3.Connection], None]
+    downgrade: Optional[Callable[[sqlite3.Connection], None]] = None
+    upgrade_chunk: Optional[Callable[[sqlite3.Connection, int], int]] = None
+    vacuum: bool = False
+
+
+def noop(conn: sqlite3.Connection):
+    pass
+
+
+def table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return bool(
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (name,),
+        ).fetchone()
+    )
+
+
+def create_initial_tables(conn: sqlite3.Connection):
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS press_releases ('
+        'id INTEGER NOT NULL PRIMARY KEY, '
+        'timestamp DATETIME NOT NULL UNIQUE, '
+        'title VARCHAR NOT NULL, '
+        'url VARCHAR NOT NULL UNIQUE)'
+    )
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS district_table ('
+        'id INTEGER NOT NULL PRIMARY KEY, '
+        'timestamp DATETIME NOT NULL UNIQUE, '
+        'content VARCHAR NOT NULL)'
+    )
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS compressed_dashboard ('
+        'id INTEGER NOT NULL PRIMARY KEY, '
+        'timestamp DATETIME NOT NULL UNIQUE, '
+        'content BLOB NOT NULL)'
+    )
+
+
+def drop_initial_tables(conn: sqlite3.Connection):
+    for name in ('press_releases', 'district_table', 'compressed_dashboard'):
+        conn.execute(f'DROP TABLE IF EXISTS {name}')
+
+
+def compress_dashboards_chunk(
+    conn: sqlite3.Connection, chunk_size: int
+) -> int:
+    if not table_exists(conn, 'dashboard'):
+        return 0
+    rows = conn.execute(
+        'SELECT id, timestamp, content FROM dashboard ORDER BY id LIMIT ?',
+        (chunk_size,),
+    ).fetchall()
+    for id, timestamp, content in rows:
+        conn.execute(
+            'INSERT INTO compressed_dashboard (timestamp, content) '
+            'VALUES (?, ?) '
+            'ON CONFLICT (timestamp) DO UPDATE SET content = excluded.content',
+            (timestamp, gzip.compress(encode_fixing_mojibake(content))),
+        )
+        conn.execute('DELETE FROM dashboard WHERE id = ?', (id,))
+    return len(rows)
+
+
+def drop_uncompressed_dashboards(conn: sqlite3.Connection):
+    if table_exists(conn, 'dashboard'):
+        (count,) = conn.execute('SELECT COUNT(*) FROM dashboard').fetchone()
+        if count:
+            raise MigrationError(
+                f'Table dashboard still contains {count} rows'
+            )
+    conn.execute('DROP TABLE IF EXISTS dashboard')
+
+
+def create_uncompressed_dashboards(conn: sqlite3.Connection):
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS dashboard ('
+        'id INTEGER NOT NULL PRIMARY KEY, '
+        'timestamp DATETIME NOT NULL UNIQUE, '
+        'content VARCHAR NOT NULL)'
+    )
+
+
+def create_poll_events(conn: sqlite3.Connection):
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS poll_events ('
+        'id INTEGER NOT NULL PRIMARY KEY, '
+        'source VARCHAR NOT NULL, '
+        'polled_at DATETIME NOT NULL, '
+        'changed BOOLEAN NOT NULL, '
+        'published_at DATETIME, '
+        'error VARCHAR)'
+    )
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS ix_poll_events_source_polled_at '
+        'ON poll_events (source, polled_at)'
+    )
+
+
+def drop_poll_events(conn: sqlite3.Connection):
+    conn.execute('DROP TABLE IF EXISTS poll_events')
+
+
+def store_district_tables_as_bytes(conn: sqlite3.Connection):
+    conn.execute(
+        'CREATE TABLE district_table_bytes ('
+        'id INTEGER NOT NULL PRIMARY KEY, '
+        'timestamp DATETIME NOT NULL UNIQUE, '
+        'content BLOB NOT NULL, '
+        'charset VARCHAR NOT NULL)'
+    )
+    # Text is stored as UTF-8, so casting it yields its UTF-8 bytes.
+    conn.execute(
+        'INSERT INTO district_table_bytes (id, timestamp, content, charset) '
+        "SELECT id, timestamp, CAST(content AS BLOB), 'utf-8' "
+        'FROM district_table'
+    )
+    conn.execute('DROP TABLE district_table')
+    conn.execute('ALTER TABLE district_table_bytes RENAME TO district_table')
+
+
+def store_district_tables_as_text(conn: sqlite3.Connection):
+    conn.execute(
+        'CREATE TABLE district_table_text ('
+        'id INTEGER NOT NULL PRIMARY KEY, '
+        'timestamp DATETIME NOT NULL UNIQUE, '
+        'content VARCHAR NOT NULL)'
+    )
+    for id, timestamp, content, charset in conn.execute(
+        'SELECT id, timestamp, content, charset FROM district_table'
+    ).fetchall():
+        conn.execute(
+            'INSERT INTO district_table_text (id, timestamp, content) '
+            'VALUES (?, ?, ?)',
+            (id, timestamp, content.decode(charset, errors='replace')),
+        )
+    conn.execute('DROP TABLE district_table')
+    conn.execute('ALTER TABLE district_table_text RENAME TO district_table')
+
+
+def create_parse_failures(conn: sqlite3.Connection):
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS parse_failures ('
+        'id INTEGER NOT NULL PRIMARY KEY, '
+        'source VARCHAR NOT NULL, '
+        'source_id INTEGER NOT NULL, '
+        'content_hash VARCHAR NOT NULL, '
+        'config_hash VARCHAR NOT NULL, '
+        'error VARCHAR NOT NULL, '
+        'failed_at DATETIME NOT NULL, '
+        'UNIQUE (source, source_id))'
+    )
+
+
+def drop_parse_failures(conn: sqlite3.Connection):
+    conn.execute('DROP TABLE IF EXISTS parse_failures')
+
+
+# Source tables whose inserts and updates are logged in row_changes.
+CHANGE_LOGGED_TABLES = [
+    'press_releases',
+    'district_table',
+    'compressed_dashboard',
+]
+
+
+def create_daily_stats(conn: sqlite3.Connection):
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS daily_stats ('
+        'date DATE NOT NULL PRIMARY KEY, '
+        'source VARCHAR NOT NULL, '
+        'timestamp DATETIME NOT NULL, '
+        'cases INTEGER NOT NULL, '
+        'recovered INTEGER, '
+        'deaths INTEGER, '
+        'hospitalized INTEGER, '
+        'icu INTEGER, '
+        'first_source VARCHAR NOT NULL, '
+        'first_timestamp DATETIME NOT NULL)'
+    )
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS daily_stats_sources ('
+        'source VARCHAR NOT NULL PRIMARY KEY, '
+        'high_water_mark INTEGER NOT NULL, '
+        'config_hash VARCHAR)'
+    )
+    # AUTOINCREMENT keeps the ids increasing after old changes are pruned.
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS row_changes ('
+        'id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT, '
+        'table_name VARCHAR NOT NULL, '
+        'row_id INTEGER NOT NULL)'
+    )
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS ix_row_changes_table_name_id '
+        'ON row_changes (table_name, id)'
+    )
+    for table_name in CHANGE_LOGGED_TABLES:
+        for operation in ('INSERT', 'UPDATE'):
+            conn.execute(
+                f'CREATE TRIGGER IF NOT EXISTS '
+                f'log_{table_name}_{operation.lower()} '
+                f'AFTER {operation} ON {table_name} BEGIN '
+                f'INSERT INTO row_changes (table_name, row_id) '
+                f"VALUES ('{table_name}', NEW.id); END"
+            )
+
+
+def drop_daily_stats(conn: sqlite3.Connection):
+    for table_name in CHANGE_LOGGED_TABLES:
+        for operation in ('insert', 'update'):
+            conn.execute(
+                f'DROP TRIGGER IF EXISTS log_{table_name}_{operation}'
+            )
+    conn.execute('DROP TABLE IF EXISTS row_changes')
+    conn.execute('DROP TABLE IF EXISTS daily_stats_sources')
+    conn.execute('DROP TABLE IF EXISTS daily_stats')
+
+
+def add_daily_stats_revision(conn: sqlite3.Connection):
+    conn.execute(
+        'ALTER TABLE daily_stats '
+        'ADD COLUMN revision INTEGER NOT NULL DEFAULT 0'
+    )
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS ix_daily_stats_revision '
+        'ON daily_stats (revision)'
+    )
+
+
+def drop_daily_stats_revision(conn: sqlite3.Connection):
+    conn.execute('DROP INDEX IF EXISTS ix_daily_stats_revision')
+    conn.execute('ALTER TABLE daily_stats RENAME TO daily_stats_revision')
+    create_daily_stats(conn)
+    conn.execute(
+        'INSERT INTO daily_stats '
+        'SELECT date, source, timestamp, cases, recovered, deaths, '
+        'hospitalized, icu, first_source, first_timestamp '
+        'FROM daily_stats_revision'
+    )
+    conn.execute('DROP TABLE daily_stats_revision')
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description='Create initial tables',
+        upgrade=create_initial_tables,
+        downgrade=drop_initial_tables,
+    ),
+    Migration(
+        version=2,
+        description='Compress uncompressed dashboards',
+        upgrade=noop,
+        downgrade=noop,
+        upgrade_chunk=compress_dashboards_chunk,
+    ),
+    Migration(
+        version=3,
+        description='Drop the uncompressed dashboard table',
+        upgrade=drop_uncompressed_dashboards,
+        downgrade=create_uncompressed_dashboards,
+        vacuum=True,
+    ),
+    Migration(
+        version=4,
+        description='Create the poll event table',
+        upgrade=create_poll_events,
+        downgrade=drop_poll_events,
+    ),
+    Migration(
+        version=5,
+        description='Store district tables as bytes with their charset',
+        upgrade=store_district_tables_as_bytes,
+        downgrade=store_district_tables_as_text,
+    ),
+    Migration(
+        version=6,
+        description='Create the parse failure table',
+        upgrade=create_parse_failures,
+        downgrade=drop_parse_failures,
+    ),
+    Migration(
+        version=7,
+        description='Create the daily stats table and log source row changes',
+        upgrade=create_daily_stats,
+        downgrade=drop_daily_stats,
+    ),
+    Migration(
+        version=8,
+        description='Add the revision of the daily stats',
+        upgrade=add_daily_stats_revision,
+        downgrade=drop_daily_stats_revision,
+    ),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+@contextmanager
+def immediate_transaction(conn: sqlite3.Connection) -> Iterator[None]:
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def set_version(conn: sqlite3.Connection, version: int):
+    conn.execute(f'PRAGMA user_version = {int(version)}')
+
+
+def apply_upgrade(
+    conn: sqlite3.Connection, migration: Migration, chunk_size: int
+) -> bool:
+    if migration.upgrade_chunk:
+        while True:
+            with immediate_transaction(conn):
+                if get_version(conn) >= migration.version:
+                    return False
+                n = migration.upgrade_chunk(conn, chunk_size)
+            if not n:
+                break
+            logger.info('Migration %d: migrated %d rows', migration.version, n)
+    with immediate_transaction(conn):
+        if get_version(conn) >= migration.version:
+            return False
+        migration.upgrade(conn)
+        set_version(conn, migration.version)
+    return True
+
+
+def apply_downgrade(conn: sqlite3.Connection, migration: Migration) -> bool:
+    if not migration.downgrade:
+        raise MigrationError(f'Migration {migration.version} cannot be undone')
+    with immediate_transaction(conn):
+        if get_version(conn) < migration.version:
+            return False
+        migration.downgrade(conn)
+        set_version(conn, migration.version - 1)
+    return True
+
+
+@contextmanager
+def raw_sqlite_connection(engine: Engine) -> Iterator[sqlite3.Connection]:
+    raw_connection = engine.raw_connection()
+    conn: sqlite3.Connection = raw_connection.driver_connection  # type: ignore
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        yield conn
+    finally:
+        conn.isolation_level = isolation_level
+        raw_connection.close()
+
+
+def vacuum_database(conn: sqlite3.Connection):
+    start = time.perf_counter()
+    conn.execute('VACUUM')
+    logger.info('Vacuumed database in %.3fs', time.perf_counter() - start)
+
+
+def migrate(
+    engine: Engine,
+    target: Optional[int] = None,
+    chunk_size: int = 100,
+    vacuum: bool = False,
+):
+    """Upgrade or downgrade the schema to `target`, the latest by default.
+
+    Without `vacuum`, the space freed by migrations is only reclaimed by a
+    later `migrate --vacuum`, because VACUUM locks the whole database.
+    """
+    if target is None:
+        target = LATEST_VERSION
+    if not 0 <= target <= LATEST_VERSION:
+        raise MigrationError(f'Unknown schema version {target}')
+    with raw_sqlite_connection(engine) as conn:
+        version = get_version(conn)
+        needs_vacuum = False
+        for migration in MIGRATIONS:
+            if not version < migration.version <= target:
+                continue
+            start = time.perf_counter()
+            if apply_upgrade(conn, migration, chunk_size):
+                logger.info(
+                    'Applied migration %d (%s) in %.3fs',
+                    migration.version,
+                    migration.description,
+                    time.perf_counter() - start,
+                )
+                needs_vacuum = needs_vacuum or migration.vacuum
+        for migration in reversed(MIGRATIONS):
+            if not target < migration.version <= version:
+                continue
+            start = time.perf_counter()
+            if apply_downgrade(conn, migration):
+                logger.info(
+                    'Reverted migration %d (%s) in %.3fs',
+                    migration.version,
+                    migration.description,
+                    time.perf_counter() - start,
+                )
+        if vacuum:
+            vacuum_database(conn)
+        elif needs_vacuum:
+            logger.info(
+                'Run migrate --vacuum to reclaim the space freed by the '
+                'migrations'
+            )
+
+
+def main(
+    cache_path: Path,
+    config: dict,
+    target: Optional[int] = None,
+    chunk_size: int = 100,
+    vacuum: bool = False,
+    trim_pages: bool = True,
+):
+    engine = get_engine(cache_path / 'db.sqlite3', migrate_schema=False)
+    migrate(engine, target=target, chunk_size=chunk_size, vacuum=vacuum)
+    # Trimming the cached pages can't be undone, so it's only part of an
+    # upgrade to the latest version.
+    if trim_pages and target in (None, LATEST_VERSION):
+        migrate_pages(cache_path, **get_article_kwargs(config))
@@ -1,18 +1,28 @@
 import gzip
+import io
 import logging
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
 from pathlib import Path
-from typing import Iterator
+from typing import (
+    Any, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional,
+    Sequence, Set, Tuple, Union,
+)
 
 import regex
 from sqlalchemy import (
-    DateTime, Integer, LargeBinary, String, create_engine, select,
+    Boolean, Date, DateTime, Engine, Integer, LargeBinary, Row, Select, String,
+    case, create_engine, delete, event, func, select,
 )
 from sqlalchemy.orm import (
     DeclarativeBase, Mapped, Session, mapped_column, scoped_session,
-    sessionmaker,
+    sessionmaker, undefer,
 )
 
+from covid_berlin_scraper.utils.profile_utils import count, stage
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,46 +44,278 @@ class PressRelease(Base):  # type: ignore
         return bool(title_regex.search(self.title))
 
     def __repr__(self) -> str:
-        return (
-            f'PressRelease(timestamp={self.timestamp.isoformat()}, '
-            f'title={self.title}, '
-            f'url={self.url})'
-        )
+        return format_press_release(self)
+
+
+def format_press_release(
+    press_release: Union[PressRelease, 'PressReleaseRow'],
+) -> str:
+    return (
+        f'PressRelease(timestamp={press_release.timestamp.isoformat()}, '
+        f'title={press_release.title}, '
+        f'url={press_release.url})'
+    )
+
+
+SQLITE_TIMEOUT = 30
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+_engines: Dict[Path, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+    cursor.close()
+
+
+def get_engine(path: Path, migrate_schema: bool = True) -> Engine:
+    key = path.resolve()
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            engine = create_engine(
+                f'sqlite:///{path}',
+                future=True,
+                connect_args={'timeout': SQLITE_TIMEOUT},
+            )
+            event.listen(engine, 'connect', set_sqlite_pragmas)
+            if migrate_schema:
+                from covid_berlin_scraper.migrations import migrate
+
+                migrate(engine)
+            _engines[key] = engine
+    return engine
+
+
+def dispose_engines():
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
 
 
 def create_session(path: Path) -> scoped_session[Session]:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    engine = create_engine(f'sqlite:///{path}', future=True)
-    Base.metadata.create_all(engine)
-    session_factory = sessionmaker(bind=engine)
+    session_factory = sessionmaker(bind=get_engine(path))
     return scoped_session(session_factory)
 
 
+def filter_id_range(
+    stmt: Select, id_column, after_id: int = 0, max_id: Optional[int] = None
+) -> Select:
+    if after_id:
+        stmt = stmt.where(id_column > after_id)
+    if max_id is not None:
+        stmt = stmt.where(id_column <= max_id)
+    return stmt
+
+
+def upsert_by_timestamp(
+    session: scoped_session[Session],
+    entity_class: Any,
+    entities: Sequence[Any],
+    fields: Sequence[str],
+    label: str,
+    table_counter: str,
+    select_chunk_size: int = 500,
+):
+    """Add entities or update the stored entities with the same timestamps.
+
+    The stored entities are selected in chunks before anything is added, so
+    that adding a batch does not flush and select once per entity. Of
+    several entities with the same timestamp, the first is added and the
+    others update it, like when they are added one after another. Stored
+    entities whose fields are all equal are left alone, so that re-fetching
+    unchanged data does not log a row change.
+    """
+
+    def get_key(timestamp: datetime) -> datetime:
+        # SQLite stores the timestamps without time zone.
+        return timestamp.replace(tzinfo=None)
+
+    timestamps = list({entity.timestamp for entity in entities})
+    entities_by_key = {}
+    with stage('db.select'):
+        while timestamps:
+            chunk = timestamps[:select_chunk_size]
+            del timestamps[:select_chunk_size]
+            for stored_entity in session.scalars(
+                select(entity_class).where(entity_class.timestamp.in_(chunk))
+            ):
+                entities_by_key[get_key(stored_entity.timestamp)] = (
+                    stored_entity
+                )
+    for entity in entities:
+        key = get_key(entity.timestamp)
+        existing_entity = entities_by_key.get(key)
+        if existing_entity is not None:
+            changed_fields = [
+                field
+                for field in fields
+                if getattr(existing_entity, field) != getattr(entity, field)
+            ]
+            if not changed_fields:
+                logger.info('Keeping unchanged %s %s', label, entity)
+                count(f'db.unchanged.{table_counter}')
+                continue
+            logger.info('Updating existing %s %s', label, entity)
+            count(f'db.updated.{table_counter}')
+            for field in changed_fields:
+                setattr(existing_entity, field, getattr(entity, field))
+        else:
+            logger.info('Adding new %s %s', label, entity)
+            count(f'db.inserted.{table_counter}')
+            session.add(entity)
+            entities_by_key[key] = entity
+
+
+@dataclass(frozen=True)
+class Partition:
+    """A subset of the rows of each table, for parsing on several machines.
+
+    Either a time range of row timestamps, start inclusive and end
+    exclusive, or a shard of the rows whose id modulo shard_count equals
+    shard_index.
+    """
+
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    shard_index: int = 0
+    shard_count: int = 1
+
+    @classmethod
+    def from_spec(cls, spec: str) -> 'Partition':
+        """Parse `START..END` (dates, either may be empty) or `INDEX/COUNT`."""
+        m = regex.fullmatch(r'(?P<index>\d+)/(?P<count>\d+)', spec)
+        if m:
+            shard_index, shard_count = int(m['index']), int(m['count'])
+            if shard_index >= shard_count:
+                raise ValueError(f'Invalid shard "{spec}"')
+            return cls(shard_index=shard_index, shard_count=shard_count)
+        start_str, sep, end_str = spec.partition('..')
+        if not sep:
+            raise ValueError(f'Invalid partition "{spec}"')
+        return cls(
+            start=datetime.fromisoformat(start_str) if start_str else None,
+            end=datetime.fromisoformat(end_str) if end_str else None,
+        )
+
+    def filter(self, stmt: Select, model) -> Select:
+        if self.start:
+            stmt = stmt.where(model.timestamp >= self.start)
+        if self.end:
+            stmt = stmt.where(model.timestamp < self.end)
+        if self.shard_count > 1:
+            stmt = stmt.where(model.id % self.shard_count == self.shard_index)
+        return stmt
+
+
+def stream_rows(
+    engine: Engine, stmt: Select, buffer_size: int = 1000
+) -> Iterator[Row]:
+    """Execute a Core select and yield its rows, fetched in batches.
+
+    The rows are not loaded into ORM entities, which saves the identity map
+    and attribute instrumentation on large read-only listings.
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=buffer_size).execute(stmt)
+        for rows in result.partitions():
+            yield from rows
+
+
+class PressReleaseRow(NamedTuple):
+    """A press release read by `PressReleasesStore.list`."""
+
+    id: int
+    timestamp: datetime
+    title: str
+    url: str
+
+    def __repr__(self) -> str:
+        return format_press_release(self)
+
+
 class PressReleasesStore:
+    table_name = PressRelease.__tablename__
     _session: scoped_session[Session]
 
     def __init__(self, path: Path):
+        self._engine = get_engine(path)
         self._session = create_session(path)
 
-    def list(self) -> Iterator[PressRelease]:
-        return self._session.scalars(
-            select(PressRelease).order_by(PressRelease.timestamp)
+    def list(
+        self,
+        after_id: int = 0,
+        max_id: Optional[int] = None,
+        partition: Optional[Partition] = None,
+        buffer_size: int = 1000,
+    ) -> Iterator[PressReleaseRow]:
+        stmt = filter_id_range(
+            select(
+                PressRelease.id,
+                PressRelease.timestamp,
+                PressRelease.title,
+                PressRelease.url,
+            ).order_by(PressRelease.timestamp),
+            PressRelease.id,
+            after_id,
+            max_id,
         )
+        if partition:
+            stmt = partition.filter(stmt, PressRelease)
+        for row in stream_rows(self._engine, stmt, buffer_size):
+            yield PressReleaseRow._make(row)
+
+    def max_id(self) -> int:
+        return self._session.scalar(select(func.max(PressRelease.id))) or 0
+
+    def list_keys(self) -> Tuple[Set[str], Set[datetime]]:
+        """Return the URLs and naive timestamps of all stored releases."""
+        urls = set()
+        timestamps = set()
+        with stage('db.select'):
+            for url, timestamp in self._session.execute(
+                select(PressRelease.url, PressRelease.timestamp)
+            ):
+                urls.add(url)
+                timestamps.add(timestamp)
+        return urls, timestamps
 
     def append(self, press_release: PressRelease):
-        existing_press_release = self._session.scalars(
-            select(PressRelease).where(
-                PressRelease.timestamp == press_release.timestamp
-            )
-        ).first()
-        if existing_press_release:
-            logger.info('Updating existing press release %s', press_release)
-            existing_press_release.title = press_release.title
-            existing_press_release.url = press_release.url
-        else:
-            logger.info('Adding new press release %s', press_release)
-            self._session.add(press_release)
-        self._session.commit()
+        self.add(press_release)
+        self.commit()
+
+    def add(self, press_release: PressRelease):
+        """Insert or update a press release without committing."""
+        self.add_all([press_release])
+
+    def add_all(self, press_releases: Sequence[PressRelease]):
+        """Insert or update press releases without committing."""
+        upsert_by_timestamp(
+            self._session,
+            PressRelease,
+            press_releases,
+            ('title', 'url'),
+            'press release',
+            'press_releases',
+        )
+
+    def commit(self):
+        with stage('db.commit'):
+            self._session.commit()
+
+    def rollback(self):
+        self._session.rollback()
 
 
 class DistrictTable(Base):  # type: ignore
@@ -83,141 +325,587 @@ class DistrictTable(Base):  # type: ignore
     timestamp: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, unique=True
     )
-    content: Mapped[str] = mapped_column(String, nullable=False)
+    # CSV as downloaded, decoded only when read.
+    content: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    charset: Mapped[str] = mapped_column(
+        String, nullable=False, default='utf-8'
+    )
+
+    @property
+    def text(self) -> str:
+        return decode_district_table(self.content, self.charset)
 
     def __repr__(self) -> str:
-        return (
-            f'DistrictTable(timestamp={self.timestamp.isoformat()}, '
-            f'content={self.content})'
-        )
+        return format_district_table(self)
+
+
+def decode_district_table(content: bytes, charset: Optional[str]) -> str:
+    return content.decode(charset or 'utf-8', errors='replace')
+
+
+def format_district_table(
+    district_table: Union[DistrictTable, 'DistrictTableRow'],
+) -> str:
+    return (
+        f'DistrictTable(timestamp={district_table.timestamp.isoformat()}, '
+        f'charset={district_table.charset}, '
+        f'content_length={len(district_table.content)})'
+    )
+
+
+class DistrictTableRow(NamedTuple):
+    """A district table read by `DistrictTableStore.list`."""
+
+    id: int
+    timestamp: datetime
+    content: bytes
+    charset: str
+
+    @property
+    def text(self) -> str:
+        return decode_district_table(self.content, self.charset)
+
+    def __repr__(self) -> str:
+        return format_district_table(self)
 
 
 class DistrictTableStore:
+    table_name = DistrictTable.__tablename__
     _session: scoped_session[Session]
 
     def __init__(self, path: Path):
+        self._engine = get_engine(path)
         self._session = create_session(path)
 
-    def list(self) -> Iterator[DistrictTable]:
-        return self._session.scalars(
-            select(DistrictTable).order_by(DistrictTable.timestamp)
+    def list(
+        self,
+        after_id: int = 0,
+        max_id: Optional[int] = None,
+        partition: Optional[Partition] = None,
+        buffer_size: int = 100,
+    ) -> Iterator[DistrictTableRow]:
+        stmt = filter_id_range(
+            select(
+                DistrictTable.id,
+                DistrictTable.timestamp,
+                DistrictTable.content,
+                DistrictTable.charset,
+            ).order_by(DistrictTable.timestamp),
+            DistrictTable.id,
+            after_id,
+            max_id,
         )
+        if partition:
+            stmt = partition.filter(stmt, DistrictTable)
+        for row in stream_rows(self._engine, stmt, buffer_size):
+            yield DistrictTableRow._make(row)
+
+    def max_id(self) -> int:
+        return self._session.scalar(select(func.max(DistrictTable.id))) or 0
+
+    def list_timestamps(self) -> List[datetime]:
+        with stage('db.select'):
+            return list(
+                self._session.scalars(
+                    select(DistrictTable.timestamp).order_by(
+                        DistrictTable.timestamp
+                    )
+                )
+            )
 
     def append(self, district_table: DistrictTable):
-        existing_district_table = self._session.scalars(
-            select(DistrictTable).where(
-                DistrictTable.timestamp == district_table.timestamp
-            )
-        ).first()
-        if existing_district_table:
-            logger.info('Updating existing district table %s', district_table)
-            district_table.content = district_table.content
-        else:
-            logger.info('Adding new district table %s', district_table)
-            self._session.add(district_table)
-        self._session.commit()
+        self.add(district_table)
+        self.commit()
+
+    def add(self, district_table: DistrictTable):
+        """Insert or update a district table without committing."""
+        self.add_all([district_table])
+
+    def add_all(self, district_tables: Sequence[DistrictTable]):
+        """Insert or update district tables without committing."""
+        upsert_by_timestamp(
+            self._session,
+            DistrictTable,
+            district_tables,
+            ('content', 'charset'),
+            'district table',
+            'district_table',
+        )
+
+    def commit(self):
+        with stage('db.commit'):
+            self._session.commit()
+
+    def rollback(self):
+        self._session.rollback()
+
 
+def encode_fixing_mojibake(content: str) -> bytes:
+    """Encode content as UTF-8, fixing UTF-8 mis-decoded as ISO-8859-1.
 
-class UncompressedDashboard(Base):  # type: ignore
-    __tablename__ = 'dashboard'
+    Such content encodes back to the original UTF-8 bytes, which are only
+    validated and returned instead of decoding and encoding them once more.
+    """
+    try:
+        raw_content = content.encode('iso-8859-1')
+        raw_content.decode()
+    except (UnicodeDecodeError, UnicodeEncodeError):
+        return content.encode()
+    return raw_content
+
+
+class Dashboard(Base):  # type: ignore
+    __tablename__ = 'compressed_dashboard'
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     timestamp: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, unique=True
     )
-    content: Mapped[str] = mapped_column(String, nullable=False)
+    content: Mapped[bytes] = mapped_column(
+        LargeBinary, nullable=False, deferred=True
+    )
 
     @property
-    def content_utf8(self) -> str:
-        try:
-            return self.content.encode('iso-8859-1').decode()
-        except (UnicodeDecodeError, UnicodeEncodeError):
-            return self.content
+    def decompressed_content(self) -> bytes:
+        with stage('gzip.decompress'):
+            return gzip.decompress(self.content)
 
     def __repr__(self) -> str:
+        # Don't trigger loading of the deferred content column.
+        content_length = (
+            len(self.content) if 'content' in self.__dict__ else None
+        )
         return (
-            f'UncompressedDashboard(timestamp={self.timestamp.isoformat()}, '
-            f'content_length={len(self.content)})'
+            f'Dashboard(timestamp={self.timestamp.isoformat()}, '
+            f'content_length={content_length})'
         )
 
 
-class UncompressedDashboardStore:
+class DashboardStore:
+    table_name = Dashboard.__tablename__
     _session: scoped_session[Session]
 
     def __init__(self, path: Path):
         self._session = create_session(path)
 
-    def list_ids(self, buffer_size: int = 50) -> Iterator[int]:
-        return self._session.scalars(
-            select(UncompressedDashboard.id).order_by(
-                UncompressedDashboard.timestamp
-            )
+    def list(
+        self,
+        buffer_size: int = 50,
+        after_id: int = 0,
+        max_id: Optional[int] = None,
+        with_content: bool = True,
+        partition: Optional[Partition] = None,
+    ) -> Iterator[Dashboard]:
+        """List dashboards ordered by timestamp.
+
+        The content column is deferred, so when `with_content` is False, only
+        the metadata is selected. Such dashboards must be read with
+        `open_content` or `open_decompressed_content`; accessing their
+        content attribute would issue one extra query per dashboard.
+        """
+        stmt = filter_id_range(
+            select(Dashboard).order_by(Dashboard.timestamp),
+            Dashboard.id,
+            after_id,
+            max_id,
         )
+        if partition:
+            stmt = partition.filter(stmt, Dashboard)
+        if with_content:
+            stmt = stmt.options(undefer(Dashboard.content))
+        result = self._session.execute(
+            stmt.execution_options(
+                stream_results=True, max_row_buffer=buffer_size
+            ),
+        )
+        return result.yield_per(buffer_size).scalars()
 
-    def find_one(self, id: int) -> UncompressedDashboard | None:
-        return self._session.scalar(
-            select(UncompressedDashboard).where(UncompressedDashboard.id == id)
+    @contextmanager
+    def open_content(self, dashboard: Dashboard) -> Iterator[BinaryIO]:
+        """Open the compressed content of a dashboard for reading.
+
+        The BLOB is read incrementally, so only the requested chunks are held
+        in memory. SQLite bindings without incremental BLOB I/O (Python
+        < 3.11) fall back to reading the whole BLOB.
+        """
+        conn = self._session.connection().connection.driver_connection
+        if hasattr(conn, 'blobopen'):
+            with conn.blobopen(  # type: ignore
+                Dashboard.__tablename__,
+                'content',
+                dashboard.id,
+                readonly=True,
+            ) as blob:
+                yield blob
+        else:
+            content = self._session.execute(
+                select(Dashboard.content).where(Dashboard.id == dashboard.id)
+            ).scalar_one()
+            yield io.BytesIO(content)
+
+    @contextmanager
+    def open_decompressed_content(
+        self, dashboard: Dashboard
+    ) -> Iterator[BinaryIO]:
+        with self.open_content(dashboard) as f:
+            with gzip.GzipFile(fileobj=f, mode='rb') as gzip_file:
+                yield gzip_file  # type: ignore
+
+    def max_id(self) -> int:
+        return self._session.scalar(select(func.max(Dashboard.id))) or 0
+
+    def append(self, dashboard: Dashboard):
+        self.add(dashboard)
+        self.commit()
+
+    def add(self, dashboard: Dashboard):
+        """Insert or update a dashboard without committing."""
+        self.add_all([dashboard])
+
+    def add_all(self, dashboards: Sequence[Dashboard]):
+        """Insert or update dashboards without committing."""
+        upsert_by_timestamp(
+            self._session,
+            Dashboard,
+            dashboards,
+            ('content',),
+            'dashboard',
+            'compressed_dashboard',
         )
 
+    def commit(self):
+        with stage('db.commit'):
+            self._session.commit()
 
-class Dashboard(Base):  # type: ignore
-    __tablename__ = 'compressed_dashboard'
+    def rollback(self):
+        self._session.rollback()
+
+
+class PollEvent(Base):  # type: ignore
+    """One poll of a source by the adaptive scheduler.
+
+    Timestamps are stored in UTC. published_at is the publication time of
+    the new data if the source changed and the source records it.
+    """
+
+    __tablename__ = 'poll_events'
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    timestamp: Mapped[datetime] = mapped_column(
-        DateTime, nullable=False, unique=True
-    )
-    content: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    source: Mapped[str] = mapped_column(String, nullable=False)
+    polled_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    changed: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    published_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    error: Mapped[Optional[str]] = mapped_column(String)
 
-    @property
-    def decompressed_content(self) -> bytes:
-        return gzip.decompress(self.content)
+    def __repr__(self) -> str:
+        return (
+            f'PollEvent(source={self.source}, '
+            f'polled_at={self.polled_at.isoformat()}, '
+            f'changed={self.changed})'
+        )
 
-    @classmethod
-    def from_uncompressed_dashboard(
-        cls, uncompressed_dashboard: UncompressedDashboard
-    ) -> 'Dashboard':
-        return cls(
-            timestamp=uncompressed_dashboard.timestamp,
-            content=gzip.compress(
-                uncompressed_dashboard.content_utf8.encode()
-            ),
+
+class PollEventStore:
+    _session: scoped_session[Session]
+
+    def __init__(self, path: Path):
+        self._session = create_session(path)
+
+    def list(
+        self, source: Optional[str] = None, since: Optional[datetime] = None
+    ) -> Iterator[PollEvent]:
+        stmt = select(PollEvent).order_by(PollEvent.polled_at)
+        if source:
+            stmt = stmt.where(PollEvent.source == source)
+        if since:
+            stmt = stmt.where(PollEvent.polled_at >= since)
+        return self._session.scalars(stmt)
+
+    def append(self, poll_event: PollEvent):
+        count('db.inserted.poll_events')
+        self._session.add(poll_event)
+        with stage('db.commit'):
+            self._session.commit()
+
+
+class ParseFailure(Base):  # type: ignore
+    """A stored item that failed to parse.
+
+    The item is skipped by the parsers as long as its content and the
+    config it was parsed with have the same hashes.
+    """
+
+    __tablename__ = 'parse_failures'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    source: Mapped[str] = mapped_column(String, nullable=False)
+    source_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    content_hash: Mapped[str] = mapped_column(String, nullable=False)
+    config_hash: Mapped[str] = mapped_column(String, nullable=False)
+    error: Mapped[str] = mapped_column(String, nullable=False)
+    failed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f'ParseFailure(source={self.source}, '
+            f'source_id={self.source_id}, '
+            f'error={self.error})'
+        )
+
+
+class ParseFailureStore:
+    _session: scoped_session[Session]
+
+    def __init__(self, path: Path):
+        self._session = create_session(path)
+
+    def list(self, source: Optional[str] = None) -> Iterator[ParseFailure]:
+        stmt = select(ParseFailure).order_by(
+            ParseFailure.source, ParseFailure.source_id
         )
+        if source:
+            stmt = stmt.where(ParseFailure.source == source)
+        return self._session.scalars(stmt)
+
+    def save(self, parse_failure: ParseFailure):
+        with stage('db.select'):
+            existing_parse_failure = self._session.scalars(
+                select(ParseFailure).where(
+                    ParseFailure.source == parse_failure.source,
+                    ParseFailure.source_id == parse_failure.source_id,
+                )
+            ).first()
+        if existing_parse_failure:
+            count('db.updated.parse_failures')
+            existing_parse_failure.content_hash = parse_failure.content_hash
+            existing_parse_failure.config_hash = parse_failure.config_hash
+            existing_parse_failure.error = parse_failure.error
+            existing_parse_failure.failed_at = parse_failure.failed_at
+        else:
+            count('db.inserted.parse_failures')
+            self._session.add(parse_failure)
+        with stage('db.commit'):
+            self._session.commit()
+
+    def delete(
+        self, source: Optional[str] = None, source_id: Optional[int] = None
+    ) -> int:
+        stmt = delete(ParseFailure)
+        if source:
+            stmt = stmt.where(ParseFailure.source == source)
+        if source_id is not None:
+            stmt = stmt.where(ParseFailure.source_id == source_id)
+        n = self._session.execute(stmt).rowcount  # type: ignore
+        with stage('db.commit'):
+            self._session.commit()
+        return n
+
+
+class RowChange(Base):  # type: ignore
+    """A row inserted into or updated in a source table.
+
+    The rows are logged by triggers, so the ids form a sequence of all
+    changes to the source tables.
+    """
+
+    __tablename__ = 'row_changes'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    table_name: Mapped[str] = mapped_column(String, nullable=False)
+    row_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class DailyStats(Base):  # type: ignore
+    """The merged stats of one day.
+
+    The stats are those of the source with the highest priority and, within
+    it, the latest timestamp. first_source and first_timestamp tell where
+    the date appeared first, which orders the dates in the CSV output.
+    revision increases with each refresh and tells when the row was last
+    changed.
+    """
+
+    __tablename__ = 'daily_stats'
+
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
+    source: Mapped[str] = mapped_column(String, nullable=False)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    cases: Mapped[int] = mapped_column(Integer, nullable=False)
+    recovered: Mapped[Optional[int]] = mapped_column(Integer)
+    deaths: Mapped[Optional[int]] = mapped_column(Integer)
+    hospitalized: Mapped[Optional[int]] = mapped_column(Integer)
+    icu: Mapped[Optional[int]] = mapped_column(Integer)
+    first_source: Mapped[str] = mapped_column(String, nullable=False)
+    first_timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    revision: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
     def __repr__(self) -> str:
         return (
-            f'Dashboard(timestamp={self.timestamp.isoformat()}, '
-            f'content_length={len(self.content)})'
+            f'DailyStats(date={self.date.isoformat()}, '
+            f'source={self.source}, '
+            f'cases={self.cases})'
         )
 
 
-class DashboardStore:
+class DailyStatsSource(Base):  # type: ignore
+    """How far the changes of a source are merged into daily_stats.
+
+    high_water_mark is the id of the last row change that was merged.
+    """
+
+    __tablename__ = 'daily_stats_sources'
+
+    source: Mapped[str] = mapped_column(String, primary_key=True)
+    high_water_mark: Mapped[int] = mapped_column(Integer, nullable=False)
+    config_hash: Mapped[Optional[str]] = mapped_column(String)
+
+
+class DailyStatsStore:
     _session: scoped_session[Session]
 
+    # Number of dates per SELECT, below SQLite's limit of parameters.
+    select_chunk_size = 500
+
     def __init__(self, path: Path):
+        self._engine = get_engine(path)
         self._session = create_session(path)
 
-    def list(self, buffer_size: int = 50) -> Iterator[Dashboard]:
-        result = self._session.execute(
-            select(Dashboard)
-            .order_by(Dashboard.timestamp)
-            .execution_options(
-                stream_results=True, max_row_buffer=buffer_size
-            ),
+    def list(self) -> List[DailyStats]:
+        with stage('db.select'):
+            return list(
+                self._session.scalars(
+                    select(DailyStats).order_by(DailyStats.date)
+                )
+            )
+
+    def stream(
+        self, source_priorities: Dict[str, int], buffer_size: int = 1000
+    ) -> Iterator[Row]:
+        """Yield the timestamp and the stats of each date, ordered by the
+        priority of the first source and the first timestamp."""
+        stmt = select(
+            DailyStats.timestamp,
+            DailyStats.cases,
+            DailyStats.recovered,
+            DailyStats.deaths,
+            DailyStats.hospitalized,
+            DailyStats.icu,
+        ).order_by(
+            case(source_priorities, value=DailyStats.first_source),
+            DailyStats.first_timestamp,
         )
-        return result.yield_per(buffer_size).scalars()
+        return stream_rows(self._engine, stmt, buffer_size)
+
+    def get_many(self, dates: Iterable[date]) -> Dict[date, DailyStats]:
+        remaining_dates = list(dates)
+        daily_stats_by_date = {}
+        with stage('db.select'):
+            while remaining_dates:
+                chunk = remaining_dates[: self.select_chunk_size]
+                del remaining_dates[: self.select_chunk_size]
+                for daily_stats in self._session.scalars(
+                    select(DailyStats).where(DailyStats.date.in_(chunk))
+                ):
+                    daily_stats_by_date[daily_stats.date] = daily_stats
+        return daily_stats_by_date
+
+    def list_since(self, revision: int) -> List[DailyStats]:
+        """Return the stats changed in a later revision than the passed
+        one."""
+        with stage('db.select'):
+            return list(
+                self._session.scalars(
+                    select(DailyStats).where(DailyStats.revision > revision)
+                )
+            )
 
-    def append(self, dashboard: Dashboard):
-        existing_dashboard = self._session.scalars(
-            select(Dashboard).where(Dashboard.timestamp == dashboard.timestamp)
-        ).first()
-        if existing_dashboard:
-            logger.info(
-                'Updating existing dashboard %s',
-                dashboard,
+    def max_revision(self) -> int:
+        return self._session.scalar(select(func.max(DailyStats.revision))) or 0
+
+    def count(self) -> int:
+        return (
+            self._session.scalar(select(func.count()).select_from(DailyStats))
+            or 0
+        )
+
+    def add(self, daily_stats: DailyStats):
+        count('db.inserted.daily_stats')
+        self._session.add(daily_stats)
+
+    def list_sources(self) -> Dict[str, DailyStatsSource]:
+        return {
+            daily_stats_source.source: daily_stats_source
+            for daily_stats_source in self._session.scalars(
+                select(DailyStatsSource)
             )
-            existing_dashboard.content = dashboard.content
-        else:
-            logger.info('Adding new dashboard %s', dashboard)
-            self._session.add(dashboard)
-        self._session.commit()
+        }
+
+    def set_source(
+        self, source: str, high_water_mark: int, config_hash: Optional[str]
+    ):
+        self._session.merge(
+            DailyStatsSource(
+                source=source,
+                high_water_mark=high_water_mark,
+                config_hash=config_hash,
+            )
+        )
+
+    def delete_sources(self, source: Optional[str] = None):
+        """Make the next refresh parse all rows of the source."""
+        stmt = delete(DailyStatsSource)
+        if source:
+            stmt = stmt.where(DailyStatsSource.source == source)
+        self._session.execute(stmt)
+        with stage('db.commit'):
+            self._session.commit()
+
+    def clear(self):
+        self._session.execute(delete(DailyStats))
+        self._session.execute(delete(DailyStatsSource))
+
+    def max_change_id(self) -> int:
+        return self._session.scalar(select(func.max(RowChange.id))) or 0
+
+    def min_changed_row_id(
+        self, table_name: str, after_change_id: int
+    ) -> Optional[int]:
+        """Return the lowest id of the rows of a table changed after the
+        passed change."""
+        return self._session.scalar(
+            select(func.min(RowChange.row_id)).where(
+                RowChange.table_name == table_name,
+                RowChange.id > after_change_id,
+            )
+        )
+
+    def has_changes(self) -> bool:
+        """Return whether rows changed that not all sources have merged."""
+        high_water_mark = self._session.scalar(
+            select(func.min(DailyStatsSource.high_water_mark))
+        )
+        return (
+            self._session.scalar(
+                select(RowChange.id)
+                .where(RowChange.id > (high_water_mark or 0))
+                .limit(1)
+            )
+            is not None
+        )
+
+    def prune_changes(self):
+        """Delete the changes that all sources have merged."""
+        high_water_mark = self._session.scalar(
+            select(func.min(DailyStatsSource.high_water_mark))
+        )
+        if high_water_mark:
+            self._session.execute(
+                delete(RowChange).where(RowChange.id <= high_water_mark)
+            )
+
+    def commit(self):
+        with stage('db.commit'):
+            self._session.commit()
+
+    def rollback(self):
+        self._session.rollback()
@@ -1,24 +1,44 @@
 import csv
 import datetime
+import functools
+import gzip
+import json
 import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from typing import (
+    IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set,
+    Tuple, Union,
+)
 
 import regex
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
+from covid_berlin_scraper.articles import fetch_article, get_article_kwargs
 from covid_berlin_scraper.model import (
-    Dashboard, DashboardStore, DistrictTable, DistrictTableStore, PressRelease,
-    PressReleasesStore,
+    DailyStats, DailyStatsStore, Dashboard, DashboardStore, DistrictTable,
+    DistrictTableRow, DistrictTableStore, Partition, PressRelease,
+    PressReleaseRow, PressReleasesStore,
+)
+from covid_berlin_scraper.quarantine import (
+    CONFIG_SECTIONS, HashingReader, Quarantine, get_config_hash,
+    get_content_hash, read_content_hash,
 )
-from covid_berlin_scraper.utils.http_utils import http_get
 from covid_berlin_scraper.utils.parse_utils import (
     get_element_text, parse_int, parse_int_or_none,
 )
+from covid_berlin_scraper.utils.pipeline_utils import Pipeline, PipelineStage
+from covid_berlin_scraper.utils.profile_utils import count, stage
 
 logger = logging.getLogger(__name__)
 
+# Only tables are built into a tree; the rest of a press release is matched
+# by regexes on the raw HTML.
+TABLE_TAG_REGEX = regex.compile(r'<table\b', regex.IGNORECASE)
+TABLE_STRAINER = SoupStrainer('table')
+
 
 def ensure_str(v: Any) -> str:
     if v is None:
@@ -32,8 +52,18 @@ class ParseError(Exception):
 
 @dataclass
 class PressReleaseContent:
-    press_release: PressRelease
+    press_release: Union[PressRelease, PressReleaseRow]
     html: str
+    content_hash: Optional[str] = None
+
+
+def get_stats_date(timestamp: datetime.datetime) -> datetime.date:
+    date = timestamp.date()
+    if timestamp.hour == 0 and timestamp.minute == 0 and timestamp.second == 0:
+        return date
+    if timestamp.hour < 12:
+        return date - datetime.timedelta(days=1)
+    return date
 
 
 @dataclass
@@ -47,16 +77,7 @@ class PressReleaseStats:
 
     @property
     def date(self) -> datetime.date:
-        date = self.timestamp.date()
-        if (
-            self.timestamp.hour == 0
-            and self.timestamp.minute == 0
-            and self.timestamp.second == 0
-        ):
-            return date
-        if self.timestamp.hour < 12:
-            return date - datetime.timedelta(days=1)
-        return date
+        return get_stats_date(self.timestamp)
 
     def astuple(
         self, field_funcs: Iterable[Callable[['PressReleaseStats'], str]]
@@ -77,12 +98,24 @@ class PressReleaseStats:
 
 
 def download_press_releases(
-    db_path: Path, **http_get_kwargs
+    db_path: Path,
+    cache_path: Path,
+    after_id: int = 0,
+    max_id: Optional[int] = None,
+    partition: Optional[Partition] = None,
+    **fetch_article_kwargs,
 ) -> Iterator[PressReleaseContent]:
     press_releases = PressReleasesStore(db_path)
-    for press_release in press_releases.list():
-        html = http_get(press_release.url, **http_get_kwargs)
-        yield PressReleaseContent(press_release=press_release, html=html)
+    for press_release in press_releases.list(after_id, max_id, partition):
+        with stage('fetch.press_releases'):
+            raw_content = fetch_article(
+                press_release.url, cache_path, **fetch_article_kwargs
+            )
+        yield PressReleaseContent(
+            press_release=press_release,
+            html=raw_content.text,
+            content_hash=get_content_hash(raw_content.content),
+        )
 
 
 def parse_press_release(
@@ -105,13 +138,17 @@ def parse_press_release(
     thousands_separator: str,
     regex_none: regex.Pattern,
 ) -> PressReleaseStats:
-    soup = BeautifulSoup(content.html, 'lxml')
-    table = soup.find('table')
+    table = None
+    if TABLE_TAG_REGEX.search(content.html):
+        with stage('parse.press_release.soup'):
+            table = BeautifulSoup(
+                content.html, 'lxml', parse_only=TABLE_STRAINER
+            ).find('table')
     if table:
         last_tr = table.find_all('tr')[-1]
         tds = last_tr.find_all('td')
         if not regex.match(first_cell_regex, get_element_text(tds[0])):
-            raise Exception(
+            raise ParseError(
                 'Expected the first cell content to be match "{}"'.format(
                     first_cell_regex
                 )
@@ -131,7 +168,8 @@ def parse_press_release(
         else:
             recovered = recovered_map.get(content.press_release.url)
     else:
-        cases_m = cases_regex.search(content.html)
+        with stage('parse.press_release.regex'):
+            cases_m = cases_regex.search(content.html)
         if cases_m:
             cases = parse_int(
                 cases_m.group(cases_regex_group),
@@ -141,7 +179,10 @@ def parse_press_release(
         else:
             raise ParseError('Failed to parse case number')
         recovered = recovered_map.get(content.press_release.url)
-    deaths_m = deaths_regex.search(content.html)
+    with stage('parse.press_release.regex'):
+        deaths_m = deaths_regex.search(content.html)
+        hospitalized_m = hospitalized_regex.search(content.html)
+        icu_m = icu_regex.search(content.html)
     deaths = (
         parse_int(
             deaths_m.group(deaths_regex_group),
@@ -151,7 +192,6 @@ def parse_press_release(
         if deaths_m
         else None
     )
-    hospitalized_m = hospitalized_regex.search(content.html)
     hospitalized = (
         parse_int(
             hospitalized_m.group(hospitalized_regex_group),
@@ -163,7 +203,6 @@ def parse_press_release(
     )
     if hospitalized is None:
         hospitalized = hospitalized_map.get(content.press_release.url)
-    icu_m = icu_regex.search(content.html)
     icu = (
         parse_int(
             icu_m.group(icu_regex_group), numbers_map, thousands_separator
@@ -182,23 +221,162 @@ def parse_press_release(
 
 
 def parse_press_releases(
-    contents: Iterable[PressReleaseContent], **parse_press_release_kwargs
+    contents: Iterable[PressReleaseContent],
+    quarantine: Optional[Quarantine] = None,
+    **parse_press_release_kwargs,
 ) -> Iterator[PressReleaseStats]:
     for content in contents:
+        press_release_id = content.press_release.id
+        if (
+            quarantine
+            and content.content_hash
+            and quarantine.is_quarantined(
+                press_release_id, content.content_hash
+            )
+        ):
+            logger.info('Skipping quarantined %s', content.press_release.title)
+            continue
         try:
-            stats = parse_press_release(content, **parse_press_release_kwargs)
-        except ParseError:
+            with stage('parse.press_releases'):
+                stats = parse_press_release(
+                    content, **parse_press_release_kwargs
+                )
+        except ParseError as e:
             logger.error(
                 'Failed to parse %s',
                 content.press_release.title,
             )
+            count('parse.errors.press_releases')
+            if quarantine and content.content_hash:
+                quarantine.add(press_release_id, content.content_hash, e)
             continue
+        if quarantine:
+            quarantine.remove(press_release_id)
+        count('parse.items.press_releases')
         logger.info(stats)
         yield stats
 
 
+@dataclass
+class DistrictStats:
+    timestamp: datetime.datetime
+    district: str
+    cases: int
+    recovered: Optional[int]
+
+    @property
+    def date(self) -> datetime.date:
+        return get_stats_date(self.timestamp)
+
+
+@dataclass
+class DistrictTableColumns:
+    timestamp: datetime.datetime
+    columns: Dict[str, tuple]
+
+
+def read_district_table(
+    district_table: Union[DistrictTable, DistrictTableRow], delimiter: str
+) -> DistrictTableColumns:
+    """Parse the CSV content of a district table into columns.
+
+    The rows are transposed at once with zip() instead of building a dict
+    for every row, so that each column can be converted in a single pass.
+    Like csv.DictReader, blank lines are skipped and missing trailing cells
+    are read as empty strings.
+    """
+    with stage('parse.district_table.csv'):
+        reader = csv.reader(
+            district_table.text.splitlines(), delimiter=delimiter
+        )
+        header = next(reader, None)
+        if not header:
+            raise ParseError('Empty district table')
+        n = len(header)
+        rows = [row + [''] * (n - len(row)) for row in reader if row]
+        columns = (
+            dict(zip(header, zip(*rows)))
+            if rows
+            else {name: () for name in header}
+        )
+    return DistrictTableColumns(
+        timestamp=district_table.timestamp, columns=columns
+    )
+
+
+def get_column(table: DistrictTableColumns, name: str) -> tuple:
+    try:
+        return table.columns[name]
+    except KeyError:
+        raise ParseError(f'Column "{name}" not found')
+
+
+def parse_district_table_columns(
+    table: DistrictTableColumns,
+    column_district: str,
+    column_cases: str,
+    column_recovered: str,
+    row_sum: str,
+    deaths_map: Dict[datetime.date, int],
+    **kwargs,
+) -> PressReleaseStats:
+    try:
+        i = get_column(table, column_district).index(row_sum)
+    except ValueError:
+        raise ParseError('Sum row not found')
+    try:
+        cases = int(get_column(table, column_cases)[i])
+        recovered = (
+            int(table.columns[column_recovered][i])
+            if column_recovered in table.columns
+            else None
+        )
+    except ValueError as e:
+        raise ParseError(f'Failed to parse sum row: {e}')
+    return PressReleaseStats(
+        timestamp=table.timestamp,
+        cases=cases,
+        recovered=recovered,
+        deaths=deaths_map.get(table.timestamp.date()),
+        hospitalized=None,
+        icu=None,
+    )
+
+
+def parse_district_table_districts(
+    table: DistrictTableColumns,
+    column_district: str,
+    column_cases: str,
+    column_recovered: str,
+    row_sum: str,
+    **kwargs,
+) -> List[DistrictStats]:
+    districts = get_column(table, column_district)
+    try:
+        cases = list(map(int, get_column(table, column_cases)))
+        recovered: List[Optional[int]] = (
+            list(map(int, table.columns[column_recovered]))
+            if column_recovered in table.columns
+            else [None] * len(districts)
+        )
+    except ValueError as e:
+        raise ParseError(f'Failed to parse district numbers: {e}')
+    return [
+        DistrictStats(
+            timestamp=table.timestamp,
+            district=district,
+            cases=district_cases,
+            recovered=district_recovered,
+        )
+        for district, district_cases, district_recovered in zip(
+            districts, cases, recovered
+        )
+        if district != row_sum
+    ]
+
+
 def parse_district_table(
-    district_table: DistrictTable,
+    district_table: Union[DistrictTable, DistrictTableRow],
     column_district: str,
     column_cases: str,
     column_recovered: str,
@@ -206,42 +384,96 @@ def parse_district_table(
     delimiter: str,
     deaths_map: Dict[datetime.date, int],
 ) -> PressReleaseStats:
-    reader = csv.DictReader(
-        district_table.content.splitlines(),
-        delimiter=delimiter,
+    return parse_district_table_columns(
+        read_district_table(district_table, delimiter),
+        column_district=column_district,
+        column_cases=column_cases,
+        column_recovered=column_recovered,
+        row_sum=row_sum,
+        deaths_map=deaths_map,
     )
-    for row in reader:
-        if row[column_district] == row_sum:
-            cases = int(row[column_cases])
-            recovered = (
-                int(row[column_recovered]) if column_recovered in row else None
-            )
-            deaths = deaths_map.get(district_table.timestamp.date())
-            return PressReleaseStats(
-                timestamp=district_table.timestamp,
-                cases=cases,
-                recovered=recovered,
-                deaths=deaths,
-                hospitalized=None,
-                icu=None,
-            )
-    raise ParseError('Sum row not found')
 
 
 def parse_district_tables(
-    db_path: Path, **parse_district_table_kwargs
+    db_path: Path,
+    district_stats_list: Optional[List[DistrictStats]] = None,
+    after_id: int = 0,
+    max_id: Optional[int] = None,
+    partition: Optional[Partition] = None,
+    quarantine: Optional[Quarantine] = None,
+    districts_quarantine: Optional[Quarantine] = None,
+    **parse_district_table_kwargs,
 ) -> Iterator[PressReleaseStats]:
+    """Parse the Berlin totals of all stored district tables.
+
+    When a district_stats_list is passed, the per-district rows of each table
+    are appended to it too, without parsing the table a second time. A table
+    whose district rows fail to parse still yields its total; the failure is
+    recorded in districts_quarantine.
+    """
     district_table_store = DistrictTableStore(db_path)
-    for district_table in district_table_store.list():
+    for district_table in district_table_store.list(
+        after_id, max_id, partition
+    ):
+        content_hash = (
+            get_content_hash(district_table.content)
+            if quarantine or districts_quarantine
+            else None
+        )
+        if (
+            quarantine
+            and content_hash
+            and quarantine.is_quarantined(district_table.id, content_hash)
+        ):
+            logger.info('Skipping quarantined %s', district_table)
+            continue
         try:
-            stats = parse_district_table(
-                district_table, **parse_district_table_kwargs
-            )
-        except ParseError:
+            with stage('parse.district_tables'):
+                table = read_district_table(
+                    district_table, parse_district_table_kwargs['delimiter']
+                )
+                stats = parse_district_table_columns(
+                    table, **parse_district_table_kwargs
+                )
+        except ParseError as e:
             logger.error('Failed to parse %s', district_table)
+            count('parse.errors.district_tables')
+            if quarantine and content_hash:
+                quarantine.add(district_table.id, content_hash, e)
             continue
+        if quarantine:
+            quarantine.remove(district_table.id)
+        count('parse.items.district_tables')
         logger.info(stats)
         yield stats
+        if district_stats_list is None:
+            continue
+        if (
+            districts_quarantine
+            and content_hash
+            and districts_quarantine.is_quarantined(
+                district_table.id, content_hash
+            )
+        ):
+            logger.info(
+                'Skipping quarantined district rows of %s', district_table
+            )
+            continue
+        try:
+            with stage('parse.district_tables'):
+                district_stats_list.extend(
+                    parse_district_table_districts(
+                        table, **parse_district_table_kwargs
+                    )
+                )
+        except ParseError as e:
+            logger.error('Failed to parse district rows of %s', district_table)
+            count('parse.errors.district_rows')
+            if districts_quarantine and content_hash:
+                districts_quarantine.add(district_table.id, content_hash, e)
+            continue
+        if districts_quarantine:
+            districts_quarantine.remove(district_table.id)
 
 
 def find_dashboard_value(
@@ -251,7 +483,10 @@ def find_dashboard_value(
         tags = soup.select(selector)
         if len(tags):
             tag = tags[0]
-            return int(tag.contents[0].replace(' ', ''))
+            try:
+                return int(tag.contents[0].replace(' ', ''))
+            except (IndexError, ValueError) as e:
+                raise ParseError(f'Failed to parse "{selector}": {e}')
     return None
 
 
@@ -262,33 +497,165 @@ def parse_dashboard(
     deaths_selectors: list[str],
     hospitalized_selectors: list[str],
     icu_selectors: list[str],
+    html: Union[bytes, IO[bytes], None] = None,
 ) -> PressReleaseStats:
-    soup = BeautifulSoup(dashboard.decompressed_content, 'lxml')
-    cases = find_dashboard_value(soup, cases_selectors)
-    if cases is None:
-        raise Exception('Failed to parse the number of cases')
-    return PressReleaseStats(
-        timestamp=dashboard.timestamp,
-        cases=cases,
-        recovered=find_dashboard_value(soup, recovered_selectors),
-        deaths=find_dashboard_value(soup, deaths_selectors),
-        hospitalized=find_dashboard_value(soup, hospitalized_selectors),
-        icu=find_dashboard_value(soup, icu_selectors),
+    if html is None:
+        html = dashboard.decompressed_content
+    with stage('parse.dashboard.soup'):
+        soup = BeautifulSoup(html, 'lxml')
+    with stage('parse.dashboard.select'):
+        cases = find_dashboard_value(soup, cases_selectors)
+        if cases is None:
+            raise ParseError('Failed to parse the number of cases')
+        return PressReleaseStats(
+            timestamp=dashboard.timestamp,
+            cases=cases,
+            recovered=find_dashboard_value(soup, recovered_selectors),
+            deaths=find_dashboard_value(soup, deaths_selectors),
+            hospitalized=find_dashboard_value(soup, hospitalized_selectors),
+            icu=find_dashboard_value(soup, icu_selectors),
+        )
+
+
+def read_dashboards(
+    db_path: Path,
+    after_id: int = 0,
+    max_id: Optional[int] = None,
+    partition: Optional[Partition] = None,
+    buffer_size: int = 50,
+) -> Iterator[Dashboard]:
+    """List the dashboards without their content, which is read by the
+    parse workers."""
+    dashboard_store = DashboardStore(db_path)
+    yield from dashboard_store.list(
+        buffer_size=buffer_size,
+        after_id=after_id,
+        max_id=max_id,
+        with_content=False,
+        partition=partition,
     )
 
 
+@dataclass
+class DashboardItem:
+    """A dashboard passing through the parsing pipeline."""
+
+    dashboard: Dashboard
+    content_hash: Optional[str] = None
+    stats: Optional[PressReleaseStats] = None
+    error: Optional[ParseError] = None
+
+
+def parse_stored_dashboard(
+    dashboard: Dashboard,
+    dashboard_store: DashboardStore,
+    quarantine: Optional[Quarantine] = None,
+    **parse_dashboard_kwargs,
+) -> DashboardItem:
+    """Decompress and parse the content of a dashboard while reading it.
+
+    The content is read incrementally from the database, so a worker holds
+    only the decompressed HTML of its current dashboard. The content hash
+    is computed from the same read; only a dashboard that failed before is
+    hashed up front, to skip it without parsing it if it is unchanged.
+    """
+    item = DashboardItem(dashboard=dashboard)
+    try:
+        if quarantine and quarantine.has_failed(dashboard.id):
+            with dashboard_store.open_content(dashboard) as f:
+                item.content_hash = read_content_hash(f)
+            if quarantine.is_quarantined(dashboard.id, item.content_hash):
+                logger.info('Skipping quarantined %s', dashboard)
+                return item
+        with dashboard_store.open_content(dashboard) as f:
+            reader = HashingReader(f)
+            with gzip.GzipFile(fileobj=reader, mode='rb') as html:
+                try:
+                    with stage('parse.dashboards'):
+                        item.stats = parse_dashboard(
+                            dashboard,
+                            html=html,  # type: ignore
+                            **parse_dashboard_kwargs,
+                        )
+                except ParseError as e:
+                    logger.error('Failed to parse %s', dashboard)
+                    count('parse.errors.dashboards')
+                    item.error = e
+            if quarantine:
+                read_content_hash(reader)
+                item.content_hash = reader.hexdigest()
+    finally:
+        # End the read transaction of this worker.
+        dashboard_store.rollback()
+    return item
+
+
 def parse_dashboards(
-    db_path: Path, **parse_dashboard_kwargs
+    db_path: Path,
+    after_id: int = 0,
+    max_id: Optional[int] = None,
+    partition: Optional[Partition] = None,
+    parse_workers: int = 1,
+    queue_depth: int = 4,
+    quarantine: Optional[Quarantine] = None,
+    **parse_dashboard_kwargs,
 ) -> Iterator[PressReleaseStats]:
+    """Parse dashboards in a pipeline of a reader and parse workers.
+
+    The reader lists the dashboards without their content, and each parse
+    worker streams the content of one dashboard at a time from the database
+    through the decompressor into the parser, so that at most
+    `parse_workers` decompressed dashboards are held in memory. At most
+    `queue_depth` dashboards wait for a worker.
+    """
     dashboard_store = DashboardStore(db_path)
-    for dashboard in dashboard_store.list():
-        try:
-            stats = parse_dashboard(dashboard, **parse_dashboard_kwargs)
-        except ParseError:
-            logger.error('Failed to parse %s', dashboard)
+    pipeline = Pipeline(
+        [
+            PipelineStage(
+                'parse',
+                functools.partial(
+                    parse_stored_dashboard,
+                    dashboard_store=dashboard_store,
+                    quarantine=quarantine,
+                    **parse_dashboard_kwargs,
+                ),
+                parse_workers,
+            ),
+        ],
+        depth=queue_depth,
+    )
+    for item in pipeline.run(
+        read_dashboards(
+            db_path, after_id, max_id, partition, buffer_size=queue_depth
+        )
+    ):
+        if quarantine and item.content_hash:
+            if item.error:
+                quarantine.add(
+                    item.dashboard.id, item.content_hash, item.error
+                )
+            elif item.stats:
+                quarantine.remove(item.dashboard.id)
+        stats = item.stats
+        if stats is None:
             continue
+        count('parse.items.dashboards')
         logger.info(stats)
         yield stats
+    logger.info(
+        'Dashboard pipeline utilisation:\n%s', pipeline.format_report()
+    )
+
+
+def get_unique_stats(
+    stats_list: Iterable[PressReleaseStats],
+) -> List[PressReleaseStats]:
+    """Keep the last stats of each date, ordered by the first stats of the
+    date."""
+    stats_by_date_unique = {}
+    for stats in stats_list:
+        stats_by_date_unique[stats.date] = stats
+    return list(stats_by_date_unique.values())
 
 
 def write_csv(
@@ -296,148 +663,788 @@ def write_csv(
     path: Path,
     fields: Dict[str, Callable[[PressReleaseStats], Any]],
 ):
-    stats_by_date_unique = {}
-    for stats in stats_list:
-        stats_by_date_unique[stats.date] = stats
-    with path.open('w') as f:
+    unique_stats_list = get_unique_stats(stats_list)
+    with stage('output.write_csv'), path.open('w') as f:
         writer = csv.writer(f, lineterminator='\n')
         writer.writerow(fields.keys())
         writer.writerows(
-            stats.astuple(fields.values())
-            for stats in stats_by_date_unique.values()
+            stats.astuple(fields.values()) for stats in unique_stats_list
         )
+    count('output.rows', len(unique_stats_list))
 
 
-def main(
+def stats_asdict(stats: PressReleaseStats) -> dict:
+    return {
+        'date': stats.date.isoformat(),
+        'cases': stats.cases,
+        'recovered': stats.recovered,
+        'deaths': stats.deaths,
+        'hospitalized': stats.hospitalized,
+        'icu': stats.icu,
+    }
+
+
+STREAM_FORMATS = ['csv', 'ndjson']
+
+
+def write_stream(
+    stats_iter: Iterable[PressReleaseStats], f: IO[str], stream_format: str
+):
+    """Write unique stats one record at a time, flushing after each.
+
+    CSV has the columns of the output with hospitalized and icu, NDJSON
+    has the same fields as the HTTP API.
+    """
+    if stream_format not in STREAM_FORMATS:
+        raise Exception(f'Unknown stream format "{stream_format}"')
+    writer = csv.writer(f, lineterminator='\n')
+    if stream_format == 'csv':
+        writer.writerow(OUTPUT_HOSP_FIELDS.keys())
+        f.flush()
+    for stats in stats_iter:
+        with stage('output.write_stream'):
+            if stream_format == 'csv':
+                writer.writerow(stats.astuple(OUTPUT_HOSP_FIELDS.values()))
+            else:
+                f.write(json.dumps(stats_asdict(stats)) + '\n')
+            f.flush()
+        count('output.rows')
+
+
+def get_parse_press_release_kwargs(config: dict) -> dict:
+    return dict(
+        cases_regex=regex.compile(
+            config['parse_press_release']['cases_regex']
+        ),
+        cases_regex_group=config['parse_press_release']['cases_regex_group'],
+        numbers_map={
+            s: int(v)
+            for s, v in config['parse_press_release']['numbers_map'].items()
+        },
+        deaths_regex=regex.compile(
+            config['parse_press_release']['deaths_regex']
+        ),
+        deaths_regex_group=config['parse_press_release']['deaths_regex_group'],
+        hospitalized_regex=regex.compile(
+            config['parse_press_release']['hospitalized_regex']
+        ),
+        hospitalized_regex_group=config['parse_press_release'][
+            'hospitalized_regex_group'
+        ],
+        hospitalized_map={
+            str(s): int(v) if v is not None else None
+            for s, v in config['parse_press_release'][
+                'hospitalized_map'
+            ].items()
+        },
+        icu_regex=regex.compile(config['parse_press_release']['icu_regex']),
+        icu_regex_group=config['parse_press_release']['icu_regex_group'],
+        row_index=int(config['parse_press_release']['row_index']),
+        first_cell_regex=regex.compile(
+            config['parse_press_release']['first_cell_regex']
+        ),
+        cases_column_index=int(
+            config['parse_press_release']['cases_column_index']
+        ),
+        recovered_column_index=int(
+            config['parse_press_release']['recovered_column_index']
+        ),
+        recovered_map={
+            str(s): int(v)
+            for s, v in config['parse_press_release']['recovered_map'].items()
+        },
+        thousands_separator=config['parse_press_release'][
+            'thousands_separator'
+        ],
+        regex_none=regex.compile(config['parse_press_release']['regex_none']),
+    )
+
+
+def get_parse_district_table_kwargs(config: dict) -> dict:
+    return dict(
+        column_district=config['parse_district_table']['column_district'],
+        column_cases=config['parse_district_table']['column_cases'],
+        column_recovered=config['parse_district_table']['column_recovered'],
+        row_sum=config['parse_district_table']['row_sum'],
+        delimiter=config['parse_district_table']['delimiter'],
+        deaths_map={
+            datetime.date.fromisoformat(k): int(v)
+            for k, v in config['parse_district_table']['deaths_map'].items()
+        },
+    )
+
+
+def get_parse_dashboard_kwargs(config: dict) -> dict:
+    return dict(
+        cases_selectors=config['parse_dashboard']['cases_selectors'],
+        recovered_selectors=config['parse_dashboard']['recovered_selectors'],
+        deaths_selectors=config['parse_dashboard']['deaths_selectors'],
+        hospitalized_selectors=config['parse_dashboard'][
+            'hospitalized_selectors'
+        ],
+        icu_selectors=config['parse_dashboard']['icu_selectors'],
+    )
+
+
+def get_dashboard_pipeline_kwargs(config: dict) -> dict:
+    pipeline_config = config['parse_dashboard'].get('pipeline', {})
+    return dict(
+        parse_workers=int(pipeline_config.get('parse_workers', 1)),
+        queue_depth=int(pipeline_config.get('queue_depth', 4)),
+    )
+
+
+OUTPUT_FIELDS: Dict[str, Callable[[PressReleaseStats], Any]] = {
+    'date': lambda stats: stats.date.isoformat(),
+    'cases': lambda stats: stats.cases,
+    'recovered': lambda stats: ensure_str(stats.recovered),
+    'deaths': lambda stats: ensure_str(stats.deaths),
+}
+OUTPUT_HOSP_FIELDS: Dict[str, Callable[[PressReleaseStats], Any]] = {
+    **OUTPUT_FIELDS,
+    'hospitalized': lambda stats: ensure_str(stats.hospitalized),
+    'icu': lambda stats: ensure_str(stats.icu),
+}
+
+
+def parse_cached_press_releases(
     cache_path: Path,
     config: dict,
-    output_path: Path,
-    output_hosp_path: Optional[Path] = None,
-):
+    after_id: int = 0,
+    max_id: Optional[int] = None,
+    partition: Optional[Partition] = None,
+) -> List[PressReleaseStats]:
     contents = download_press_releases(
         db_path=cache_path / 'db.sqlite3',
-        cache_dir=cache_path / 'pages',
+        cache_path=cache_path,
+        after_id=after_id,
+        max_id=max_id,
+        partition=partition,
         timeout=int(config['http']['timeout']),
         user_agent=config['http']['user_agent'],
+        **get_article_kwargs(config),
     )
-    stats_list_press_releases = list(
+    return list(
         parse_press_releases(
             contents,
-            cases_regex=regex.compile(
-                config['parse_press_release']['cases_regex']
-            ),
-            cases_regex_group=config['parse_press_release'][
-                'cases_regex_group'
-            ],
-            numbers_map={
-                s: int(v)
-                for s, v in config['parse_press_release'][
-                    'numbers_map'
-                ].items()
-            },
-            deaths_regex=regex.compile(
-                config['parse_press_release']['deaths_regex']
-            ),
-            deaths_regex_group=config['parse_press_release'][
-                'deaths_regex_group'
-            ],
-            hospitalized_regex=regex.compile(
-                config['parse_press_release']['hospitalized_regex']
-            ),
-            hospitalized_regex_group=config['parse_press_release'][
-                'hospitalized_regex_group'
-            ],
-            hospitalized_map={
-                str(s): int(v) if v is not None else None
-                for s, v in config['parse_press_release'][
-                    'hospitalized_map'
-                ].items()
-            },
-            icu_regex=regex.compile(
-                config['parse_press_release']['icu_regex']
-            ),
-            icu_regex_group=config['parse_press_release']['icu_regex_group'],
-            row_index=int(config['parse_press_release']['row_index']),
-            first_cell_regex=regex.compile(
-                config['parse_press_release']['first_cell_regex']
-            ),
-            cases_column_index=int(
-                config['parse_press_release']['cases_column_index']
-            ),
-            recovered_column_index=int(
-                config['parse_press_release']['recovered_column_index']
-            ),
-            recovered_map={
-                str(s): int(v)
-                for s, v in config['parse_press_release'][
-                    'recovered_map'
-                ].items()
-            },
-            thousands_separator=config['parse_press_release'][
-                'thousands_separator'
-            ],
-            regex_none=regex.compile(
-                config['parse_press_release']['regex_none']
+            quarantine=Quarantine.from_config(
+                cache_path / 'db.sqlite3', config, 'press_releases'
             ),
+            **get_parse_press_release_kwargs(config),
         )
     )
-    stats_list_district_tables = list(
+
+
+def parse_cached_district_tables(
+    cache_path: Path,
+    config: dict,
+    district_stats_list: Optional[List[DistrictStats]] = None,
+    after_id: int = 0,
+    max_id: Optional[int] = None,
+    partition: Optional[Partition] = None,
+) -> List[PressReleaseStats]:
+    return list(
         parse_district_tables(
             db_path=cache_path / 'db.sqlite3',
-            column_district=config['parse_district_table']['column_district'],
-            column_cases=config['parse_district_table']['column_cases'],
-            column_recovered=config['parse_district_table'][
-                'column_recovered'
-            ],
-            row_sum=config['parse_district_table']['row_sum'],
-            delimiter=config['parse_district_table']['delimiter'],
-            deaths_map={
-                datetime.date.fromisoformat(k): int(v)
-                for k, v in config['parse_district_table'][
-                    'deaths_map'
-                ].items()
-            },
+            district_stats_list=district_stats_list,
+            after_id=after_id,
+            max_id=max_id,
+            partition=partition,
+            quarantine=Quarantine.from_config(
+                cache_path / 'db.sqlite3', config, 'district_tables'
+            ),
+            districts_quarantine=(
+                Quarantine.from_config(
+                    cache_path / 'db.sqlite3', config, 'district_rows'
+                )
+                if district_stats_list is not None
+                else None
+            ),
+            **get_parse_district_table_kwargs(config),
         )
     )
-    stats_dashboard = list(
+
+
+def parse_cached_dashboards(
+    cache_path: Path,
+    config: dict,
+    after_id: int = 0,
+    max_id: Optional[int] = None,
+    partition: Optional[Partition] = None,
+) -> List[PressReleaseStats]:
+    return list(
         parse_dashboards(
             db_path=cache_path / 'db.sqlite3',
-            cases_selectors=config['parse_dashboard']['cases_selectors'],
-            recovered_selectors=config['parse_dashboard'][
-                'recovered_selectors'
-            ],
-            deaths_selectors=config['parse_dashboard']['deaths_selectors'],
-            hospitalized_selectors=config['parse_dashboard'][
-                'hospitalized_selectors'
-            ],
-            icu_selectors=config['parse_dashboard']['icu_selectors'],
+            after_id=after_id,
+            max_id=max_id,
+            partition=partition,
+            quarantine=Quarantine.from_config(
+                cache_path / 'db.sqlite3', config, 'dashboards'
+            ),
+            **get_dashboard_pipeline_kwargs(config),
+            **get_parse_dashboard_kwargs(config),
         )
     )
-    stats_list = (
-        stats_list_press_releases
-        + stats_list_district_tables
-        + stats_dashboard
+
+
+ParseSourceFunc = Callable[..., List[PressReleaseStats]]
+
+
+@dataclass
+class Source:
+    """A source of daily stats, parsed on its own and merged with the others.
+
+    `parse(cache_path, config, after_id=0, max_id=None, partition=None)`
+    returns the stats of the source. For each date, the stats of the source
+    with the highest `priority` win. A source with a `store` is incremental:
+    it can parse only the rows with ids in (after_id, max_id] of the store.
+    `dependencies` are the run-all jobs that download the source's data.
+    """
+
+    name: str
+    parse: ParseSourceFunc
+    priority: int
+    store: Optional[Callable[[Path], Any]] = None
+    dependencies: Sequence[str] = ()
+
+    @property
+    def incremental(self) -> bool:
+        return self.store is not None
+
+    def max_id(self, db_path: Path) -> int:
+        if self.store is None:
+            raise Exception(f'Source {self.name} is not incremental')
+        return self.store(db_path).max_id()
+
+
+SOURCES: Dict[str, Source] = {}
+
+
+def register_source(source: Source) -> Source:
+    if source.name in SOURCES:
+        raise Exception(f'Source "{source.name}" is already registered')
+    SOURCES[source.name] = source
+    return source
+
+
+def get_sources(names: Optional[Iterable[str]] = None) -> List[Source]:
+    """Return the registered sources in the order in which they merge."""
+    if names is None:
+        sources = list(SOURCES.values())
+    else:
+        sources = []
+        for name in names:
+            if name not in SOURCES:
+                raise Exception(f'Unknown source "{name}"')
+            sources.append(SOURCES[name])
+    return sorted(sources, key=lambda source: source.priority)
+
+
+register_source(
+    Source(
+        name='press_releases',
+        parse=parse_cached_press_releases,
+        priority=10,
+        store=PressReleasesStore,
+        dependencies=['download-feed', 'download-archives'],
+    )
+)
+register_source(
+    Source(
+        name='district_tables',
+        parse=parse_cached_district_tables,
+        priority=20,
+        store=DistrictTableStore,
+        dependencies=['download-district-table'],
     )
-    write_csv(
-        stats_list,
-        output_path,
-        {
-            'date': lambda stats: stats.date.isoformat(),
-            'cases': lambda stats: stats.cases,
-            'recovered': lambda stats: ensure_str(stats.recovered),
-            'deaths': lambda stats: ensure_str(stats.deaths),
-        },
+)
+register_source(
+    Source(
+        name='dashboards',
+        parse=parse_cached_dashboards,
+        priority=30,
+        store=DashboardStore,
+        dependencies=['download-dashboard'],
+    )
+)
+
+
+def parse_sources(
+    cache_path: Path,
+    config: dict,
+    sources: Sequence[Source],
+    source_kwargs: Optional[Dict[str, dict]] = None,
+    max_workers: Optional[int] = None,
+    **parse_kwargs,
+) -> Dict[str, List[PressReleaseStats]]:
+    """Parse sources concurrently and return their stats in merge order.
+
+    `source_kwargs` are additional arguments of single sources by name.
+    """
+    sources = sorted(sources, key=lambda source: source.priority)
+    source_kwargs = source_kwargs or {}
+    with ThreadPoolExecutor(
+        max_workers=max_workers or max(len(sources), 1)
+    ) as executor:
+        futures = {
+            source.name: executor.submit(
+                source.parse,
+                cache_path,
+                config,
+                **parse_kwargs,
+                **source_kwargs.get(source.name, {}),
+            )
+            for source in sources
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def merge_sources(
+    stats_lists_by_source: Dict[str, List[PressReleaseStats]],
+) -> List[PressReleaseStats]:
+    """Concatenate the stats of sources for write_csv, which keeps the last
+    stats per date."""
+    return [
+        stats
+        for source in get_sources(stats_lists_by_source.keys())
+        for stats in stats_lists_by_source[source.name]
+    ]
+
+
+def get_merge_key(
+    source_name: str, timestamp: datetime.datetime
+) -> Tuple[int, datetime.datetime]:
+    return SOURCES[source_name].priority, timestamp
+
+
+def get_source_config_hash(config: dict, source: Source) -> Optional[str]:
+    if source.name not in CONFIG_SECTIONS:
+        return None
+    return get_config_hash(config, source.name)
+
+
+def astuple_stats(stats: PressReleaseStats) -> tuple:
+    return (
+        stats.cases,
+        stats.recovered,
+        stats.deaths,
+        stats.hospitalized,
+        stats.icu,
+    )
+
+
+def astuple_daily_stats(daily_stats: DailyStats) -> tuple:
+    return (
+        daily_stats.cases,
+        daily_stats.recovered,
+        daily_stats.deaths,
+        daily_stats.hospitalized,
+        daily_stats.icu,
+    )
+
+
+def merge_daily_stats(
+    store: DailyStatsStore,
+    source: Source,
+    stats_list: Iterable[PressReleaseStats],
+    revision: int = 0,
+) -> Set[datetime.date]:
+    """Merge the stats of a source into the daily_stats table.
+
+    Like in write_csv, for each date the stats of the source with the
+    highest priority and the latest timestamp win and the date is ordered
+    by the first stats it appears in. Merging the same stats again does not
+    change the table. The changed rows are marked with the passed revision.
+    Return the dates whose stats changed.
+    """
+    first_timestamps: Dict[datetime.date, datetime.datetime] = {}
+    last_stats: Dict[datetime.date, PressReleaseStats] = {}
+    for stats in stats_list:
+        date = stats.date
+        if date not in first_timestamps or (
+            stats.timestamp < first_timestamps[date]
+        ):
+            first_timestamps[date] = stats.timestamp
+        if date not in last_stats or (
+            stats.timestamp >= last_stats[date].timestamp
+        ):
+            last_stats[date] = stats
+    existing_daily_stats = store.get_many(last_stats.keys())
+    changed_dates = set()
+    for date, stats in last_stats.items():
+        first_timestamp = first_timestamps[date]
+        daily_stats = existing_daily_stats.get(date)
+        if daily_stats is None:
+            daily_stats = DailyStats(
+                date=date,
+                first_source=source.name,
+                first_timestamp=first_timestamp,
+            )
+            store.add(daily_stats)
+        else:
+            if get_merge_key(source.name, first_timestamp) < get_merge_key(
+                daily_stats.first_source, daily_stats.first_timestamp
+            ):
+                daily_stats.first_source = source.name
+                daily_stats.first_timestamp = first_timestamp
+                # The date moves in the output.
+                changed_dates.add(date)
+                daily_stats.revision = revision
+            if get_merge_key(source.name, stats.timestamp) < get_merge_key(
+                daily_stats.source, daily_stats.timestamp
+            ):
+                continue
+            if (
+                daily_stats.source == source.name
+                and daily_stats.timestamp == stats.timestamp
+                and astuple_daily_stats(daily_stats) == astuple_stats(stats)
+            ):
+                continue
+            count('db.updated.daily_stats')
+        changed_dates.add(date)
+        daily_stats.revision = revision
+        daily_stats.source = source.name
+        daily_stats.timestamp = stats.timestamp
+        (
+            daily_stats.cases,
+            daily_stats.recovered,
+            daily_stats.deaths,
+            daily_stats.hospitalized,
+            daily_stats.icu,
+        ) = astuple_stats(stats)
+    return changed_dates
+
+
+class DailyStatsRefresh:
+    """Merge the source rows changed since the last refresh into daily_stats.
+
+    Inserts and updates of the source tables are logged in row_changes. An
+    incremental source is parsed from its lowest row changed after its
+    high-water mark, other sources and `full_sources` are parsed whole. The
+    table is rebuilt when the parse config of a source changed.
+
+    Each source is parsed by a call of `parse_source`, so that the sources
+    can be parsed concurrently or as soon as their data is downloaded.
+    `finish` then merges the parsed stats in one transaction. The
+    high-water mark of a source is the last row change logged before it was
+    parsed, so that rows changed while parsing are parsed again next time.
+    """
+
+    def __init__(
+        self,
+        cache_path: Path,
+        config: dict,
+        full_sources: Iterable[str] = (),
+        rebuild: bool = False,
+    ):
+        self.cache_path = cache_path
+        self.config = config
+        self.db_path = cache_path / 'db.sqlite3'
+        self.full_sources = set(full_sources)
+        self.sources = get_sources()
+        self.config_hashes = {
+            source.name: get_source_config_hash(config, source)
+            for source in self.sources
+        }
+        store = DailyStatsStore(self.db_path)
+        self.daily_stats_sources = store.list_sources()
+        store.rollback()
+        self.rebuild = rebuild or any(
+            name not in SOURCES
+            or daily_stats_source.config_hash != self.config_hashes[name]
+            for name, daily_stats_source in self.daily_stats_sources.items()
+        )
+        if self.rebuild:
+            self.daily_stats_sources = {}
+        self.high_water_marks: Dict[str, int] = {}
+        self.after_ids: Dict[str, int] = {}
+        self.stats_lists_by_source: Dict[str, List[PressReleaseStats]] = {}
+
+    def get_after_id(
+        self, store: DailyStatsStore, source: Source
+    ) -> Optional[int]:
+        """Return the id of the row after which to parse a source, or None
+        if its rows did not change."""
+        daily_stats_source = self.daily_stats_sources.get(source.name)
+        table_name = getattr(source.store, 'table_name', None)
+        if (
+            not daily_stats_source
+            or not table_name
+            or source.name in self.full_sources
+        ):
+            return 0
+        min_row_id = store.min_changed_row_id(
+            table_name, daily_stats_source.high_water_mark
+        )
+        if min_row_id is None:
+            return None
+        return min_row_id - 1
+
+    def parse_source(
+        self, source: Source, **kwargs
+    ) -> List[PressReleaseStats]:
+        """Parse the changed rows of a source and return their stats."""
+        store = DailyStatsStore(self.db_path)
+        try:
+            self.high_water_marks[source.name] = store.max_change_id()
+            after_id = self.get_after_id(store, source)
+        finally:
+            # Don't keep the snapshot of this thread's session.
+            store.rollback()
+        if after_id is None:
+            logger.info('No changes of %s', source.name)
+            return []
+        self.after_ids[source.name] = after_id
+        stats_list = source.parse(
+            self.cache_path, self.config, after_id=after_id, **kwargs
+        )
+        self.stats_lists_by_source[source.name] = stats_list
+        return stats_list
+
+    def finish(self) -> Set[datetime.date]:
+        """Merge the parsed sources and return the dates whose stats
+        changed."""
+        store = DailyStatsStore(self.db_path)
+        changed_dates: Set[datetime.date] = set()
+        try:
+            # Before clearing, so that readers see the rebuilt rows as new.
+            revision = store.max_revision() + 1
+            if self.rebuild:
+                logger.info('Rebuilding daily stats')
+                store.clear()
+            for source in self.sources:
+                if source.name in self.stats_lists_by_source:
+                    changed_dates |= merge_daily_stats(
+                        store,
+                        source,
+                        self.stats_lists_by_source[source.name],
+                        revision,
+                    )
+                if source.name in self.high_water_marks:
+                    store.set_source(
+                        source.name,
+                        self.high_water_marks[source.name],
+                        self.config_hashes[source.name],
+                    )
+            store.prune_changes()
+            store.commit()
+        except BaseException:
+            store.rollback()
+            raise
+        logger.info(
+            'Refreshed daily stats from %s',
+            ', '.join(
+                f'{name} rows > {after_id}'
+                for name, after_id in self.after_ids.items()
+            )
+            or 'no changes',
+        )
+        return changed_dates
+
+
+def refresh_daily_stats(
+    cache_path: Path,
+    config: dict,
+    full_sources: Iterable[str] = (),
+    source_kwargs: Optional[Dict[str, dict]] = None,
+    rebuild: bool = False,
+) -> Set[datetime.date]:
+    """Parse the changed rows of all sources concurrently and merge them into
+    daily_stats, see `DailyStatsRefresh`. Return the dates whose stats
+    changed."""
+    daily_stats_refresh = DailyStatsRefresh(
+        cache_path, config, full_sources=full_sources, rebuild=rebuild
     )
+    source_kwargs = source_kwargs or {}
+    with ThreadPoolExecutor(
+        max_workers=max(len(daily_stats_refresh.sources), 1)
+    ) as executor:
+        futures = [
+            executor.submit(
+                daily_stats_refresh.parse_source,
+                source,
+                **source_kwargs.get(source.name, {}),
+            )
+            for source in daily_stats_refresh.sources
+        ]
+        for future in futures:
+            future.result()
+    return daily_stats_refresh.finish()
+
+
+def iter_daily_stats(db_path: Path) -> Iterator[PressReleaseStats]:
+    """Yield the daily stats in the order in which write_csv writes them."""
+    for row in DailyStatsStore(db_path).stream(
+        {name: source.priority for name, source in SOURCES.items()}
+    ):
+        yield PressReleaseStats(*row)
+
+
+def list_daily_stats(db_path: Path) -> List[PressReleaseStats]:
+    return list(iter_daily_stats(db_path))
+
+
+def write_district_csv(
+    district_stats_list: Iterable[DistrictStats], path: Path
+):
+    district_stats_by_date_unique = {}
+    for district_stats in district_stats_list:
+        district_stats_by_date_unique[
+            (district_stats.date, district_stats.district)
+        ] = district_stats
+    with stage('output.write_csv'), path.open('w') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['date', 'district', 'cases', 'recovered'])
+        writer.writerows(
+            (
+                district_stats.date.isoformat(),
+                district_stats.district,
+                district_stats.cases,
+                ensure_str(district_stats.recovered),
+            )
+            for district_stats in district_stats_by_date_unique.values()
+        )
+    count('output.rows', len(district_stats_by_date_unique))
+
+
+PARTIAL_FIELDS = [
+    'source',
+    'timestamp',
+    'first_timestamp',
+    'cases',
+    'recovered',
+    'deaths',
+    'hospitalized',
+    'icu',
+]
+
+
+def write_partial(
+    stats_lists_by_source: Dict[str, List[PressReleaseStats]], path: Path
+):
+    """Write the stats of one partition for merging with `merge-stats`.
+
+    write_csv keeps the last stats per date and orders the dates by their
+    first appearance, iterating the sources in order and each source by
+    timestamp. To reproduce this across partitions, the last stats per
+    source and date are written together with the first timestamp of that
+    date in that source.
+    """
+    with stage('output.write_csv'), path.open('w') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(PARTIAL_FIELDS)
+        n = 0
+        for source, stats_list in stats_lists_by_source.items():
+            first_timestamps: Dict[datetime.date, datetime.datetime] = {}
+            last_stats: Dict[datetime.date, PressReleaseStats] = {}
+            for stats in stats_list:
+                first_timestamps.setdefault(stats.date, stats.timestamp)
+                last_stats[stats.date] = stats
+            for date, stats in last_stats.items():
+                writer.writerow(
+                    [
+                        source,
+                        stats.timestamp.isoformat(),
+                        first_timestamps[date].isoformat(),
+                        stats.cases,
+                        ensure_str(stats.recovered),
+                        ensure_str(stats.deaths),
+                        ensure_str(stats.hospitalized),
+                        ensure_str(stats.icu),
+                    ]
+                )
+            n += len(last_stats)
+    count('output.rows', n)
+
+
+def write_outputs(
+    stats_list: List[PressReleaseStats],
+    output_path: Path,
+    output_hosp_path: Optional[Path] = None,
+):
+    write_csv(stats_list, output_path, OUTPUT_FIELDS)
     if output_hosp_path:
-        write_csv(
-            stats_list,
-            output_hosp_path,
-            {
-                'date': lambda stats: stats.date.isoformat(),
-                'cases': lambda stats: stats.cases,
-                'recovered': lambda stats: ensure_str(stats.recovered),
-                'deaths': lambda stats: ensure_str(stats.deaths),
-                'hospitalized': lambda stats: ensure_str(stats.hospitalized),
-                'icu': lambda stats: ensure_str(stats.icu),
-            },
+        write_csv(stats_list, output_hosp_path, OUTPUT_HOSP_FIELDS)
+
+
+def main(
+    cache_path: Path,
+    config: dict,
+    output_path: Optional[Path] = None,
+    output_hosp_path: Optional[Path] = None,
+    output_districts_path: Optional[Path] = None,
+    partition: Optional[Partition] = None,
+    partial_output_path: Optional[Path] = None,
+    source_names: Optional[List[str]] = None,
+    rebuild: bool = False,
+    stream_format: Optional[str] = None,
+    stream: Optional[IO[str]] = None,
+    output_derived_path: Optional[Path] = None,
+):
+    """Parse the sources and write the outputs.
+
+    With `stream_format`, the merged stats are also written to `stream`,
+    standard output by default, one flushed record at a time. Merged
+    through the daily_stats table, they are read from it record by record.
+    """
+    from covid_berlin_scraper.derived_metrics import (
+        get_population, write_derived_csv,
+    )
+
+    district_stats_list: Optional[List[DistrictStats]] = (
+        [] if output_districts_path else None
+    )
+    source_kwargs = {
+        'district_tables': {'district_stats_list': district_stats_list}
+    }
+    if partition or partial_output_path or source_names:
+        # Stats of a part of the rows or sources are not merged into the
+        # daily_stats table.
+        stats_lists_by_source = parse_sources(
+            cache_path,
+            config,
+            get_sources(source_names),
+            source_kwargs=source_kwargs,
+            partition=partition,
+        )
+        if partial_output_path:
+            write_partial(stats_lists_by_source, partial_output_path)
+        stats_list = merge_sources(stats_lists_by_source)
+        if stream_format:
+            write_stream(
+                get_unique_stats(stats_list),
+                stream or sys.stdout,
+                stream_format,
+            )
+        if output_path:
+            write_outputs(stats_list, output_path, output_hosp_path)
+        if output_derived_path:
+            write_derived_csv(
+                stats_list, output_derived_path, get_population(config)
+            )
+    else:
+        # The districts output needs all district tables.
+        refresh_daily_stats(
+            cache_path,
+            config,
+            full_sources=['district_tables'] if output_districts_path else [],
+            source_kwargs=source_kwargs,
+            rebuild=rebuild,
         )
+        # All dates are final once the refresh is committed.
+        if stream_format:
+            write_stream(
+                iter_daily_stats(cache_path / 'db.sqlite3'),
+                stream or sys.stdout,
+                stream_format,
+            )
+        if output_path or output_derived_path:
+            stats_list = list_daily_stats(cache_path / 'db.sqlite3')
+        if output_path:
+            write_outputs(stats_list, output_path, output_hosp_path)
+        if output_derived_path:
+            write_derived_csv(
+                stats_list, output_derived_path, get_population(config)
+            )
+    if output_districts_path and district_stats_list is not None:
+        write_district_csv(district_stats_list, output_districts_path)
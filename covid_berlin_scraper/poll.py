@@ -0,0 +1,418 @@
+import datetime
+import logging
+import statistics
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import dateutil.tz
+
+from covid_berlin_scraper import (
+    download_dashboard, download_district_table, download_feed,
+)
+from covid_berlin_scraper.model import (
+    DailyStatsStore, DashboardStore, DistrictTableStore, PollEvent,
+    PollEventStore, PressReleasesStore,
+)
+
+logger = logging.getLogger(__name__)
+
+UTC = datetime.timezone.utc
+
+
+@dataclass
+class PollSource:
+    name: str
+    download: Callable[[Path, dict], None]
+    # Table whose inserts and updates are logged in row_changes.
+    table_name: str
+    # Publication times of the stored data, if the source records them.
+    list_published: Optional[
+        Callable[[Path, datetime.tzinfo], List[datetime.datetime]]
+    ] = None
+
+
+def list_press_releases_published(
+    db_path: Path, default_tz: datetime.tzinfo
+) -> List[datetime.datetime]:
+    # Feed dates are stored as naive local times.
+    _, timestamps = PressReleasesStore(db_path).list_keys()
+    return sorted(
+        timestamp.replace(tzinfo=default_tz) for timestamp in timestamps
+    )
+
+
+def list_district_tables_published(
+    db_path: Path, default_tz: datetime.tzinfo
+) -> List[datetime.datetime]:
+    # Last-Modified headers are in GMT and stored as naive UTC times.
+    return [
+        timestamp.replace(tzinfo=UTC)
+        for timestamp in DistrictTableStore(db_path).list_timestamps()
+    ]
+
+
+SOURCES = [
+    PollSource(
+        name='feed',
+        download=download_feed.main,
+        table_name=PressReleasesStore.table_name,
+        list_published=list_press_releases_published,
+    ),
+    PollSource(
+        name='district_table',
+        download=download_district_table.main,
+        table_name=DistrictTableStore.table_name,
+        list_published=list_district_tables_published,
+    ),
+    # The dashboard only states the date of its data, so its publication
+    # times are learned from the polls that found a new dashboard.
+    PollSource(
+        name='dashboard',
+        download=download_dashboard.main,
+        table_name=DashboardStore.table_name,
+    ),
+]
+
+
+@dataclass
+class PollPolicy:
+    """When to poll a source next, given when it usually publishes.
+
+    Publication windows are clusters of the minutes of the day at which the
+    source published in the past, widened by `margin`. Inside a window the
+    source is polled every `dense_interval`, outside every
+    `sparse_interval`, but never past the start of the next window. Once
+    the source published on a day, it is polled sparsely until the next day.
+    Without any windows, it is polled every `default_interval`.
+    """
+
+    windows: Sequence[Tuple[int, int]]
+    dense_interval: datetime.timedelta = datetime.timedelta(minutes=2)
+    sparse_interval: datetime.timedelta = datetime.timedelta(hours=1)
+    default_interval: datetime.timedelta = datetime.timedelta(minutes=15)
+    tz: datetime.tzinfo = UTC
+
+    def next_poll(
+        self,
+        now: datetime.datetime,
+        last_published: Optional[datetime.datetime] = None,
+    ) -> datetime.datetime:
+        if not self.windows:
+            return now + self.default_interval
+        local_now = now.astimezone(self.tz)
+        minute = local_now.hour * 60 + local_now.minute
+        published_today = (
+            last_published is not None
+            and last_published.astimezone(self.tz).date() == local_now.date()
+        )
+        if not published_today and any(
+            start <= minute <= end for start, end in self.windows
+        ):
+            return now + self.dense_interval
+        next_starts = [
+            (
+                start - minute
+                if start > minute and not published_today
+                else start - minute + 24 * 60
+            )
+            for start, _ in self.windows
+        ]
+        until_window = datetime.timedelta(
+            minutes=min(next_starts)
+        ) - datetime.timedelta(seconds=local_now.second)
+        return now + max(
+            min(self.sparse_interval, until_window), self.dense_interval
+        )
+
+
+def learn_windows(
+    published: Iterable[datetime.datetime],
+    tz: datetime.tzinfo,
+    gap: int = 60,
+    margin: int = 15,
+    min_samples: int = 2,
+) -> List[Tuple[int, int]]:
+    """Cluster publication minutes of the day into windows.
+
+    Minutes less than `gap` apart belong to the same cluster. Clusters with
+    fewer than `min_samples` publications are ignored as outliers.
+    """
+    minutes = sorted(
+        dt.astimezone(tz).hour * 60 + dt.astimezone(tz).minute
+        for dt in published
+    )
+    clusters: List[List[int]] = []
+    for minute in minutes:
+        if clusters and minute - clusters[-1][-1] < gap:
+            clusters[-1].append(minute)
+        else:
+            clusters.append([minute])
+    return [
+        (max(cluster[0] - margin, 0), min(cluster[-1] + margin, 24 * 60 - 1))
+        for cluster in clusters
+        if len(cluster) >= min_samples
+    ]
+
+
+@dataclass
+class FreshnessReport:
+    name: str
+    requests: int
+    changes: int
+    latencies: List[float]
+
+    def format(self) -> str:
+        if self.latencies:
+            latency = (
+                f'{statistics.median(self.latencies) / 60:>10.1f} '
+                f'{max(self.latencies) / 60:>10.1f}'
+            )
+        else:
+            latency = f'{"-":>10} {"-":>10}'
+        return (
+            f'{self.name:<32} {self.requests:>8} {self.changes:>8} '
+            f'{latency}'
+        )
+
+
+REPORT_HEADER = (
+    f'{"":<32} {"requests":>8} {"changes":>8} '
+    f'{"median min":>10} {"max min":>10}'
+)
+
+
+def simulate(
+    name: str,
+    published: Sequence[datetime.datetime],
+    next_poll: Callable[
+        [datetime.datetime, Optional[datetime.datetime]], datetime.datetime
+    ],
+    start: datetime.datetime,
+    end: datetime.datetime,
+) -> FreshnessReport:
+    """Replay publications against a polling policy.
+
+    Each publication is detected by the first poll after it, so its
+    freshness latency is the time between the two.
+    """
+    published = sorted(dt for dt in published if start <= dt < end)
+    requests = 0
+    latencies = []
+    last_published: Optional[datetime.datetime] = None
+    i = 0
+    t = start
+    while t < end:
+        requests += 1
+        while i < len(published) and published[i] <= t:
+            latencies.append((t - published[i]).total_seconds())
+            last_published = published[i]
+            i += 1
+        t = next_poll(t, last_published)
+    return FreshnessReport(
+        name=name,
+        requests=requests,
+        changes=len(latencies),
+        latencies=latencies,
+    )
+
+
+def list_published(
+    source: PollSource,
+    db_path: Path,
+    default_tz: datetime.tzinfo,
+    poll_events: List[PollEvent],
+) -> List[datetime.datetime]:
+    if source.list_published:
+        return source.list_published(db_path, default_tz)
+    return sorted(
+        (poll_event.published_at or poll_event.polled_at).replace(tzinfo=UTC)
+        for poll_event in poll_events
+        if poll_event.source == source.name and poll_event.changed
+    )
+
+
+def create_policy(
+    published: Sequence[datetime.datetime],
+    default_tz: datetime.tzinfo,
+    history: datetime.timedelta,
+    now: datetime.datetime,
+    **policy_kwargs,
+) -> PollPolicy:
+    windows = learn_windows(
+        (dt for dt in published if now - history <= dt < now), default_tz
+    )
+    return PollPolicy(windows=windows, tz=default_tz, **policy_kwargs)
+
+
+def poll_source(
+    source: PollSource, cache_path: Path, config: dict
+) -> PollEvent:
+    """Download a source once and record whether it inserted or updated any
+    rows, for example a re-fetched dashboard of the same day with new
+    numbers."""
+    db_path = cache_path / 'db.sqlite3'
+    polled_at = datetime.datetime.now(UTC)
+    daily_stats_store = DailyStatsStore(db_path)
+    change_id = daily_stats_store.max_change_id()
+    daily_stats_store.rollback()
+    error = None
+    try:
+        source.download(cache_path, config)
+    except Exception as e:
+        logger.exception('Polling %s failed', source.name)
+        error = str(e)
+    changed = (
+        daily_stats_store.min_changed_row_id(source.table_name, change_id)
+        is not None
+    )
+    daily_stats_store.rollback()
+    published_at = None
+    if changed and source.list_published:
+        default_tz = get_default_tz(config)
+        published_at = max(source.list_published(db_path, default_tz))
+    return PollEvent(
+        source=source.name,
+        polled_at=polled_at.replace(tzinfo=None),
+        changed=changed,
+        published_at=(
+            published_at.astimezone(UTC).replace(tzinfo=None)
+            if published_at
+            else None
+        ),
+        error=error,
+    )
+
+
+def get_default_tz(config: dict) -> datetime.tzinfo:
+    default_tz = dateutil.tz.gettz(config['download_feed']['default_tz'])
+    if not default_tz:
+        raise Exception('Invalid time zone')
+    return default_tz
+
+
+def format_report(
+    cache_path: Path,
+    config: dict,
+    history: datetime.timedelta,
+    fixed_interval: datetime.timedelta,
+    **policy_kwargs,
+) -> str:
+    """Compare freshness latency and requests of the recorded polls and of
+    the adaptive and fixed-interval policies replayed over the history.
+
+    The adaptive policy for each simulated day is learned only from the
+    publications before it.
+    """
+    db_path = cache_path / 'db.sqlite3'
+    default_tz = get_default_tz(config)
+    poll_events = list(PollEventStore(db_path).list())
+    now = datetime.datetime.now(UTC)
+    start = now - history
+    lines = [REPORT_HEADER]
+    for source in SOURCES:
+        source_poll_events = [
+            poll_event
+            for poll_event in poll_events
+            if poll_event.source == source.name
+        ]
+        lines.append(
+            FreshnessReport(
+                name=f'{source.name} recorded',
+                requests=len(source_poll_events),
+                changes=sum(
+                    1
+                    for poll_event in source_poll_events
+                    if poll_event.changed
+                ),
+                latencies=[
+                    (
+                        poll_event.polled_at - poll_event.published_at
+                    ).total_seconds()
+                    for poll_event in source_poll_events
+                    if poll_event.changed and poll_event.published_at
+                ],
+            ).format()
+        )
+        published = list_published(source, db_path, default_tz, poll_events)
+        if not published:
+            continue
+        policies: Dict[datetime.date, PollPolicy] = {}
+
+        def next_adaptive_poll(
+            t: datetime.datetime,
+            last_published: Optional[datetime.datetime],
+        ) -> datetime.datetime:
+            day = t.astimezone(default_tz).date()
+            if day not in policies:
+                policies[day] = create_policy(
+                    published, default_tz, history, t, **policy_kwargs
+                )
+            return policies[day].next_poll(t, last_published)
+
+        lines.append(
+            simulate(
+                f'{source.name} adaptive',
+                published,
+                next_adaptive_poll,
+                start,
+                now,
+            ).format()
+        )
+        lines.append(
+            simulate(
+                f'{source.name} every {fixed_interval}',
+                published,
+                lambda t, last_published: t + fixed_interval,
+                start,
+                now,
+            ).format()
+        )
+    return '\n'.join(lines)
+
+
+def main(
+    cache_path: Path,
+    config: dict,
+    history: datetime.timedelta = datetime.timedelta(days=28),
+    max_polls: Optional[int] = None,
+    on_poll: Optional[Callable[[PollEvent], None]] = None,
+    **policy_kwargs,
+):
+    db_path = cache_path / 'db.sqlite3'
+    default_tz = get_default_tz(config)
+    poll_event_store = PollEventStore(db_path)
+    now = datetime.datetime.now(UTC)
+    next_polls = {source.name: now for source in SOURCES}
+    n_polls = 0
+    while max_polls is None or n_polls < max_polls:
+        source = min(SOURCES, key=lambda source: next_polls[source.name])
+        wait = (
+            next_polls[source.name] - datetime.datetime.now(UTC)
+        ).total_seconds()
+        if wait > 0:
+            logger.info('Next poll of %s in %.0fs', source.name, wait)
+            time.sleep(wait)
+        poll_event = poll_source(source, cache_path, config)
+        poll_event_store.append(poll_event)
+        n_polls += 1
+        if on_poll:
+            on_poll(poll_event)
+        now = poll_event.polled_at.replace(tzinfo=UTC)
+        published = list_published(
+            source, db_path, default_tz, list(poll_event_store.list())
+        )
+        policy = create_policy(
+            published, default_tz, history, now, **policy_kwargs
+        )
+        next_polls[source.name] = policy.next_poll(
+            now, published[-1] if published else None
+        )
+        logger.info(
+            'Polled %s: %s, windows %s, next poll at %s',
+            source.name,
+            'changed' if poll_event.changed else 'unchanged',
+            policy.windows,
+            next_polls[source.name].astimezone(default_tz).isoformat(),
+        )
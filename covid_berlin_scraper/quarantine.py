@@ -0,0 +1,174 @@
+import datetime
+import hashlib
+import io
+import json
+import logging
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Set, Union
+
+from covid_berlin_scraper.model import (
+    DailyStatsStore, ParseFailure, ParseFailureStore,
+)
+from covid_berlin_scraper.utils.profile_utils import count
+
+logger = logging.getLogger(__name__)
+
+# Config section that determines the result of parsing each source.
+CONFIG_SECTIONS = {
+    'press_releases': 'parse_press_release',
+    'district_tables': 'parse_district_table',
+    'district_rows': 'parse_district_table',
+    'dashboards': 'parse_dashboard',
+}
+# Keys of the config sections that don't affect the result.
+IGNORED_CONFIG_KEYS = {'pipeline'}
+
+
+def get_content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def read_content_hash(
+    f: Union[BinaryIO, io.RawIOBase], chunk_size: int = 64 * 1024
+) -> str:
+    """Hash content read in chunks, like `get_content_hash`."""
+    content_hash = hashlib.sha256()
+    for chunk in iter(lambda: f.read(chunk_size), b''):
+        content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+class HashingReader(io.RawIOBase):
+    """Read a file and hash the bytes read, like `get_content_hash`."""
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self._hash = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.f.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        self._hash.update(data)
+        return n
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def get_config_hash(config: dict, source: str) -> str:
+    section = {
+        k: v
+        for k, v in config[CONFIG_SECTIONS[source]].items()
+        if k not in IGNORED_CONFIG_KEYS
+    }
+    return hashlib.sha256(
+        json.dumps(section, sort_keys=True).encode()
+    ).hexdigest()
+
+
+class Quarantine:
+    """Items of one source that failed to parse with the current config.
+
+    The failures are loaded once, so checking an item is a dict lookup that
+    is safe to do from several threads. Recording and clearing failures
+    writes to the database and must happen on one thread.
+    """
+
+    def __init__(self, db_path: Path, source: str, config_hash: str):
+        self.store = ParseFailureStore(db_path)
+        self.source = source
+        self.config_hash = config_hash
+        self.content_hashes: Dict[int, str] = {}
+        self.failed_ids: Set[int] = set()
+        for parse_failure in self.store.list(source):
+            self.failed_ids.add(parse_failure.source_id)
+            if parse_failure.config_hash == config_hash:
+                self.content_hashes[parse_failure.source_id] = (
+                    parse_failure.content_hash
+                )
+
+    @classmethod
+    def from_config(
+        cls, db_path: Path, config: dict, source: str
+    ) -> 'Quarantine':
+        return cls(db_path, source, get_config_hash(config, source))
+
+    def has_failed(self, source_id: int) -> bool:
+        """Whether an item failed with the current config, whatever its
+        content was."""
+        return source_id in self.content_hashes
+
+    def is_quarantined(self, source_id: int, content_hash: str) -> bool:
+        if self.content_hashes.get(source_id) != content_hash:
+            return False
+        count(f'parse.quarantined.{self.source}')
+        return True
+
+    def add(self, source_id: int, content_hash: str, error: Exception):
+        self.store.save(
+            ParseFailure(
+                source=self.source,
+                source_id=source_id,
+                content_hash=content_hash,
+                config_hash=self.config_hash,
+                error=str(error),
+                failed_at=datetime.datetime.now(datetime.timezone.utc).replace(
+                    tzinfo=None
+                ),
+            )
+        )
+        self.content_hashes[source_id] = content_hash
+        self.failed_ids.add(source_id)
+
+    def remove(self, source_id: int):
+        """Forget an earlier failure of an item that parsed now."""
+        if source_id in self.failed_ids:
+            logger.info(
+                'Removing %s %d from quarantine', self.source, source_id
+            )
+            self.store.delete(self.source, source_id)
+            self.failed_ids.discard(source_id)
+            self.content_hashes.pop(source_id, None)
+
+
+def format_failures(
+    db_path: Path, config: dict, source: Optional[str] = None
+) -> str:
+    config_hashes = {
+        name: get_config_hash(config, name) for name in CONFIG_SECTIONS
+    }
+    lines = [f'{"source":<16} {"id":>8} {"failed at":<19} {"config":<8} error']
+    for parse_failure in ParseFailureStore(db_path).list(source):
+        # A failure with an outdated config hash is retried on the next run.
+        status = (
+            'current'
+            if config_hashes.get(parse_failure.source)
+            == parse_failure.config_hash
+            else 'changed'
+        )
+        lines.append(
+            f'{parse_failure.source:<16} {parse_failure.source_id:>8} '
+            f'{parse_failure.failed_at:%Y-%m-%d %H:%M:%S} {status:<8} '
+            f'{parse_failure.error}'
+        )
+    return '\n'.join(lines)
+
+
+def main(
+    cache_path: Path,
+    config: dict,
+    clear: bool = False,
+    source: Optional[str] = None,
+):
+    db_path = cache_path / 'db.sqlite3'
+    if clear:
+        n = ParseFailureStore(db_path).delete(source)
+        # Parse the retried items again on the next refresh.
+        DailyStatsStore(db_path).delete_sources(source)
+        logger.info('Removed %d items from quarantine', n)
+        return
+    print(format_failures(db_path, config, source))
@@ -0,0 +1,151 @@
+import logging
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from covid_berlin_scraper.utils.http_replay_utils import (
+    HttpArchive, RecordedResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 16 * 1024
+
+# Headers that describe the recorded connection rather than the response.
+HOP_BY_HOP_HEADERS = {
+    'connection',
+    'content-length',
+    'keep-alive',
+    'transfer-encoding',
+}
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Serve recorded responses with simulated network conditions.
+
+    A request for `/<host><path>?<query>` is answered with the responses
+    recorded for that URL, in the recorded order and starting over once
+    they are exhausted. Each response is delayed by `latency` seconds and
+    its body sent at most at `bandwidth` bytes per second. With probability
+    `error_rate` the server answers 503 instead and with probability
+    `reset_rate` it closes the connection without answering. The random
+    choices are reproducible with `seed`.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        archive: HttpArchive,
+        latency: float = 0.0,
+        bandwidth: Optional[float] = None,
+        error_rate: float = 0.0,
+        reset_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(address, ReplayRequestHandler)
+        self.responses_by_key = archive.by_key()
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.reset_rate = reset_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next: Dict[str, int] = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{str(host)}:{port}'
+
+    def next_response(self, key: str) -> Optional[RecordedResponse]:
+        responses = self.responses_by_key.get(key)
+        if not responses:
+            return None
+        with self._lock:
+            i = self._next.get(key, 0)
+            self._next[key] = i + 1
+        return responses[i % len(responses)]
+
+    def draw_fault(self) -> Optional[str]:
+        with self._lock:
+            x = self._random.random()
+        if x < self.reset_rate:
+            return 'reset'
+        if x < self.reset_rate + self.error_rate:
+            return 'error'
+        return None
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    server: ReplayServer
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        response = self.server.next_response(self.path.lstrip('/'))
+        if not response:
+            self.send_error(HTTPStatus.NOT_FOUND, 'Not recorded')
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        fault = self.server.draw_fault()
+        if fault == 'reset':
+            self.close_connection = True
+            return
+        if fault == 'error':
+            self.send_error(HTTPStatus.SERVICE_UNAVAILABLE, 'Injected error')
+            return
+        self.send_response(response.status, response.reason)
+        for name, value in response.headers:
+            if name.lower() not in HOP_BY_HOP_HEADERS:
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(response.body)))
+        self.end_headers()
+        self.send_body(response.body)
+
+    def send_body(self, body: bytes):
+        if not self.server.bandwidth:
+            self.wfile.write(body)
+            return
+        start = time.perf_counter()
+        for i in range(0, len(body), CHUNK_SIZE):
+            end = i + CHUNK_SIZE
+            self.wfile.write(body[i:end])
+            wait = (
+                start
+                + min(end, len(body)) / self.server.bandwidth
+                - time.perf_counter()
+            )
+            if wait > 0:
+                time.sleep(wait)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def main(
+    archive_path: Path,
+    address: str = '127.0.0.1',
+    port: int = 8081,
+    **server_kwargs,
+):
+    archive = HttpArchive.read(archive_path)
+    server = ReplayServer((address, port), archive, **server_kwargs)
+    logger.info(
+        'Replaying %d responses of %d URLs on %s',
+        len(archive.responses),
+        len(server.responses_by_key),
+        server.url,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,270 @@
+import functools
+import logging
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ThreadPoolExecutor, wait,
+)
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from covid_berlin_scraper import (
+    download_archives, download_dashboard, download_district_table,
+    download_feed, parse_press_releases,
+)
+from covid_berlin_scraper.writer import DatabaseWriter, get_writer_kwargs
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    dependencies: Sequence[str] = ()
+
+
+@dataclass
+class JobResult:
+    name: str
+    start: float
+    end: float
+    value: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class Schedule:
+    results: Dict[str, JobResult] = field(default_factory=dict)
+    start: float = field(default_factory=time.perf_counter)
+    end: float = 0.0
+
+    @property
+    def failed(self) -> List[JobResult]:
+        return [result for result in self.results.values() if result.error]
+
+    def format_report(self) -> str:
+        lines = [f'{"job":<32} {"start s":>8} {"duration s":>11} {"status"}']
+        for result in sorted(
+            self.results.values(), key=lambda result: result.start
+        ):
+            status = f'failed: {result.error}' if result.error else 'ok'
+            lines.append(
+                f'{result.name:<32} {result.start - self.start:>8.3f} '
+                f'{result.duration:>11.3f} {status}'
+            )
+        lines.append(f'{"total":<32} {"":>8} {self.end - self.start:>11.3f}')
+        return '\n'.join(lines)
+
+
+def run_job(job: Job, values: Dict[str, Any]) -> JobResult:
+    logger.info('Starting job %s', job.name)
+    start = time.perf_counter()
+    try:
+        value = job.func(values)
+    except Exception as e:
+        logger.exception('Job %s failed', job.name)
+        return JobResult(
+            name=job.name, start=start, end=time.perf_counter(), error=e
+        )
+    end = time.perf_counter()
+    logger.info('Finished job %s in %.3fs', job.name, end - start)
+    return JobResult(name=job.name, start=start, end=end, value=value)
+
+
+def run_jobs(jobs: Sequence[Job], max_workers: int) -> Schedule:
+    """Run jobs concurrently, each as soon as all its dependencies finished.
+
+    A job receives the return values of its dependencies keyed by job name.
+    Dependencies only order the jobs: a job still runs when one of its
+    dependencies failed, with that dependency's value set to None, because
+    the inputs from previous runs are still in the database.
+    """
+    jobs_by_name = {job.name: job for job in jobs}
+    for job in jobs:
+        for dependency in job.dependencies:
+            if dependency not in jobs_by_name:
+                raise Exception(
+                    f'Job {job.name} depends on unknown job {dependency}'
+                )
+    schedule = Schedule()
+    pending = dict(jobs_by_name)
+    running: Dict[Future, str] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for name, job in list(pending.items()):
+                if all(
+                    dependency in schedule.results
+                    for dependency in job.dependencies
+                ):
+                    values = {
+                        dependency: schedule.results[dependency].value
+                        for dependency in job.dependencies
+                    }
+                    running[executor.submit(run_job, job, values)] = name
+                    del pending[name]
+            if not running:
+                raise Exception(
+                    'Circular job dependencies: {}'.format(
+                        ', '.join(pending.keys())
+                    )
+                )
+            done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                schedule.results[result.name] = result
+                del running[future]
+    schedule.end = time.perf_counter()
+    return schedule
+
+
+def get_parse_job_name(source: parse_press_releases.Source) -> str:
+    return 'parse-' + source.name.replace('_', '-')
+
+
+def parse_source(
+    daily_stats_refresh: parse_press_releases.DailyStatsRefresh,
+    source: parse_press_releases.Source,
+    values: Dict[str, Any],
+    **kwargs,
+) -> list:
+    return daily_stats_refresh.parse_source(source, **kwargs)
+
+
+def write_output(
+    values: Dict[str, Any],
+    daily_stats_refresh: parse_press_releases.DailyStatsRefresh,
+    output_path: Path,
+    output_hosp_path: Optional[Path] = None,
+    output_districts_path: Optional[Path] = None,
+    district_stats_list: Optional[list] = None,
+):
+    """Merge the parsed sources into daily_stats and write the outputs from
+    it, like parse-press-releases."""
+    for source in daily_stats_refresh.sources:
+        name = get_parse_job_name(source)
+        if values[name] is None:
+            raise Exception(f'Not writing output because {name} failed')
+    daily_stats_refresh.finish()
+    parse_press_releases.write_outputs(
+        parse_press_releases.list_daily_stats(daily_stats_refresh.db_path),
+        output_path,
+        output_hosp_path,
+    )
+    if output_districts_path and district_stats_list is not None:
+        parse_press_releases.write_district_csv(
+            district_stats_list, output_districts_path
+        )
+
+
+def create_jobs(
+    cache_path: Path,
+    config: dict,
+    output_path: Path,
+    output_hosp_path: Optional[Path] = None,
+    output_districts_path: Optional[Path] = None,
+    archives: bool = False,
+    writer: Optional[DatabaseWriter] = None,
+) -> List[Job]:
+    district_stats_list: Optional[list] = [] if output_districts_path else None
+    jobs = [
+        Job(
+            'download-feed',
+            lambda values: download_feed.main(cache_path, config, writer),
+        ),
+        Job(
+            'download-district-table',
+            lambda values: download_district_table.main(
+                cache_path, config, writer
+            ),
+        ),
+        Job(
+            'download-dashboard',
+            lambda values: download_dashboard.main(cache_path, config, writer),
+        ),
+    ]
+    if archives:
+        jobs.append(
+            Job(
+                'download-archives',
+                lambda values: download_archives.main(
+                    cache_path, config, writer
+                ),
+            )
+        )
+    download_job_names = {job.name for job in jobs}
+    # The districts output needs all district tables.
+    daily_stats_refresh = parse_press_releases.DailyStatsRefresh(
+        cache_path,
+        config,
+        full_sources=['district_tables'] if output_districts_path else [],
+    )
+    sources = daily_stats_refresh.sources
+    source_kwargs: Dict[str, Dict[str, Any]] = {
+        'district_tables': {'district_stats_list': district_stats_list}
+    }
+    for source in sources:
+        jobs.append(
+            Job(
+                get_parse_job_name(source),
+                functools.partial(
+                    parse_source,
+                    daily_stats_refresh,
+                    source,
+                    **source_kwargs.get(source.name, {}),
+                ),
+                [
+                    name
+                    for name in source.dependencies
+                    if name in download_job_names
+                ],
+            )
+        )
+    jobs.append(
+        Job(
+            'write-output',
+            lambda values: write_output(
+                values,
+                daily_stats_refresh,
+                output_path,
+                output_hosp_path,
+                output_districts_path=output_districts_path,
+                district_stats_list=district_stats_list,
+            ),
+            [get_parse_job_name(source) for source in sources],
+        )
+    )
+    return jobs
+
+
+def main(
+    cache_path: Path,
+    config: dict,
+    output_path: Path,
+    output_hosp_path: Optional[Path] = None,
+    output_districts_path: Optional[Path] = None,
+    archives: bool = False,
+    max_workers: int = 4,
+) -> Schedule:
+    """Run all downloads and parsers.
+
+    The downloads save their records through one `DatabaseWriter`, so that
+    they do not contend for SQLite's write lock.
+    """
+    with DatabaseWriter(
+        cache_path / 'db.sqlite3', **get_writer_kwargs(config)
+    ) as writer:
+        jobs = create_jobs(
+            cache_path,
+            config,
+            output_path,
+            output_hosp_path=output_hosp_path,
+            output_districts_path=output_districts_path,
+            archives=archives,
+            writer=writer,
+        )
+        return run_jobs(jobs, max_workers=max_workers)
@@ -0,0 +1,275 @@
+import bisect
+import datetime
+import gzip
+import json
+import logging
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from covid_berlin_scraper.model import DailyStatsStore
+from covid_berlin_scraper.parse_press_releases import (
+    OUTPUT_HOSP_FIELDS, PressReleaseStats, astuple_daily_stats, stats_asdict,
+)
+from covid_berlin_scraper.utils.metrics_utils import (
+    MetricsRegistry, get_registry,
+)
+
+logger = logging.getLogger(__name__)
+
+GZIP_MIN_SIZE = 1024
+# Route labels of the request metrics by path; other paths are 'unmatched'.
+ROUTES = {'/stats': 'stats', '/metrics': 'metrics'}
+
+
+class StatsIndex:
+    """Merged statistics sorted by date, with pre-serialized rows.
+
+    Range queries are answered by bisecting the list of dates and joining
+    the pre-serialized JSON or CSV rows of the resulting slice.
+    """
+
+    def __init__(
+        self,
+        stats_by_date: Dict[datetime.date, PressReleaseStats],
+        version: str,
+    ):
+        self.version = version
+        self.dates = sorted(stats_by_date.keys())
+        stats_list = [stats_by_date[date] for date in self.dates]
+        self.json_rows = [
+            json.dumps(stats_asdict(stats)) for stats in stats_list
+        ]
+        self.csv_header = ','.join(OUTPUT_HOSP_FIELDS.keys())
+        self.csv_rows = [
+            ','.join(
+                str(v) for v in stats.astuple(OUTPUT_HOSP_FIELDS.values())
+            )
+            for stats in stats_list
+        ]
+
+    def find(
+        self,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+    ) -> slice:
+        i = bisect.bisect_left(self.dates, start) if start else 0
+        j = bisect.bisect_right(self.dates, end) if end else len(self.dates)
+        return slice(i, j)
+
+    def render_json(self, s: slice) -> str:
+        return '[' + ','.join(self.json_rows[s]) + ']'
+
+    def render_csv(self, s: slice) -> str:
+        return '\n'.join([self.csv_header] + self.csv_rows[s]) + '\n'
+
+
+class StatsLoader:
+    """Keep the merged series up to date with the daily_stats table.
+
+    The table is only read; the commands that download or parse the sources
+    merge their changes into it. Each refresh loads the dates changed in a
+    later revision than the last loaded one. The series is loaded whole
+    again when dates were removed, which only happens when the table was
+    rebuilt.
+    """
+
+    def __init__(self, cache_path: Path):
+        self.db_path = cache_path / 'db.sqlite3'
+        self.stats_by_date: Dict[datetime.date, PressReleaseStats] = {}
+        self.revision = -1
+        self.n_refreshes = 0
+
+    def refresh(self) -> bool:
+        store = DailyStatsStore(self.db_path)
+        try:
+            daily_stats_list = store.list_since(self.revision)
+            dates = self.stats_by_date.keys() | {
+                daily_stats.date for daily_stats in daily_stats_list
+            }
+            reload = len(dates) != store.count()
+            if reload:
+                daily_stats_list = store.list_since(-1)
+        finally:
+            # Don't keep the snapshot until the next refresh.
+            store.rollback()
+        if reload:
+            self.stats_by_date = {}
+        elif not daily_stats_list:
+            return False
+        for daily_stats in daily_stats_list:
+            self.stats_by_date[daily_stats.date] = PressReleaseStats(
+                daily_stats.timestamp, *astuple_daily_stats(daily_stats)
+            )
+            self.revision = max(self.revision, daily_stats.revision)
+        logger.info('Loaded stats of %d dates', len(daily_stats_list))
+        return True
+
+    def build_index(self) -> StatsIndex:
+        self.n_refreshes += 1
+        return StatsIndex(
+            self.stats_by_date,
+            version=f'{int(time.time()):x}-{self.n_refreshes}',
+        )
+
+
+def get_db_signature(db_path: Path) -> tuple:
+    signature: List[Optional[Tuple[int, int]]] = []
+    for path in (db_path, db_path.with_name(db_path.name + '-wal')):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            signature.append(None)
+        else:
+            signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class StatsServer(ThreadingHTTPServer):
+    daemon_threads = True
+    index: StatsIndex
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        loader: StatsLoader,
+        registry: MetricsRegistry,
+    ):
+        super().__init__(address, StatsRequestHandler)
+        self.loader = loader
+        self.registry = registry
+        self.request_duration = registry.histogram(
+            'api_request_duration_seconds',
+            'API request latency',
+            buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.1),
+        )
+        self.loader.refresh()
+        self.index = self.loader.build_index()
+        self._db_signature = get_db_signature(loader.db_path)
+
+    def refresh_if_changed(self):
+        db_signature = get_db_signature(self.loader.db_path)
+        if db_signature == self._db_signature:
+            return
+        self._db_signature = db_signature
+        if self.loader.refresh():
+            self.index = self.loader.build_index()
+            logger.info(
+                'Refreshed index to version %s with %d dates',
+                self.index.version,
+                len(self.index.dates),
+            )
+
+    def refresh_forever(self, interval: float):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh_if_changed()
+            except Exception:
+                logger.exception('Failed to refresh the index')
+
+
+def parse_date_param(
+    params: Dict[str, List[str]], name: str
+) -> Optional[datetime.date]:
+    values = params.get(name)
+    if not values:
+        return None
+    return datetime.date.fromisoformat(values[0])
+
+
+class StatsRequestHandler(BaseHTTPRequestHandler):
+    server: StatsServer
+
+    def do_GET(self):
+        start = time.perf_counter()
+        route = ROUTES.get(urlsplit(self.path).path, 'unmatched')
+        status = self.handle_get()
+        self.server.request_duration.observe(
+            time.perf_counter() - start, route=route, status=str(int(status))
+        )
+
+    def handle_get(self) -> HTTPStatus:
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        if url.path == '/metrics':
+            return self.send_body(
+                self.server.registry.render().encode(),
+                'text/plain; version=0.0.4; charset=utf-8',
+            )
+        if url.path != '/stats':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return HTTPStatus.NOT_FOUND
+        try:
+            start = parse_date_param(params, 'from')
+            end = parse_date_param(params, 'to')
+        except ValueError:
+            self.send_error(HTTPStatus.BAD_REQUEST, 'Invalid date')
+            return HTTPStatus.BAD_REQUEST
+        fmt = params.get('format', ['json'])[0]
+        if fmt not in ('json', 'csv'):
+            self.send_error(HTTPStatus.BAD_REQUEST, 'Invalid format')
+            return HTTPStatus.BAD_REQUEST
+        index = self.server.index
+        s = index.find(start, end)
+        etag = f'"{index.version}-{s.start}-{s.stop}-{fmt}"'
+        if etag in self.headers.get('If-None-Match', ''):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return HTTPStatus.NOT_MODIFIED
+        if fmt == 'csv':
+            body = index.render_csv(s)
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            body = index.render_json(s)
+            content_type = 'application/json'
+        return self.send_body(body.encode(), content_type, etag)
+
+    def send_body(
+        self, body: bytes, content_type: str, etag: Optional[str] = None
+    ) -> HTTPStatus:
+        gzipped = len(body) >= GZIP_MIN_SIZE and 'gzip' in self.headers.get(
+            'Accept-Encoding', ''
+        )
+        if gzipped:
+            body = gzip.compress(body, compresslevel=5)
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+        return HTTPStatus.OK
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def main(
+    cache_path: Path,
+    address: str = '127.0.0.1',
+    port: int = 8080,
+    refresh_interval: float = 60,
+):
+    server = StatsServer(
+        (address, port), StatsLoader(cache_path), get_registry()
+    )
+    threading.Thread(
+        target=server.refresh_forever, args=(refresh_interval,), daemon=True
+    ).start()
+    logger.info('Serving API on http://%s:%d/stats', address, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
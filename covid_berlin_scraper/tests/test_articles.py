@@ -0,0 +1,60 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from covid_berlin_scraper.articles import fetch_article, migrate_pages
+from covid_berlin_scraper.utils.http_utils import safe_filename
+
+URL = (
+    'https://www.berlin.de/sen/gpg/service/presse/2020/pressemitteilung.1.php'
+)
+PAGE = '''<html><head><meta charset="iso-8859-1"></head><body>
+<div id="navigation">Startseite</div>
+<div id="layout-grid__area--maincontent"><p>Neukölln</p></div>
+</body></html>
+'''.encode('iso-8859-1')
+ARTICLE = '<div id="layout-grid__area--maincontent"><p>Neukölln</p></div>'
+
+
+class TestArticles(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.tmp_dir.name)
+        self.pages_path = self.cache_path / 'pages'
+        self.pages_path.mkdir()
+        (self.pages_path / safe_filename(URL)).write_bytes(PAGE)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_fetch_article_trims_cached_page(self):
+        article = fetch_article(
+            URL, self.cache_path, timeout=1, user_agent='test'
+        )
+        self.assertEqual(article.text, ARTICLE)
+        self.assertEqual(list(self.pages_path.iterdir()), [])
+        article = fetch_article(
+            URL, self.cache_path, timeout=1, user_agent='test'
+        )
+        self.assertEqual(article.text, ARTICLE)
+
+    def test_migrate_pages(self):
+        self.assertEqual(migrate_pages(self.cache_path), 1)
+        self.assertFalse(self.pages_path.exists())
+        article_path = self.cache_path / 'articles' / safe_filename(URL)
+        self.assertEqual(article_path.read_text(), ARTICLE)
+
+    def test_migrate_pages_keep_full_page(self):
+        migrate_pages(self.cache_path, keep_full_page=True)
+        self.assertEqual(
+            (self.pages_path / safe_filename(URL)).read_bytes(), PAGE
+        )
+        self.assertEqual(migrate_pages(self.cache_path), 0)
+        self.assertFalse(self.pages_path.exists())
+
+    def test_migrate_pages_skips_directories(self):
+        (self.pages_path / 'other').mkdir()
+        self.assertEqual(migrate_pages(self.cache_path), 1)
+        self.assertEqual(
+            list(self.pages_path.iterdir()), [self.pages_path / 'other']
+        )
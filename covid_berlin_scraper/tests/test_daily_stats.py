@@ -0,0 +1,128 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from covid_berlin_scraper.model import (
+    DailyStatsStore, DistrictTableStore, dispose_engines,
+)
+from covid_berlin_scraper.parse_press_releases import (
+    OUTPUT_FIELDS, SOURCES, list_daily_stats, main, merge_daily_stats,
+    write_csv,
+)
+from covid_berlin_scraper.tests.utils import (
+    create_district_table, create_stats, load_config,
+)
+from covid_berlin_scraper.utils.profile_utils import (
+    disable_profiler, enable_profiler,
+)
+
+
+class TestDailyStats(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.tmp_dir.name)
+        self.db_path = self.cache_path / 'db.sqlite3'
+        self.config = load_config()
+
+    def tearDown(self):
+        disable_profiler()
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def test_merge_daily_stats(self):
+        stats_lists_by_source = {
+            'press_releases': [
+                create_stats(2, 20),
+                create_stats(3, 25, hour=9),
+                create_stats(3, 30),
+                create_stats(5, 50),
+            ],
+            'district_tables': [
+                create_stats(1, 11),
+                create_stats(3, 31),
+                create_stats(4, 41),
+            ],
+            'dashboards': [create_stats(2, 22)],
+        }
+        write_csv(
+            [
+                stats
+                for stats_list in stats_lists_by_source.values()
+                for stats in stats_list
+            ],
+            self.cache_path / 'expected.csv',
+            OUTPUT_FIELDS,
+        )
+        store = DailyStatsStore(self.db_path)
+        # Merge in several refreshes, in the opposite order of the sources.
+        for i in range(2):
+            for name, stats_list in reversed(stats_lists_by_source.items()):
+                merge_daily_stats(store, SOURCES[name], stats_list[i::2])
+            store.commit()
+        write_csv(
+            list_daily_stats(self.db_path),
+            self.cache_path / 'merged.csv',
+            OUTPUT_FIELDS,
+        )
+        self.assertEqual(
+            (self.cache_path / 'merged.csv').read_text(),
+            (self.cache_path / 'expected.csv').read_text(),
+        )
+
+    def test_refresh_parses_changed_rows(self):
+        district_table_store = DistrictTableStore(self.db_path)
+        for day in range(1, 4):
+            district_table_store.append(create_district_table(day, day * 100))
+        output_path = self.cache_path / 'output.csv'
+        main(self.cache_path, self.config, output_path)
+        district_table_store.append(create_district_table(2, 250))
+        district_table_store.append(create_district_table(4, 400))
+        profiler = enable_profiler()
+        main(self.cache_path, self.config, output_path)
+        self.assertEqual(profiler.counters['parse.items.district_tables'], 3)
+        self.assertEqual(
+            output_path.read_text(),
+            'date,cases,recovered,deaths\n'
+            '2020-10-01,100,0,\n'
+            '2020-10-02,250,0,\n'
+            '2020-10-03,300,0,\n'
+            '2020-10-04,400,0,\n',
+        )
+        main(self.cache_path, self.config, output_path)
+        self.assertEqual(profiler.counters['parse.items.district_tables'], 3)
+
+    def test_main_stream(self):
+        district_table_store = DistrictTableStore(self.db_path)
+        for day in (2, 1):
+            district_table_store.append(create_district_table(day, day * 100))
+        output_hosp_path = self.cache_path / 'output_hosp.csv'
+        stream = io.StringIO()
+        main(
+            self.cache_path,
+            self.config,
+            self.cache_path / 'output.csv',
+            output_hosp_path,
+            stream_format='csv',
+            stream=stream,
+        )
+        self.assertEqual(stream.getvalue(), output_hosp_path.read_text())
+        stream = io.StringIO()
+        main(
+            self.cache_path, self.config, stream_format='ndjson', stream=stream
+        )
+        self.assertEqual(
+            [json.loads(line) for line in stream.getvalue().splitlines()],
+            [
+                {
+                    'date': f'2020-10-0{day}',
+                    'cases': day * 100,
+                    'recovered': 0,
+                    'deaths': None,
+                    'hospitalized': None,
+                    'icu': None,
+                }
+                for day in (1, 2)
+            ],
+        )
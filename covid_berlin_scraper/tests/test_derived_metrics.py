@@ -0,0 +1,56 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from covid_berlin_scraper.derived_metrics import (
+    compute_derived_metrics, write_derived_csv,
+)
+from covid_berlin_scraper.tests.utils import create_stats
+
+
+class TestDerivedMetrics(TestCase):
+    def test_compute_derived_metrics(self):
+        stats_list = [
+            create_stats(day, day * 10, deaths=day)
+            for day in range(1, 11)
+            if day != 5
+        ]
+        derived_metrics = compute_derived_metrics(stats_list, 1000)
+        self.assertEqual(len(derived_metrics.dates), 10)
+        self.assertEqual(
+            derived_metrics.new_cases,
+            [None, 10, 10, 10, None, None, 10, 10, 10, 10],
+        )
+        self.assertEqual(
+            derived_metrics.new_cases_7d,
+            [None] * 7 + [70, 70, 70],
+        )
+        self.assertEqual(derived_metrics.incidence_7d[-1], 7000.0)
+
+    def test_compute_derived_metrics_corrections_and_missing_deaths(self):
+        stats_list = [
+            create_stats(1, 100, deaths=1),
+            create_stats(2, 90),
+            create_stats(3, 120, deaths=3),
+            create_stats(3, 110, deaths=2),
+        ]
+        derived_metrics = compute_derived_metrics(stats_list, 100000)
+        self.assertEqual(derived_metrics.cases, [100, 90, 110])
+        self.assertEqual(derived_metrics.new_cases, [None, -10, 20])
+        self.assertEqual(derived_metrics.new_deaths, [None, None, None])
+
+    def test_write_derived_csv(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / 'derived.csv'
+            write_derived_csv(
+                [create_stats(1, 100), create_stats(3, 130, deaths=1)],
+                path,
+                100000,
+            )
+            self.assertEqual(
+                path.read_text(),
+                'date,cases,new_cases,new_cases_7d,incidence_7d,deaths,'
+                'new_deaths,new_deaths_7d\n'
+                '2020-10-01,100,,,,,,\n'
+                '2020-10-03,130,,,,1,,\n',
+            )
@@ -0,0 +1,99 @@
+import datetime
+from unittest import TestCase
+
+import dateutil.tz
+import regex
+
+from covid_berlin_scraper.download_feed import parse_feed
+
+FEED_TEMPLATE = '''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+<channel>
+<title>Pressemitteilungen</title>
+{items}
+</channel>
+</rss>
+'''
+ITEM_TEMPLATE = '''<item>
+<title>{title}</title>
+<link>https://www.berlin.de/presse/{n}</link>
+<pubDate>{date}</pubDate>
+</item>'''
+
+
+def create_feed(items: list, broken: bool = False) -> str:
+    feed_text = FEED_TEMPLATE.format(
+        items='\n'.join(
+            ITEM_TEMPLATE.format(n=n, title=title, date=date)
+            for n, (title, date) in enumerate(items)
+        )
+    )
+    if broken:
+        return feed_text.replace('</channel>', '<br></channel>')
+    return feed_text
+
+
+class TestDownloadFeed(TestCase):
+    def setUp(self):
+        self.default_tz = dateutil.tz.gettz('Europe/Berlin')
+        self.title_regex = regex.compile('^Coronavirus: .+ Fälle')
+        self.items = [
+            ('Coronavirus: 30 Fälle', 'Wed, 11 Mar 2020 16:00:00 +0100'),
+            ('Verkehr', 'Wed, 11 Mar 2020 12:00:00 +0100'),
+            ('Coronavirus: 20 Fälle', 'Tue, 10 Mar 2020 16:00:00 +0100'),
+            ('Coronavirus: 10 Fälle', 'Mon, 09 Mar 2020 16:00:00 +0100'),
+        ]
+
+    def test_parse_feed(self):
+        press_releases = list(
+            parse_feed(
+                create_feed(self.items), self.default_tz, self.title_regex
+            )
+        )
+        self.assertEqual(
+            [press_release.url for press_release in press_releases],
+            [
+                'https://www.berlin.de/presse/0',
+                'https://www.berlin.de/presse/2',
+                'https://www.berlin.de/presse/3',
+            ],
+        )
+        self.assertEqual(
+            press_releases[0].timestamp,
+            datetime.datetime(
+                2020,
+                3,
+                11,
+                16,
+                tzinfo=datetime.timezone(datetime.timedelta(hours=1)),
+            ),
+        )
+
+    def test_parse_feed_stops_at_known(self):
+        for known_urls, known_timestamps in (
+            ({'https://www.berlin.de/presse/2'}, set()),
+            (set(), {datetime.datetime(2020, 3, 10, 16)}),
+        ):
+            press_releases = list(
+                parse_feed(
+                    create_feed(self.items),
+                    self.default_tz,
+                    self.title_regex,
+                    known_urls=known_urls,
+                    known_timestamps=known_timestamps,
+                )
+            )
+            self.assertEqual(
+                [press_release.title for press_release in press_releases],
+                ['Coronavirus: 30 Fälle'],
+            )
+
+    def test_parse_feed_malformed(self):
+        press_releases = list(
+            parse_feed(
+                create_feed(self.items, broken=True),
+                self.default_tz,
+                self.title_regex,
+            )
+        )
+        self.assertEqual(len(press_releases), 3)
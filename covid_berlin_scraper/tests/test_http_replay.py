@@ -0,0 +1,96 @@
+import datetime
+import gzip
+import tempfile
+import threading
+from pathlib import Path
+from unittest import TestCase
+
+import requests
+
+from covid_berlin_scraper.download_district_table import (
+    download_district_table,
+)
+from covid_berlin_scraper.replay_server import ReplayServer
+from covid_berlin_scraper.utils.http_replay_utils import (
+    HttpArchive, RecordedResponse, RecordingAdapter, ReplayingAdapter,
+)
+from covid_berlin_scraper.utils.http_utils import (
+    mount_http_adapter, reset_http_session,
+)
+
+URL = 'https://www.berlin.de/lageso/bezirkstabelle.csv?v=1'
+CONTENT = 'Bezirk;Fallzahl\nBerlin;1234\n'
+
+
+def create_archive() -> HttpArchive:
+    return HttpArchive(
+        responses=[
+            RecordedResponse(
+                url=URL,
+                status=200,
+                reason='OK',
+                headers=[
+                    ('Content-Type', 'text/csv; charset=utf-8'),
+                    ('Content-Encoding', 'gzip'),
+                    ('Last-Modified', 'Fri, 01 May 2020 14:30:00 GMT'),
+                ],
+                body=gzip.compress(CONTENT.encode()),
+                recorded_at=datetime.datetime(2020, 5, 1, 15),
+            )
+        ]
+    )
+
+
+class TestHttpReplay(TestCase):
+    def start_server(self, **kwargs) -> ReplayServer:
+        server = ReplayServer(('127.0.0.1', 0), create_archive(), **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def tearDown(self):
+        reset_http_session()
+
+    def test_replay(self):
+        server = self.start_server()
+        mount_http_adapter(ReplayingAdapter(server.url))
+        district_table = download_district_table(
+            URL, timeout=5, user_agent='test'
+        )
+        self.assertEqual(district_table.content, CONTENT.encode())
+        self.assertEqual(district_table.charset, 'utf-8')
+        self.assertEqual(
+            district_table.timestamp,
+            datetime.datetime(
+                2020, 5, 1, 14, 30, tzinfo=datetime.timezone.utc
+            ),
+        )
+
+    def test_record(self):
+        server = self.start_server()
+        archive = HttpArchive()
+        session = requests.Session()
+        session.mount('http://', RecordingAdapter(archive))
+        r = session.get(
+            f'{server.url}/www.berlin.de/lageso/bezirkstabelle.csv?v=1'
+        )
+        self.assertEqual(r.text, CONTENT)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / 'archive.zip'
+            archive.write(path)
+            archive = HttpArchive.read(path)
+        self.assertEqual(len(archive.responses), 1)
+        response = archive.responses[0]
+        self.assertEqual(response.body, gzip.compress(CONTENT.encode()))
+        headers = dict(response.headers)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            headers['Last-Modified'], 'Fri, 01 May 2020 14:30:00 GMT'
+        )
+
+    def test_error_injection(self):
+        server = self.start_server(error_rate=1.0)
+        mount_http_adapter(ReplayingAdapter(server.url))
+        with self.assertRaises(requests.HTTPError):
+            download_district_table(URL, timeout=5, user_agent='test')
@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from covid_berlin_scraper.utils.http_utils import RawContent, detect_charset
+
+
+class TestDetectCharset(TestCase):
+    def test_header(self):
+        self.assertEqual(
+            detect_charset(
+                b'<meta charset="utf-8">', 'text/html; charset=ISO-8859-1'
+            ),
+            'iso-8859-1',
+        )
+
+    def test_declaration(self):
+        self.assertEqual(
+            detect_charset(b'<?xml version="1.0" encoding="ISO-8859-1"?>'),
+            'iso-8859-1',
+        )
+        self.assertEqual(
+            detect_charset(b'<html><head><meta charset="UTF-8">', 'text/html'),
+            'utf-8',
+        )
+
+    def test_undeclared(self):
+        self.assertEqual(detect_charset('Neukölln'.encode()), 'utf-8')
+        self.assertEqual(
+            detect_charset('Neukölln'.encode('iso-8859-1')), 'iso-8859-1'
+        )
+
+    def test_text(self):
+        content = 'Neukölln'.encode('iso-8859-1')
+        self.assertEqual(
+            RawContent(content, detect_charset(content)).text, 'Neukölln'
+        )
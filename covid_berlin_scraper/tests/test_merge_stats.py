@@ -0,0 +1,83 @@
+import datetime
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from covid_berlin_scraper.merge_stats import merge_partials, read_partial
+from covid_berlin_scraper.model import Partition
+from covid_berlin_scraper.parse_press_releases import (
+    OUTPUT_HOSP_FIELDS, write_csv, write_partial,
+)
+from covid_berlin_scraper.tests.utils import create_stats
+
+
+class TestMergeStats(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_merge_partials(self):
+        stats_lists_by_source = {
+            'press_releases': [
+                create_stats(2, 20, deaths=2),
+                create_stats(3, 25, hour=9, deaths=2),
+                create_stats(3, 30, deaths=3),
+                create_stats(5, 50, deaths=5),
+            ],
+            'district_tables': [
+                create_stats(1, 11, deaths=1),
+                create_stats(3, 31, deaths=3),
+                create_stats(4, 41, deaths=4),
+            ],
+            'dashboards': [create_stats(2, 22, deaths=2)],
+        }
+        write_csv(
+            [
+                stats
+                for stats_list in stats_lists_by_source.values()
+                for stats in stats_list
+            ],
+            self.tmp_path / 'expected.csv',
+            OUTPUT_HOSP_FIELDS,
+        )
+        partial_stats_list = []
+        for i in range(2):
+            path = self.tmp_path / f'partial-{i}.csv'
+            write_partial(
+                {
+                    source: stats_list[i::2]
+                    for source, stats_list in stats_lists_by_source.items()
+                },
+                path,
+            )
+            partial_stats_list.extend(read_partial(path))
+        write_csv(
+            merge_partials(reversed(partial_stats_list)),
+            self.tmp_path / 'merged.csv',
+            OUTPUT_HOSP_FIELDS,
+        )
+        self.assertEqual(
+            (self.tmp_path / 'merged.csv').read_text(),
+            (self.tmp_path / 'expected.csv').read_text(),
+        )
+
+
+class TestPartition(TestCase):
+    def test_from_spec(self):
+        self.assertEqual(
+            Partition.from_spec('2/4'), Partition(shard_index=2, shard_count=4)
+        )
+        self.assertEqual(
+            Partition.from_spec('2020-03-01..'),
+            Partition(start=datetime.datetime(2020, 3, 1)),
+        )
+        self.assertEqual(
+            Partition.from_spec('..2020-03-01'),
+            Partition(end=datetime.datetime(2020, 3, 1)),
+        )
+        for spec in ('4/4', '2020-03-01', 'spam..'):
+            with self.assertRaises(ValueError):
+                Partition.from_spec(spec)
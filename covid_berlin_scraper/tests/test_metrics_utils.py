@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+from covid_berlin_scraper.utils.metrics_utils import (
+    MetricsCollector, MetricsRegistry,
+)
+
+
+class TestMetricsUtils(TestCase):
+    def test_histogram_render(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram('foo_seconds', 'Foo', buckets=[1, 2])
+        for value in (0.5, 1, 1.5, 3):
+            histogram.observe(value, source='bar')
+        self.assertEqual(
+            registry.render(),
+            '# HELP covid_berlin_scraper_foo_seconds Foo\n'
+            '# TYPE covid_berlin_scraper_foo_seconds histogram\n'
+            'covid_berlin_scraper_foo_seconds_bucket{source="bar",le="1"} 2\n'
+            'covid_berlin_scraper_foo_seconds_bucket{source="bar",le="2"} 3\n'
+            'covid_berlin_scraper_foo_seconds_bucket{source="bar",le="+Inf"} '
+            '4\n'
+            'covid_berlin_scraper_foo_seconds_sum{source="bar"} 6.0\n'
+            'covid_berlin_scraper_foo_seconds_count{source="bar"} 4\n',
+        )
+
+    def test_collector_counters(self):
+        registry = MetricsRegistry()
+        collector = MetricsCollector(registry, command='download-feed')
+        collector.observe_count('db.inserted.press_releases', 2)
+        collector.observe_count('db.updated.press_releases', 1)
+        collector.observe_duration('fetch.feed', 0.2)
+        text = registry.render()
+        self.assertIn(
+            'covid_berlin_scraper_db_rows_total{command="download-feed",'
+            'operation="inserted",table="press_releases"} 2',
+            text,
+        )
+        self.assertIn(
+            'covid_berlin_scraper_fetch_duration_seconds_count'
+            '{command="download-feed",source="feed"} 1',
+            text,
+        )
@@ -0,0 +1,140 @@
+import gzip
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from covid_berlin_scraper.migrations import (
+    LATEST_VERSION, create_initial_tables, create_uncompressed_dashboards,
+    get_version, main, migrate, table_exists,
+)
+from covid_berlin_scraper.model import dispose_engines, get_engine
+from covid_berlin_scraper.tests.utils import load_config
+
+
+class TestMigrations(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / 'db.sqlite3'
+        conn = sqlite3.connect(self.db_path)
+        create_initial_tables(conn)
+        create_uncompressed_dashboards(conn)
+        conn.executemany(
+            'INSERT INTO dashboard (timestamp, content) VALUES (?, ?)',
+            [
+                (f'2020-10-{day:02} 00:00:00.000000', 'StationÃ¤re')
+                for day in range(1, 8)
+            ],
+        )
+        conn.execute(
+            'INSERT INTO district_table (timestamp, content) VALUES (?, ?)',
+            ('2020-10-01 12:00:00.000000', 'Bezirk;Fallzahl\nNeukölln;1\n'),
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def test_migrate_compresses_and_drops_dashboards(self):
+        engine = get_engine(self.db_path, migrate_schema=False)
+        migrate(engine, chunk_size=3)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(get_version(conn), LATEST_VERSION)
+        self.assertFalse(table_exists(conn, 'dashboard'))
+        contents = [
+            gzip.decompress(content).decode()
+            for (content,) in conn.execute(
+                'SELECT content FROM compressed_dashboard'
+            )
+        ]
+        conn.close()
+        self.assertEqual(contents, ['Stationäre'] * 7)
+
+    def test_migrate_district_tables_to_bytes(self):
+        engine = get_engine(self.db_path, migrate_schema=False)
+        migrate(engine)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(
+            conn.execute(
+                'SELECT content, charset FROM district_table'
+            ).fetchall(),
+            [('Bezirk;Fallzahl\nNeukölln;1\n'.encode(), 'utf-8')],
+        )
+        conn.close()
+        migrate(engine, target=4)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(
+            conn.execute('SELECT content FROM district_table').fetchall(),
+            [('Bezirk;Fallzahl\nNeukölln;1\n',)],
+        )
+        conn.close()
+
+    def test_migrate_downgrade(self):
+        engine = get_engine(self.db_path, migrate_schema=False)
+        migrate(engine)
+        migrate(engine, target=2)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(get_version(conn), 2)
+        self.assertTrue(table_exists(conn, 'dashboard'))
+        conn.close()
+        migrate(engine, target=0)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(get_version(conn), 0)
+        self.assertFalse(table_exists(conn, 'press_releases'))
+        conn.close()
+
+    def test_migrate_daily_stats_revision(self):
+        engine = get_engine(self.db_path, migrate_schema=False)
+        migrate(engine, target=7)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            'INSERT INTO daily_stats VALUES '
+            "('2020-10-01', 'dashboards', '2020-10-01 12:00:00.000000', "
+            "1, NULL, NULL, NULL, NULL, 'dashboards', "
+            "'2020-10-01 12:00:00.000000')"
+        )
+        conn.commit()
+        conn.close()
+        migrate(engine, target=8)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(
+            conn.execute('SELECT date, revision FROM daily_stats').fetchall(),
+            [('2020-10-01', 0)],
+        )
+        conn.close()
+        migrate(engine, target=7)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(
+            conn.execute('SELECT date, cases FROM daily_stats').fetchall(),
+            [('2020-10-01', 1)],
+        )
+        conn.close()
+
+    def test_get_engine_migrates_without_vacuum(self):
+        with self.assertLogs('covid_berlin_scraper.migrations', 'INFO') as cm:
+            get_engine(self.db_path)
+        self.assertFalse(
+            [line for line in cm.output if 'Vacuumed database' in line]
+        )
+
+    def test_main_vacuums_once(self):
+        config = load_config()
+        with self.assertLogs('covid_berlin_scraper.migrations', 'INFO') as cm:
+            main(self.db_path.parent, config, vacuum=True)
+        self.assertEqual(
+            len([line for line in cm.output if 'Vacuumed database' in line]),
+            1,
+        )
+
+    def test_main_trims_pages_only_on_upgrade(self):
+        config = load_config()
+        pages_path = self.db_path.parent / 'pages'
+        pages_path.mkdir()
+        (pages_path / 'page.html').write_bytes(b'<p>Neuk\xf6lln</p>')
+        main(self.db_path.parent, config, target=1)
+        main(self.db_path.parent, config, trim_pages=False)
+        self.assertTrue(pages_path.exists())
+        main(self.db_path.parent, config, target=LATEST_VERSION)
+        self.assertFalse(pages_path.exists())
@@ -1,20 +1,112 @@
 import datetime
+import gzip
+import tempfile
+from pathlib import Path
 from unittest import TestCase
 
-from covid_berlin_scraper.model import UncompressedDashboard
+from sqlalchemy import text
+
+from covid_berlin_scraper.model import (
+    Dashboard, DashboardStore, DistrictTable, DistrictTableRow,
+    DistrictTableStore, dispose_engines, encode_fixing_mojibake, get_engine,
+)
 
 
 class TestModel(TestCase):
-    def test_uncompressed_dashboard_content_utf8(self):
-        dashboard = UncompressedDashboard(
-            timestamp=datetime.datetime(2020, 10, 7),
-            content='StationÃ¤re Behandlung',
+    def test_encode_fixing_mojibake(self):
+        self.assertEqual(
+            encode_fixing_mojibake('StationÃ¤re Behandlung'),
+            'Stationäre Behandlung'.encode(),
+        )
+
+    def test_encode_fixing_mojibake_already_converted(self):
+        self.assertEqual(
+            encode_fixing_mojibake('Stationäre Behandlung'),
+            'Stationäre Behandlung'.encode(),
         )
-        self.assertEqual(dashboard.content_utf8, 'Stationäre Behandlung')
 
-    def test_uncompressed_dashboard_content_utf8_already_converted(self):
-        dashboard = UncompressedDashboard(
-            timestamp=datetime.datetime(2020, 10, 7),
-            content='Stationäre Behandlung',
+
+class TestEngine(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / 'db.sqlite3'
+
+    def tearDown(self):
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def test_get_engine_is_shared(self):
+        self.assertIs(get_engine(self.db_path), get_engine(self.db_path))
+
+    def test_get_engine_pragmas(self):
+        with get_engine(self.db_path).connect() as conn:
+            journal_mode = conn.execute(text('PRAGMA journal_mode')).scalar()
+            synchronous = conn.execute(text('PRAGMA synchronous')).scalar()
+        self.assertEqual(journal_mode, 'wal')
+        self.assertEqual(synchronous, 1)
+
+
+class TestDashboardStore(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = DashboardStore(Path(self.tmp_dir.name) / 'db.sqlite3')
+        self.html = b'<html>' + b'Spam ' * 100000 + b'</html>'
+        self.store.append(
+            Dashboard(
+                timestamp=datetime.datetime(2020, 10, 7),
+                content=gzip.compress(self.html),
+            )
+        )
+
+    def tearDown(self):
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def test_list_with_content(self):
+        dashboards = list(self.store.list())
+        self.assertIn('content', dashboards[0].__dict__)
+        self.assertEqual(dashboards[0].decompressed_content, self.html)
+
+    def test_list_without_content(self):
+        dashboards = list(self.store.list(with_content=False))
+        self.assertNotIn('content', dashboards[0].__dict__)
+        self.assertIn('content_length=None', repr(dashboards[0]))
+
+    def test_open_decompressed_content(self):
+        dashboard = next(self.store.list(with_content=False))
+        with self.store.open_decompressed_content(dashboard) as f:
+            chunks = iter(lambda: f.read(4096), b'')
+            self.assertEqual(b''.join(chunks), self.html)
+
+
+class TestDistrictTableStore(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = DistrictTableStore(Path(self.tmp_dir.name) / 'db.sqlite3')
+        for day in (2, 1, 3):
+            self.store.append(
+                DistrictTable(
+                    timestamp=datetime.datetime(2020, 10, day),
+                    content='Neukölln;{day}'.format(day=day).encode(
+                        'iso-8859-1'
+                    ),
+                    charset='iso-8859-1',
+                )
+            )
+
+    def tearDown(self):
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def test_list_streams_rows(self):
+        district_tables = list(self.store.list(after_id=1, buffer_size=1))
+        self.assertIsInstance(district_tables[0], DistrictTableRow)
+        self.assertEqual(
+            [district_table.text for district_table in district_tables],
+            ['Neukölln;1', 'Neukölln;3'],
+        )
+        self.assertEqual(
+            repr(district_tables[1]),
+            'DistrictTable(timestamp=2020-10-03T00:00:00, '
+            'charset=iso-8859-1, content_length=10)',
         )
-        self.assertEqual(dashboard.content_utf8, 'Stationäre Behandlung')
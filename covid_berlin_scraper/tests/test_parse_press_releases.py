@@ -4,8 +4,56 @@ from unittest import TestCase
 
 from ddt import data, ddt, unpack
 
-from covid_berlin_scraper.model import Dashboard
-from covid_berlin_scraper.parse_press_releases import parse_dashboard
+from covid_berlin_scraper.articles import trim_page
+from covid_berlin_scraper.model import Dashboard, DistrictTable, PressRelease
+from covid_berlin_scraper.parse_press_releases import (
+    ParseError, PressReleaseContent, get_parse_press_release_kwargs,
+    parse_dashboard, parse_district_table, parse_district_table_districts,
+    parse_press_release, read_district_table,
+)
+from covid_berlin_scraper.tests.utils import load_config
+from covid_berlin_scraper.utils.http_utils import RawContent, detect_charset
+
+district_table_content = '''Bezirk;Fallzahl;Differenz;Genesen
+Mitte;100;1;90
+Pankow;200;2;180
+Neukölln;0;0;0
+Berlin;300;3;270
+'''
+press_release_page = '''<!DOCTYPE html>
+<html lang="de">
+<head><meta charset="iso-8859-1"><title>{title}</title></head>
+<body>
+<div id="layout-grid__area--header"><a href="/">Startseite</a></div>
+<div id="layout-grid__area--maincontent">
+<h1 class="title">{title}</h1>
+<div class="textile">{body}</div>
+</div>
+<div id="layout-grid__area--footer"><a href="/">Startseite</a></div>
+</body>
+</html>
+'''
+press_release_bodies = [
+    (
+        '<p>In Berlin gibt es 110 bestätigte Fälle.</p>'
+        '<p>3 Personen sind bislang an dem neuartigen Coronavirus '
+        'verstorben. Im Krankenhaus isoliert und behandelt werden 12, '
+        'davon 4 intensivmedizinisch behandelt.</p>'
+    ),
+    (
+        '<table><tr><th>Bezirk</th><th>Fallzahl</th><th>Genesen</th></tr>'
+        '<tr><td>Neukölln</td><td>1.200</td><td>1.000</td></tr>'
+        '<tr><td>Summe</td><td>2.400</td><td>n.a.</td></tr></table>'
+        '<p>5 Personen sind bislang an dem neuartigen Coronavirus '
+        'verstorben.</p>'
+    ),
+]
+district_table_kwargs = dict(
+    column_district='Bezirk',
+    column_cases='Fallzahl',
+    column_recovered='Genesen',
+    row_sum='Berlin',
+)
 
 
 @ddt
@@ -70,3 +118,98 @@ class TestParsePressReleases(TestCase):
         self.assertIs(press_release_stats.timestamp, timestamp)
         for prop, value in expected_dict.items():
             self.assertEqual(getattr(press_release_stats, prop), value)
+
+    def test_parse_district_table(self):
+        timestamp = datetime.datetime(2020, 10, 7, 14)
+        district_table = DistrictTable(
+            timestamp=timestamp,
+            content=district_table_content.encode(),
+            charset='utf-8',
+        )
+        stats = parse_district_table(
+            district_table,
+            delimiter=';',
+            deaths_map={datetime.date(2020, 10, 7): 5},
+            **district_table_kwargs,
+        )
+        self.assertEqual(stats.timestamp, timestamp)
+        self.assertEqual(stats.cases, 300)
+        self.assertEqual(stats.recovered, 270)
+        self.assertEqual(stats.deaths, 5)
+
+    def test_parse_district_table_sum_row_not_found(self):
+        district_table = DistrictTable(
+            timestamp=datetime.datetime(2020, 10, 7, 14),
+            content=district_table_content.replace('Berlin', 'Summe').encode(),
+            charset='utf-8',
+        )
+        with self.assertRaises(ParseError):
+            parse_district_table(
+                district_table,
+                delimiter=';',
+                deaths_map={},
+                **district_table_kwargs,
+            )
+
+    @data(
+        district_table_content.replace('Pankow', '\nPankow'),
+        district_table_content.replace('Pankow;200;2;180', 'Pankow;200'),
+    )
+    def test_parse_district_table_blank_and_short_rows(self, content):
+        district_table = DistrictTable(
+            timestamp=datetime.datetime(2020, 10, 7, 14),
+            content=content.encode(),
+            charset='utf-8',
+        )
+        stats = parse_district_table(
+            district_table,
+            delimiter=';',
+            deaths_map={},
+            **district_table_kwargs,
+        )
+        self.assertEqual(stats.cases, 300)
+        self.assertEqual(stats.recovered, 270)
+
+    def test_parse_district_table_districts(self):
+        district_table = DistrictTable(
+            timestamp=datetime.datetime(2020, 10, 7, 14),
+            content=district_table_content.encode('iso-8859-1'),
+            charset='iso-8859-1',
+        )
+        table = read_district_table(district_table, delimiter=';')
+        district_stats_list = parse_district_table_districts(
+            table, **district_table_kwargs
+        )
+        self.assertEqual(
+            [
+                (stats.district, stats.cases, stats.recovered)
+                for stats in district_stats_list
+            ],
+            [('Mitte', 100, 90), ('Pankow', 200, 180), ('Neukölln', 0, 0)],
+        )
+
+    def test_parse_press_release_article(self):
+        config = load_config()
+        kwargs = get_parse_press_release_kwargs(config)
+        article_selector = config['download_press_release']['article_selector']
+        press_release = PressRelease(
+            timestamp=datetime.datetime(2020, 3, 20, 15),
+            title='Coronavirus in Berlin: 110 bestätigte Fälle',
+            url='https://www.berlin.de/pressemitteilung.1.php',
+        )
+        for body in press_release_bodies:
+            content = press_release_page.format(
+                title=press_release.title, body=body
+            ).encode('iso-8859-1')
+            page = RawContent(content=content, charset=detect_charset(content))
+            article = trim_page(page, article_selector)
+            self.assertLess(len(article.content), len(page.content))
+            self.assertNotIn(b'Startseite', article.content)
+            self.assertEqual(
+                parse_press_release(
+                    PressReleaseContent(press_release, article.text), **kwargs
+                ),
+                parse_press_release(
+                    PressReleaseContent(press_release, page.text), **kwargs
+                ),
+            )
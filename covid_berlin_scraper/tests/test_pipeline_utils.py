@@ -0,0 +1,94 @@
+import random
+import threading
+import time
+from unittest import TestCase
+
+from covid_berlin_scraper.utils.pipeline_utils import Pipeline, PipelineStage
+
+
+def sleep_randomly(x: int) -> int:
+    time.sleep(random.random() / 1000)
+    return x
+
+
+class TestPipeline(TestCase):
+    def test_run_keeps_order(self):
+        pipeline = Pipeline(
+            [
+                PipelineStage('double', lambda x: sleep_randomly(x * 2), 3),
+                PipelineStage('increment', lambda x: sleep_randomly(x + 1), 2),
+            ],
+            depth=2,
+        )
+        self.assertEqual(
+            list(pipeline.run(range(50))), [x * 2 + 1 for x in range(50)]
+        )
+        self.assertEqual(pipeline.utilisation['increment'].items, 50)
+        self.assertIn('double', pipeline.format_report())
+
+    def test_run_error(self):
+        def fail(x: int) -> int:
+            if x == 3:
+                raise ValueError('Spam')
+            return x
+
+        pipeline = Pipeline([PipelineStage('fail', fail, 2)])
+        results = []
+        with self.assertRaises(ValueError):
+            for x in pipeline.run(range(10)):
+                results.append(x)
+        self.assertEqual(results, [0, 1, 2])
+
+    def test_run_backpressure(self):
+        n_read = 0
+        release = threading.Event()
+
+        def source():
+            nonlocal n_read
+            for x in range(100):
+                n_read += 1
+                yield x
+
+        def wait(x: int) -> int:
+            release.wait(timeout=5)
+            return x
+
+        pipeline = Pipeline([PipelineStage('wait', wait, 1)], depth=2)
+        results = pipeline.run(source())
+        thread = threading.Thread(target=lambda: next(results))
+        thread.start()
+        time.sleep(0.2)
+        # One item in the worker, two in the queue and one being put.
+        self.assertLessEqual(n_read, 4)
+        release.set()
+        thread.join()
+        self.assertEqual(list(results), list(range(1, 100)))
+
+    def test_run_limits_items_waiting_for_slow_item(self):
+        n_read = 0
+        release = threading.Event()
+
+        def source():
+            nonlocal n_read
+            for x in range(100):
+                n_read += 1
+                yield x
+
+        def wait_for_first(x: int) -> int:
+            if x == 0:
+                release.wait(timeout=5)
+            return x
+
+        pipeline = Pipeline(
+            [PipelineStage('wait', wait_for_first, 4)],
+            depth=2,
+            max_in_flight=10,
+        )
+        results = pipeline.run(source())
+        thread = threading.Thread(target=lambda: next(results))
+        thread.start()
+        time.sleep(0.2)
+        self.assertLessEqual(n_read, 11)
+        release.set()
+        thread.join()
+        self.assertEqual(list(results), list(range(1, 100)))
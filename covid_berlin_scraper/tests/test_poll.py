@@ -0,0 +1,90 @@
+import datetime
+import gzip
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import dateutil.tz
+
+from covid_berlin_scraper.model import (
+    Dashboard, DashboardStore, dispose_engines,
+)
+from covid_berlin_scraper.poll import (
+    PollPolicy, PollSource, learn_windows, poll_source, simulate,
+)
+
+TZ = dateutil.tz.gettz('Europe/Berlin')
+
+
+def local(day: int, hour: int, minute: int = 0) -> datetime.datetime:
+    return datetime.datetime(2020, 10, day, hour, minute, tzinfo=TZ)
+
+
+class TestPoll(TestCase):
+    def setUp(self):
+        self.published = [
+            local(1, 9, 10),
+            local(2, 9, 40),
+            local(3, 9, 25),
+            local(4, 17, 0),
+        ]
+
+    def test_learn_windows(self):
+        self.assertEqual(
+            learn_windows(self.published, TZ), [(9 * 60 - 5, 9 * 60 + 55)]
+        )
+
+    def test_next_poll(self):
+        policy = PollPolicy(windows=[(9 * 60, 10 * 60)], tz=TZ)
+        self.assertEqual(policy.next_poll(local(5, 9, 30)), local(5, 9, 32))
+        self.assertEqual(policy.next_poll(local(5, 6)), local(5, 7))
+        self.assertEqual(policy.next_poll(local(5, 8, 50)), local(5, 9))
+        self.assertEqual(
+            policy.next_poll(local(5, 9, 30), last_published=local(5, 9, 20)),
+            local(5, 10, 30),
+        )
+        self.assertEqual(
+            PollPolicy(windows=[]).next_poll(local(5, 9)), local(5, 9, 15)
+        )
+
+    def test_simulate(self):
+        report = simulate(
+            'fixed',
+            self.published,
+            lambda t, last_published: t + datetime.timedelta(minutes=30),
+            local(1, 0),
+            local(5, 0),
+        )
+        self.assertEqual(report.requests, 4 * 48)
+        self.assertEqual(report.latencies, [20 * 60, 20 * 60, 5 * 60, 0])
+
+
+class TestPollSource(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.tmp_dir.name)
+        self.content = b'100'
+        self.source = PollSource(
+            name='dashboard',
+            download=self.download,
+            table_name=DashboardStore.table_name,
+        )
+
+    def tearDown(self):
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def download(self, cache_path: Path, config: dict):
+        DashboardStore(cache_path / 'db.sqlite3').append(
+            Dashboard(
+                timestamp=datetime.datetime(2020, 10, 1),
+                content=gzip.compress(self.content, mtime=0),
+            )
+        )
+
+    def test_poll_source_detects_updates(self):
+        self.assertTrue(poll_source(self.source, self.cache_path, {}).changed)
+        self.assertFalse(poll_source(self.source, self.cache_path, {}).changed)
+        # The same day's dashboard with new numbers updates the stored row.
+        self.content = b'200'
+        self.assertTrue(poll_source(self.source, self.cache_path, {}).changed)
@@ -0,0 +1,24 @@
+from unittest import TestCase
+
+from covid_berlin_scraper.utils.profile_utils import (
+    count, disable_profiler, enable_profiler, get_profiler, stage,
+)
+
+
+class TestProfileUtils(TestCase):
+    def tearDown(self):
+        disable_profiler()
+
+    def test_disabled(self):
+        with stage('foo'):
+            count('bar')
+        self.assertIsNone(get_profiler())
+
+    def test_enabled(self):
+        profiler = enable_profiler()
+        for _ in range(3):
+            with stage('foo'):
+                count('bar', 2)
+        data = profiler.asdict()
+        self.assertEqual(data['stages']['foo']['count'], 3)
+        self.assertEqual(data['counters'], {'bar': 6})
@@ -0,0 +1,146 @@
+import copy
+import datetime
+import gzip
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from covid_berlin_scraper.model import (
+    Dashboard, DashboardStore, DistrictTable, DistrictTableStore,
+    ParseFailureStore, dispose_engines,
+)
+from covid_berlin_scraper.parse_press_releases import (
+    parse_cached_district_tables, parse_dashboards,
+)
+from covid_berlin_scraper.quarantine import Quarantine, get_content_hash
+from covid_berlin_scraper.tests.utils import create_district_table, load_config
+from covid_berlin_scraper.utils.profile_utils import (
+    disable_profiler, enable_profiler,
+)
+
+
+class TestQuarantine(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.tmp_dir.name)
+        self.db_path = self.cache_path / 'db.sqlite3'
+        self.config = load_config()
+        self.store = DistrictTableStore(self.db_path)
+        self.store.append(create_district_table(1, 300, recovered=270))
+        self.store.append(
+            create_district_table(2, 300, recovered=270, sum_row='Summe')
+        )
+
+    def tearDown(self):
+        disable_profiler()
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def parse(self, config: dict) -> list:
+        return [
+            stats.timestamp.day
+            for stats in parse_cached_district_tables(self.cache_path, config)
+        ]
+
+    def list_failed_ids(self) -> list:
+        return [
+            parse_failure.source_id
+            for parse_failure in ParseFailureStore(self.db_path).list()
+        ]
+
+    def test_failures_are_skipped_until_config_changes(self):
+        self.assertEqual(self.parse(self.config), [1])
+        self.assertEqual(self.list_failed_ids(), [2])
+        profiler = enable_profiler()
+        self.assertEqual(self.parse(self.config), [1])
+        self.assertEqual(
+            profiler.counters['parse.quarantined.district_tables'], 1
+        )
+        self.assertNotIn('parse.errors.district_tables', profiler.counters)
+        config = copy.deepcopy(self.config)
+        config['parse_district_table']['row_sum'] = 'Summe'
+        self.assertEqual(self.parse(config), [2])
+        self.assertEqual(self.list_failed_ids(), [1])
+
+    def test_failures_are_retried_when_content_changes(self):
+        self.parse(self.config)
+        self.store.append(create_district_table(2, 300, recovered=270))
+        self.assertEqual(self.parse(self.config), [1, 2])
+        self.assertEqual(self.list_failed_ids(), [])
+
+    def test_district_row_failures_keep_the_total(self):
+        self.store.append(
+            DistrictTable(
+                timestamp=datetime.datetime(2020, 10, 3, 14),
+                content=(
+                    'Bezirk;Fallzahl;Differenz;Genesen\n'
+                    'Mitte;n/a;1;90\nBerlin;300;3;270\n'
+                ).encode(),
+                charset='utf-8',
+            )
+        )
+        district_stats_list: list = []
+        stats_list = parse_cached_district_tables(
+            self.cache_path, self.config, district_stats_list
+        )
+        self.assertEqual([stats.timestamp.day for stats in stats_list], [1, 3])
+        self.assertEqual(
+            [stats.timestamp.day for stats in district_stats_list], [1]
+        )
+        self.assertEqual(
+            [
+                (parse_failure.source, parse_failure.source_id)
+                for parse_failure in ParseFailureStore(self.db_path).list()
+            ],
+            [('district_rows', 3), ('district_tables', 2)],
+        )
+        self.assertEqual(self.parse(self.config), [1, 3])
+
+
+class TestDashboardQuarantine(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / 'db.sqlite3'
+        self.store = DashboardStore(self.db_path)
+        for day, cases in ((1, '100'), (2, 'n/a')):
+            self.store.append(
+                Dashboard(
+                    timestamp=datetime.datetime(2020, 10, day, 14),
+                    content=gzip.compress(
+                        f'<p id="cases">{cases}</p>'.encode()
+                    ),
+                )
+            )
+
+    def tearDown(self):
+        disable_profiler()
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def parse(self) -> list:
+        quarantine = Quarantine(self.db_path, 'dashboards', 'config')
+        return [
+            stats.cases
+            for stats in parse_dashboards(
+                self.db_path,
+                parse_workers=2,
+                quarantine=quarantine,
+                cases_selectors=['#cases'],
+                recovered_selectors=[],
+                deaths_selectors=[],
+                hospitalized_selectors=[],
+                icu_selectors=[],
+            )
+        ]
+
+    def test_streamed_content_hash(self):
+        self.assertEqual(self.parse(), [100])
+        (parse_failure,) = ParseFailureStore(self.db_path).list()
+        dashboard = list(self.store.list())[1]
+        self.assertEqual(
+            parse_failure.content_hash, get_content_hash(dashboard.content)
+        )
+        profiler = enable_profiler()
+        self.assertEqual(self.parse(), [100])
+        self.assertEqual(profiler.counters['parse.quarantined.dashboards'], 1)
+        self.assertNotIn('parse.errors.dashboards', profiler.counters)
@@ -0,0 +1,90 @@
+import tempfile
+import threading
+from pathlib import Path
+from unittest import TestCase
+
+from covid_berlin_scraper.model import (
+    DailyStatsStore, DistrictTableStore, dispose_engines,
+)
+from covid_berlin_scraper.run_all import Job, create_jobs, run_jobs
+from covid_berlin_scraper.tests.utils import create_district_table, load_config
+
+
+class TestRunAll(TestCase):
+    def test_run_jobs_dependencies(self):
+        started = threading.Barrier(2, timeout=5)
+
+        def download(values):
+            started.wait()
+            return 1
+
+        def fail(values):
+            raise Exception('Spam')
+
+        schedule = run_jobs(
+            [
+                Job('a', download),
+                Job('b', download),
+                Job('c', fail),
+                Job('d', lambda values: values, ['a', 'b', 'c']),
+            ],
+            max_workers=4,
+        )
+        self.assertEqual(
+            schedule.results['d'].value, {'a': 1, 'b': 1, 'c': None}
+        )
+        self.assertEqual([result.name for result in schedule.failed], ['c'])
+
+    def test_run_jobs_circular(self):
+        with self.assertRaises(Exception):
+            run_jobs(
+                [
+                    Job('a', lambda values: 1, ['b']),
+                    Job('b', lambda values: 1, ['a']),
+                ],
+                max_workers=2,
+            )
+
+
+class TestRunAllJobs(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.tmp_dir.name)
+        self.db_path = self.cache_path / 'db.sqlite3'
+        self.config = load_config()
+        self.store = DistrictTableStore(self.db_path)
+        self.output_path = self.cache_path / 'output.csv'
+
+    def tearDown(self):
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def run_jobs_without_downloads(self):
+        jobs = [
+            (
+                Job(job.name, lambda values: None)
+                if job.name.startswith('download-')
+                else job
+            )
+            for job in create_jobs(
+                self.cache_path, self.config, self.output_path
+            )
+        ]
+        schedule = run_jobs(jobs, max_workers=4)
+        self.assertEqual(schedule.failed, [])
+
+    def test_write_output_refreshes_daily_stats(self):
+        self.store.append(create_district_table(2, 300))
+        self.run_jobs_without_downloads()
+        self.store.append(create_district_table(2, 330))
+        self.run_jobs_without_downloads()
+        self.assertEqual(
+            self.output_path.read_text(),
+            'date,cases,recovered,deaths\n2020-10-02,330,0,\n',
+        )
+        daily_stats_store = DailyStatsStore(self.db_path)
+        self.assertEqual(
+            [daily_stats.cases for daily_stats in daily_stats_store.list()],
+            [330],
+        )
+        self.assertFalse(daily_stats_store.has_changes())
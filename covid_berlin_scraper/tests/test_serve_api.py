@@ -0,0 +1,116 @@
+import datetime
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from unittest import TestCase
+
+from covid_berlin_scraper.model import DistrictTableStore, dispose_engines
+from covid_berlin_scraper.parse_press_releases import refresh_daily_stats
+from covid_berlin_scraper.serve_api import StatsIndex, StatsLoader, StatsServer
+from covid_berlin_scraper.tests.utils import (
+    create_district_table, create_stats, load_config,
+)
+from covid_berlin_scraper.utils.metrics_utils import MetricsRegistry
+
+
+class TestStatsIndex(TestCase):
+    def setUp(self):
+        stats_list = [
+            create_stats(day, day * 10, deaths=1) for day in (3, 1, 5)
+        ]
+        self.index = StatsIndex(
+            {stats.date: stats for stats in stats_list}, version='1'
+        )
+
+    def test_find(self):
+        self.assertEqual(self.index.find(), slice(0, 3))
+        self.assertEqual(
+            self.index.find(
+                datetime.date(2020, 10, 2), datetime.date(2020, 10, 5)
+            ),
+            slice(1, 3),
+        )
+        self.assertEqual(
+            self.index.find(end=datetime.date(2020, 10, 2)), slice(0, 1)
+        )
+        self.assertEqual(
+            self.index.find(start=datetime.date(2020, 10, 6)), slice(3, 3)
+        )
+
+    def test_render(self):
+        s = self.index.find(start=datetime.date(2020, 10, 5))
+        self.assertEqual(
+            self.index.render_json(s),
+            '[{"date": "2020-10-05", "cases": 50, "recovered": null, '
+            '"deaths": 1, "hospitalized": null, "icu": null}]',
+        )
+        self.assertEqual(
+            self.index.render_csv(s),
+            'date,cases,recovered,deaths,hospitalized,icu\n'
+            '2020-10-05,50,,1,,\n',
+        )
+        self.assertEqual(self.index.render_json(slice(0, 0)), '[]')
+
+
+class TestStatsLoader(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.tmp_dir.name)
+        self.config = load_config()
+        self.store = DistrictTableStore(self.cache_path / 'db.sqlite3')
+        self.store.append(create_district_table(2, 300))
+        self.loader = StatsLoader(self.cache_path)
+
+    def tearDown(self):
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def test_refresh_loads_changed_rows(self):
+        # The loader only reads the merged stats.
+        self.assertFalse(self.loader.refresh())
+        refresh_daily_stats(self.cache_path, self.config)
+        self.assertTrue(self.loader.refresh())
+        self.assertFalse(self.loader.refresh())
+        # Same timestamp, so the stored row is updated in place.
+        self.store.append(create_district_table(2, 330))
+        refresh_daily_stats(self.cache_path, self.config)
+        self.assertTrue(self.loader.refresh())
+        self.assertEqual(
+            [stats.cases for stats in self.loader.stats_by_date.values()],
+            [330],
+        )
+
+    def test_refresh_reloads_rebuilt_table(self):
+        refresh_daily_stats(self.cache_path, self.config)
+        self.loader.refresh()
+        self.loader.stats_by_date[datetime.date(2020, 10, 1)] = create_stats(
+            1, 10
+        )
+        refresh_daily_stats(self.cache_path, self.config, rebuild=True)
+        self.assertTrue(self.loader.refresh())
+        self.assertEqual(
+            list(self.loader.stats_by_date), [datetime.date(2020, 10, 2)]
+        )
+
+    def test_request_metrics_are_labelled_by_route(self):
+        server = StatsServer(('127.0.0.1', 0), self.loader, MetricsRegistry())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}'
+            urllib.request.urlopen(f'{url}/stats').read()
+            for path in ('/spam', '/eggs'):
+                with self.assertRaises(urllib.error.HTTPError):
+                    urllib.request.urlopen(url + path)
+        finally:
+            server.shutdown()
+            server.server_close()
+        metrics = server.registry.render()
+        self.assertIn('route="stats",status="200"', metrics)
+        self.assertIn(
+            'api_request_duration_seconds_count{route="unmatched",'
+            'status="404"} 2',
+            metrics,
+        )
+        self.assertNotIn('spam', metrics)
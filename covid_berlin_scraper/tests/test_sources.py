@@ -0,0 +1,100 @@
+import datetime
+import json
+import tempfile
+from pathlib import Path
+from typing import List
+from unittest import TestCase
+
+from covid_berlin_scraper.model import DistrictTableStore, dispose_engines
+from covid_berlin_scraper.parse_press_releases import (
+    SOURCES, PressReleaseStats, Source, get_sources, list_daily_stats, main,
+    refresh_daily_stats, register_source,
+)
+from covid_berlin_scraper.tests.utils import create_district_table, load_config
+
+
+def parse_local_stats(
+    cache_path: Path, config: dict, **kwargs
+) -> List[PressReleaseStats]:
+    with (cache_path / 'local.json').open() as f:
+        return [
+            PressReleaseStats(
+                timestamp=datetime.datetime.fromisoformat(timestamp),
+                cases=cases,
+                recovered=None,
+                deaths=None,
+                hospitalized=None,
+                icu=None,
+            )
+            for timestamp, cases in json.load(f)
+        ]
+
+
+class TestSources(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.tmp_dir.name)
+        self.config = load_config()
+        DistrictTableStore(self.cache_path / 'db.sqlite3').append(
+            create_district_table(2, 300, recovered=270)
+        )
+        self.write_local_stats(
+            [('2020-10-01T16:00:00', 100), ('2020-10-02T16:00:00', 200)]
+        )
+        register_source(
+            Source(name='local', parse=parse_local_stats, priority=5)
+        )
+
+    def tearDown(self):
+        del SOURCES['local']
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def write_local_stats(self, stats: list):
+        with (self.cache_path / 'local.json').open('w') as f:
+            json.dump(stats, f)
+
+    def test_get_sources(self):
+        self.assertEqual(
+            [source.name for source in get_sources()],
+            ['local', 'press_releases', 'district_tables', 'dashboards'],
+        )
+        with self.assertRaises(Exception):
+            get_sources(['unknown'])
+
+    def test_main_merges_sources_by_priority(self):
+        output_path = self.cache_path / 'output.csv'
+        main(self.cache_path, self.config, output_path)
+        self.assertEqual(
+            output_path.read_text(),
+            'date,cases,recovered,deaths\n'
+            '2020-10-01,100,,\n'
+            '2020-10-02,300,270,\n',
+        )
+        main(
+            self.cache_path,
+            self.config,
+            output_path,
+            source_names=['local'],
+        )
+        self.assertEqual(
+            output_path.read_text(),
+            'date,cases,recovered,deaths\n'
+            '2020-10-01,100,,\n'
+            '2020-10-02,200,,\n',
+        )
+
+    def test_refresh_reparses_sources_without_store(self):
+        self.assertTrue(refresh_daily_stats(self.cache_path, self.config))
+        self.write_local_stats([('2020-10-01T16:00:00', 150)])
+        self.assertEqual(
+            refresh_daily_stats(self.cache_path, self.config),
+            {datetime.date(2020, 10, 1)},
+        )
+        self.assertEqual(
+            [
+                stats.cases
+                for stats in list_daily_stats(self.cache_path / 'db.sqlite3')
+            ],
+            [150, 300],
+        )
@@ -0,0 +1,55 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from covid_berlin_scraper.model import DistrictTableStore, dispose_engines
+from covid_berlin_scraper.tests.utils import create_district_table, load_config
+from covid_berlin_scraper.utils.profile_utils import (
+    disable_profiler, enable_profiler,
+)
+from covid_berlin_scraper.watch import Watcher
+
+
+class TestWatcher(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.tmp_dir.name)
+        self.store = DistrictTableStore(self.cache_path / 'db.sqlite3')
+        for day in range(1, 3):
+            self.store.append(create_district_table(day, day * 100))
+        self.output_path = self.cache_path / 'output.csv'
+        self.output_districts_path = self.cache_path / 'districts.csv'
+        self.watcher = Watcher(
+            self.cache_path,
+            load_config(),
+            self.output_path,
+            output_districts_path=self.output_districts_path,
+        )
+
+    def tearDown(self):
+        disable_profiler()
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def test_refresh_parses_only_changes(self):
+        self.assertTrue(self.watcher.refresh())
+        self.assertFalse(self.watcher.refresh())
+        profiler = enable_profiler()
+        self.store.append(create_district_table(3, 300))
+        self.assertTrue(self.watcher.refresh())
+        self.assertEqual(profiler.counters['parse.items.district_tables'], 1)
+        self.assertEqual(
+            self.output_path.read_text(),
+            'date,cases,recovered,deaths\n'
+            '2020-10-01,100,0,\n'
+            '2020-10-02,200,0,\n'
+            '2020-10-03,300,0,\n',
+        )
+        self.assertEqual(
+            self.output_districts_path.read_text(),
+            'date,district,cases,recovered\n'
+            '2020-10-01,Mitte,33,0\n'
+            '2020-10-02,Mitte,66,0\n'
+            '2020-10-03,Mitte,100,0\n',
+        )
+        self.assertEqual(len(self.watcher.latencies), 1)
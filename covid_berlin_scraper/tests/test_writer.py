@@ -0,0 +1,86 @@
+import datetime
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+from unittest import TestCase
+
+from covid_berlin_scraper.model import (
+    PressRelease, PressReleasesStore, dispose_engines,
+)
+from covid_berlin_scraper.utils.profile_utils import (
+    disable_profiler, enable_profiler,
+)
+from covid_berlin_scraper.writer import DatabaseWriter
+
+
+def create_press_releases(producer: int, n: int) -> List[PressRelease]:
+    return [
+        PressRelease(
+            timestamp=datetime.datetime(2020, 4, 1)
+            + datetime.timedelta(hours=producer * n + i),
+            title=f'Press release {producer}.{i}',
+            url=f'https://example.com/{producer}/{i}',
+        )
+        for i in range(n)
+    ]
+
+
+class TestDatabaseWriter(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / 'db.sqlite3'
+
+    def tearDown(self):
+        disable_profiler()
+        dispose_engines()
+        self.tmp_dir.cleanup()
+
+    def test_write_all_from_concurrent_producers(self):
+        profiler = enable_profiler()
+        with DatabaseWriter(self.db_path, batch_size=50) as writer:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = [
+                    executor.submit(
+                        writer.write_all, create_press_releases(producer, 30)
+                    )
+                    for producer in range(4)
+                ]
+                self.assertEqual([f.result() for f in futures], [30] * 4)
+            self.assertEqual(
+                len(list(PressReleasesStore(self.db_path).list())), 120
+            )
+        self.assertEqual(profiler.counters['db.writer.records'], 120)
+        self.assertLess(profiler.counters['db.writer.batches'], 120)
+
+    def test_write_updates_duplicates_in_batch(self):
+        first, second = create_press_releases(0, 2)
+        second.timestamp = first.timestamp
+        with DatabaseWriter(self.db_path) as writer:
+            writer.write_all([first, second])
+        press_releases = list(PressReleasesStore(self.db_path).list())
+        self.assertEqual(len(press_releases), 1)
+        self.assertEqual(press_releases[0].url, second.url)
+
+    def test_failed_record_does_not_fail_batch(self):
+        first, second = create_press_releases(0, 2)
+        second.url = first.url
+        with self.assertLogs('covid_berlin_scraper.writer', 'ERROR'):
+            with DatabaseWriter(self.db_path) as writer:
+                futures = [writer.submit(first), writer.submit(second)]
+                self.assertIsNone(futures[0].result())
+                with self.assertRaises(Exception):
+                    futures[1].result()
+        self.assertEqual(
+            [
+                press_release.title
+                for press_release in PressReleasesStore(self.db_path).list()
+            ],
+            [first.title],
+        )
+
+    def test_submit_after_close(self):
+        writer = DatabaseWriter(self.db_path)
+        writer.close()
+        with self.assertRaises(Exception):
+            writer.submit(create_press_releases(0, 1)[0])
@@ -0,0 +1,43 @@
+import datetime
+import json
+from pathlib import Path
+from typing import Optional
+
+from covid_berlin_scraper.model import DistrictTable
+from covid_berlin_scraper.parse_press_releases import PressReleaseStats
+
+CONFIG_PATH = Path(__file__).parent.parent / 'config.sample.json'
+
+
+def load_config() -> dict:
+    with CONFIG_PATH.open() as f:
+        return json.load(f)
+
+
+def create_stats(
+    day: int, cases: int, hour: int = 16, deaths: Optional[int] = None
+) -> PressReleaseStats:
+    return PressReleaseStats(
+        timestamp=datetime.datetime(2020, 10, day, hour),
+        cases=cases,
+        recovered=None,
+        deaths=deaths,
+        hospitalized=None,
+        icu=None,
+    )
+
+
+def create_district_table(
+    day: int, cases: int, recovered: int = 0, sum_row: str = 'Berlin'
+) -> DistrictTable:
+    """Return a district table of one district with a third of the cases
+    and recovered, and the sum row."""
+    return DistrictTable(
+        timestamp=datetime.datetime(2020, 10, day, 14),
+        content=(
+            'Bezirk;Fallzahl;Differenz;Genesen\n'
+            f'Mitte;{cases // 3};1;{recovered // 3}\n'
+            f'{sum_row};{cases};3;{recovered}\n'
+        ).encode(),
+        charset='utf-8',
+    )
@@ -0,0 +1,188 @@
+import datetime
+import io
+import json
+import logging
+import threading
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+from urllib.parse import urlsplit, urlunsplit
+
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_INDEX_NAME = 'index.json'
+
+
+def get_archive_key(url: str) -> str:
+    """Return the key under which a response to `url` is archived.
+
+    The scheme is dropped, so that the replay server can serve recorded
+    HTTPS responses over plain HTTP.
+    """
+    parts = urlsplit(url)
+    return urlunsplit(('', '', parts.netloc + parts.path, parts.query, ''))
+
+
+@dataclass
+class RecordedResponse:
+    url: str
+    status: int
+    reason: str
+    headers: List[Tuple[str, str]]
+    # Body exactly as sent by the server, e.g. still gzipped when the
+    # response has a Content-Encoding.
+    body: bytes
+    recorded_at: datetime.datetime
+
+    @property
+    def key(self) -> str:
+        return get_archive_key(self.url)
+
+
+@dataclass
+class HttpArchive:
+    """Recorded HTTP responses stored in a ZIP file.
+
+    The response metadata is stored in an index and each body in its own
+    member, compressed unless it is compressed already.
+    """
+
+    responses: List[RecordedResponse] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def append(self, response: RecordedResponse):
+        with self._lock:
+            self.responses.append(response)
+
+    def by_key(self) -> Dict[str, List[RecordedResponse]]:
+        responses_by_key: Dict[str, List[RecordedResponse]] = {}
+        for response in self.responses:
+            responses_by_key.setdefault(response.key, []).append(response)
+        return responses_by_key
+
+    def write(self, path: Path):
+        index = []
+        with zipfile.ZipFile(path, 'w') as f:
+            for i, response in enumerate(self.responses):
+                body_name = f'bodies/{i:06d}'
+                headers = {k.lower(): v for k, v in response.headers}
+                f.writestr(
+                    body_name,
+                    response.body,
+                    compress_type=(
+                        zipfile.ZIP_STORED
+                        if 'content-encoding' in headers
+                        else zipfile.ZIP_DEFLATED
+                    ),
+                )
+                index.append(
+                    {
+                        'url': response.url,
+                        'status': response.status,
+                        'reason': response.reason,
+                        'headers': response.headers,
+                        'body': body_name,
+                        'recorded_at': response.recorded_at.isoformat(),
+                    }
+                )
+            f.writestr(
+                ARCHIVE_INDEX_NAME,
+                json.dumps(index, indent=2),
+                compress_type=zipfile.ZIP_DEFLATED,
+            )
+        logger.info('Wrote %d responses to %s', len(index), path)
+
+    @classmethod
+    def read(cls, path: Path) -> 'HttpArchive':
+        with zipfile.ZipFile(path) as f:
+            index = json.loads(f.read(ARCHIVE_INDEX_NAME))
+            return cls(
+                responses=[
+                    RecordedResponse(
+                        url=item['url'],
+                        status=item['status'],
+                        reason=item['reason'],
+                        headers=[(k, v) for k, v in item['headers']],
+                        body=f.read(item['body']),
+                        recorded_at=datetime.datetime.fromisoformat(
+                            item['recorded_at']
+                        ),
+                    )
+                    for item in index
+                ]
+            )
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Transport adapter that records every response into an archive.
+
+    The body is read undecoded and handed back to requests unchanged, so the
+    caller sees the same response as without recording.
+    """
+
+    def __init__(self, archive: HttpArchive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: Union[bool, str] = True,
+        cert: Any = None,
+        proxies: Optional[Mapping[str, str]] = None,
+    ) -> Response:
+        response = super().send(request, True, timeout, verify, cert, proxies)
+        raw = response.raw
+        body = raw.read(decode_content=False)
+        self.archive.append(
+            RecordedResponse(
+                url=str(request.url),
+                status=response.status_code,
+                reason=response.reason,
+                headers=list(raw.headers.items()),
+                body=body,
+                recorded_at=datetime.datetime.now(datetime.timezone.utc),
+            )
+        )
+        response.raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=raw.headers,
+            status=raw.status,
+            reason=raw.reason,
+            preload_content=False,
+            decode_content=False,
+            request_url=raw.url,
+        )
+        return response
+
+
+class ReplayingAdapter(HTTPAdapter):
+    """Transport adapter that sends every request to a replay server.
+
+    The URL is rewritten so that the replay server can look up the recorded
+    response, everything else goes through the regular connection pool.
+    """
+
+    def __init__(self, replay_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.replay_url = replay_url.rstrip('/')
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: Union[bool, str] = True,
+        cert: Any = None,
+        proxies: Optional[Mapping[str, str]] = None,
+    ) -> Response:
+        request = request.copy()
+        request.url = f'{self.replay_url}/{get_archive_key(str(request.url))}'
+        return super().send(request, stream, timeout, verify, cert, proxies)
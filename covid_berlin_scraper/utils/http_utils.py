@@ -1,13 +1,67 @@
+import codecs
 import logging
+import threading
+from dataclasses import dataclass
+from email.message import Message
 from hashlib import sha256
 from pathlib import Path
-from typing import IO, Optional
+from typing import IO, Any, Dict, Optional
 
 import regex
 import requests
+from requests.adapters import HTTPAdapter
+
+from covid_berlin_scraper.utils.profile_utils import count, stage
 
 logger = logging.getLogger(__name__)
 
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_MAXSIZE = 10
+HTTP_ADAPTER_KWARGS: Dict[str, Any] = dict(
+    pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE
+)
+
+CHARSET_SNIFF_SIZE = 1024
+CHARSET_DECLARATION_REGEX = regex.compile(
+    rb'''<\?xml[^>]*\bencoding=["']([A-Za-z0-9._-]+)'''
+    rb'''|<meta[^>]*\bcharset=["']?([A-Za-z0-9._-]+)''',
+    regex.IGNORECASE,
+)
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(**HTTP_ADAPTER_KWARGS)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+
+def mount_http_adapter(adapter: HTTPAdapter):
+    """Send all requests of the shared session through `adapter`."""
+    session = get_http_session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+
+def reset_http_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
 
 def safe_filename(s: str, max_length: int = 64) -> str:
     short_hash = sha256(s.encode()).hexdigest()[:7]
@@ -15,31 +69,119 @@ def safe_filename(s: str, max_length: int = 64) -> str:
     return f'{safe_str}--{short_hash}'
 
 
-def http_get(
+@dataclass
+class RawContent:
+    """Response body as received, with the charset it is encoded in."""
+
+    content: bytes
+    charset: str
+
+    @property
+    def text(self) -> str:
+        with stage('http.decode'):
+            return self.content.decode(self.charset, errors='replace')
+
+
+def get_header_charset(content_type: Optional[str]) -> Optional[str]:
+    if not content_type:
+        return None
+    message = Message()
+    message['Content-Type'] = content_type
+    return message.get_content_charset()
+
+
+def is_known_charset(charset: str) -> bool:
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        return False
+    return True
+
+
+def detect_charset(content: bytes, content_type: Optional[str] = None) -> str:
+    """Detect the charset of a response body.
+
+    The charset is taken from the Content-Type header, a byte order mark or
+    an XML or HTML declaration at the start of the body, in this order.
+    Undeclared content is UTF-8 if it is valid UTF-8, otherwise ISO-8859-1,
+    which is the HTTP default and never fails to decode.
+    """
+    charset = get_header_charset(content_type)
+    if charset and is_known_charset(charset):
+        return charset
+    for bom, bom_charset in BOMS:
+        if content.startswith(bom):
+            return bom_charset
+    m = CHARSET_DECLARATION_REGEX.search(content, 0, CHARSET_SNIFF_SIZE)
+    if m:
+        charset = (m.group(1) or m.group(2)).decode('ascii').lower()
+        if is_known_charset(charset):
+            return charset
+    if content.isascii():
+        return 'utf-8'
+    try:
+        content.decode('utf-8')
+    except UnicodeDecodeError:
+        return 'iso-8859-1'
+    return 'utf-8'
+
+
+def http_get_bytes(
     url: str,
     timeout: int,
     user_agent: str,
     cache_dir: Optional[Path] = None,
-) -> str:
+) -> RawContent:
+    """Download a URL without decoding its body.
+
+    Cached bodies are stored as received, so their charset is detected from
+    the body alone.
+    """
     if cache_dir:
         cache_file_path = cache_dir / safe_filename(url)
         if cache_file_path.is_file():
             logger.info('Reading %s from cache', url)
-            return cache_file_path.read_text()
+            count('http.cache_hit')
+            with stage('http.cache_read'):
+                content = cache_file_path.read_bytes()
+            return RawContent(content=content, charset=detect_charset(content))
+        count('http.cache_miss')
     logger.info('Downloading %s', url)
-    r = requests.get(url, headers={'User-Agent': user_agent}, timeout=timeout)
-    r.raise_for_status()
-    text = r.text
+    with stage('http.get'):
+        r = get_http_session().get(
+            url, headers={'User-Agent': user_agent}, timeout=timeout
+        )
+        r.raise_for_status()
+        content = r.content
+    count('http.requests')
+    count('http.bytes', len(content))
     if cache_dir:
         cache_file_path.parent.mkdir(parents=True, exist_ok=True)
-        cache_file_path.write_text(text)
-    return text
+        cache_file_path.write_bytes(content)
+    return RawContent(
+        content=content,
+        charset=detect_charset(content, r.headers.get('Content-Type')),
+    )
+
+
+def http_get(
+    url: str,
+    timeout: int,
+    user_agent: str,
+    cache_dir: Optional[Path] = None,
+) -> str:
+    return http_get_bytes(url, timeout, user_agent, cache_dir).text
 
 
 def http_get_raw(url: str, timeout: int, user_agent: str) -> IO:
     logger.info('Downloading %s', url)
-    r = requests.get(
-        url, headers={'User-Agent': user_agent}, timeout=timeout, stream=True
-    )
-    r.raise_for_status()
+    with stage('http.get_raw'):
+        r = get_http_session().get(
+            url,
+            headers={'User-Agent': user_agent},
+            timeout=timeout,
+            stream=True,
+        )
+        r.raise_for_status()
+    count('http.requests')
     return r.raw
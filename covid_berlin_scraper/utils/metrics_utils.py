@@ -0,0 +1,345 @@
+import abc
+import bisect
+import logging
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import regex
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = 'covid_berlin_scraper'
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def format_labels(labels: Labels, extra: Labels = ()) -> str:
+    all_labels = labels + extra
+    if not all_labels:
+        return ''
+    return (
+        '{'
+        + ','.join(
+            '{}="{}"'.format(
+                k,
+                v.replace('\\', '\\\\')
+                .replace('"', '\\"')
+                .replace('\n', '\\n'),
+            )
+            for k, v in all_labels
+        )
+        + '}'
+    )
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(abc.ABC):
+    type_name = ''
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def render_samples(self) -> List[str]:
+        pass
+
+    def render(self) -> str:
+        lines = [
+            f'# HELP {self.name} {self.help}',
+            f'# TYPE {self.name} {self.type_name}',
+        ]
+        lines.extend(self.render_samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, n: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + n
+
+    def render_samples(self) -> List[str]:
+        with self._lock:
+            return [
+                f'{self.name}{format_labels(labels)} {format_value(value)}'
+                for labels, value in sorted(self.values.items())
+            ]
+
+
+class Gauge(Counter):
+    type_name = 'gauge'
+
+    def set(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    type_name = 'histogram'
+
+    def __init__(
+        self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help)
+        self.buckets = list(buckets)
+        self.values: Dict[Labels, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            bucket_counts, total, n = self.values.get(
+                key, ([0] * (len(self.buckets) + 1), 0.0, 0)
+            )
+            bucket_counts[i] += 1
+            self.values[key] = (bucket_counts, total + value, n + 1)
+
+    def render_samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for labels, (bucket_counts, total, n) in sorted(
+                self.values.items()
+            ):
+                cumulative = 0
+                for le, bucket_count in zip(
+                    self.buckets + [math.inf], bucket_counts
+                ):
+                    cumulative += bucket_count
+                    le_labels = format_labels(
+                        labels, (('le', format_value(le)),)
+                    )
+                    lines.append(f'{self.name}_bucket{le_labels} {cumulative}')
+                lines.append(
+                    f'{self.name}_sum{format_labels(labels)} '
+                    f'{format_value(total)}'
+                )
+                lines.append(f'{self.name}_count{format_labels(labels)} {n}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, **kwargs) -> Metric:
+        full_name = f'{METRICS_PREFIX}_{name}'
+        with self._lock:
+            if full_name not in self.metrics:
+                self.metrics[full_name] = cls(full_name, help, **kwargs)
+            return self.metrics[full_name]
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get_or_create(Counter, name, help)  # type: ignore
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self._get_or_create(Gauge, name, help)  # type: ignore
+
+    def histogram(
+        self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(
+            Histogram, name, help, buckets=buckets
+        )  # type: ignore
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return ''.join(metric.render() + '\n' for metric in metrics)
+
+    def write_textfile(self, path: Path):
+        """Write the metrics for the node exporter textfile collector.
+
+        The file is written under a temporary name and then renamed so that
+        the collector never reads a partially written file.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        tmp_path.write_text(self.render())
+        tmp_path.replace(path)
+
+
+COUNTER_PATTERNS = [
+    (
+        regex.compile(r'^db\.(?P<operation>inserted|updated)\.(?P<table>.+)$'),
+        'db_rows_total',
+        'Database rows written',
+    ),
+    (
+        regex.compile(r'^parse\.items\.(?P<source>.+)$'),
+        'parsed_items_total',
+        'Items parsed',
+    ),
+    (
+        regex.compile(r'^parse\.errors\.(?P<source>.+)$'),
+        'parse_errors_total',
+        'Items that failed to parse',
+    ),
+    (
+        regex.compile(r'^parse\.quarantined\.(?P<source>.+)$'),
+        'parse_quarantined_total',
+        'Items skipped because they failed to parse before',
+    ),
+    (
+        regex.compile(r'^http\.bytes$'),
+        'http_bytes_total',
+        'Bytes downloaded',
+    ),
+    (
+        regex.compile(r'^http\.requests$'),
+        'http_requests_total',
+        'HTTP requests made',
+    ),
+    (
+        regex.compile(r'^http\.cache_(?P<result>hit|miss)$'),
+        'http_cache_total',
+        'HTTP cache lookups',
+    ),
+]
+FETCH_STAGE_REGEX = regex.compile(r'^fetch\.(?P<source>[^\.]+)$')
+PARSE_STAGE_REGEX = regex.compile(r'^parse\.(?P<source>[^\.]+)$')
+
+
+class MetricsCollector:
+    """Translate profiler stages and counters into Prometheus metrics.
+
+    Stages named ``fetch.<source>`` and ``parse.<source>`` are recorded as
+    per-source fetch and parse latency histograms; all stages are also
+    recorded in a generic per-stage histogram.
+    """
+
+    def __init__(self, registry: MetricsRegistry, command: str):
+        self.registry = registry
+        self.command = command
+        self.fetch_duration = registry.histogram(
+            'fetch_duration_seconds', 'Fetch latency per source'
+        )
+        self.parse_duration = registry.histogram(
+            'parse_duration_seconds', 'Parse time per item and source'
+        )
+        self.stage_duration = registry.histogram(
+            'stage_duration_seconds', 'Duration of instrumented stages'
+        )
+        self.events = registry.counter(
+            'events_total', 'Other instrumented events'
+        )
+
+    def observe_duration(self, name: str, duration: float):
+        m = FETCH_STAGE_REGEX.match(name)
+        if m:
+            self.fetch_duration.observe(
+                duration, command=self.command, source=m.group('source')
+            )
+        m = PARSE_STAGE_REGEX.match(name)
+        if m:
+            self.parse_duration.observe(
+                duration, command=self.command, source=m.group('source')
+            )
+        self.stage_duration.observe(duration, command=self.command, stage=name)
+
+    def observe_count(self, name: str, n: int):
+        for pattern, metric_name, help in COUNTER_PATTERNS:
+            m = pattern.match(name)
+            if m:
+                self.registry.counter(metric_name, help).inc(
+                    n, command=self.command, **m.groupdict()
+                )
+                return
+        self.events.inc(n, command=self.command, event=name)
+
+    def observe_command(self, duration: float, success: bool, end: float):
+        self.registry.gauge(
+            'command_duration_seconds', 'Duration of the last run'
+        ).set(duration, command=self.command)
+        self.registry.gauge(
+            'command_success', 'Whether the last run succeeded'
+        ).set(int(success), command=self.command)
+        self.registry.gauge(
+            'command_last_run_timestamp_seconds',
+            'Unix time when the last run finished',
+        ).set(end, command=self.command)
+        if success:
+            self.registry.gauge(
+                'command_last_success_timestamp_seconds',
+                'Unix time when the last successful run finished',
+            ).set(end, command=self.command)
+        else:
+            self.registry.counter('command_failures_total', 'Failed runs').inc(
+                command=self.command
+            )
+
+
+def create_metrics_handler(registry: MetricsRegistry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header(
+                'Content-Type', 'text/plain; version=0.0.4; charset=utf-8'
+            )
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    return MetricsHandler
+
+
+def start_metrics_server(
+    registry: MetricsRegistry, port: int, address: str = '127.0.0.1'
+) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(
+        (address, port), create_metrics_handler(registry)
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    logger.info('Serving metrics on http://%s:%d/metrics', address, port)
+    return server
+
+
+_registry: Optional[MetricsRegistry] = None
+
+
+def get_registry() -> MetricsRegistry:
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+    return _registry
@@ -1,4 +1,5 @@
 import datetime
+import email.utils
 from typing import Dict, Optional
 
 import dateparser
@@ -37,3 +38,16 @@ def parse_datetime(s: str, default_tz: datetime.tzinfo) -> datetime.datetime:
     if not dt.tzinfo:
         return dt.replace(tzinfo=default_tz)
     return dt
+
+
+def parse_rfc822_datetime(
+    s: str, default_tz: datetime.tzinfo
+) -> datetime.datetime:
+    """Parse an RSS date, falling back to dateparser for other formats."""
+    try:
+        dt = email.utils.parsedate_to_datetime(s)
+    except (TypeError, ValueError):
+        return parse_datetime(s, default_tz)
+    if not dt.tzinfo:
+        return dt.replace(tzinfo=default_tz)
+    return dt
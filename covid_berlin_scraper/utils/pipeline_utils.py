@@ -0,0 +1,267 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence,
+)
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.1
+
+_END = object()
+
+
+@dataclass
+class PipelineStage:
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+
+
+@dataclass
+class StageUtilisation:
+    name: str
+    workers: int
+    items: int = 0
+    busy: float = 0.0
+    blocked: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, busy: float, blocked: float):
+        with self._lock:
+            self.items += 1
+            self.busy += busy
+            self.blocked += blocked
+
+
+@dataclass
+class _Failure:
+    error: BaseException
+
+
+class Pipeline:
+    """Run items through stages of worker threads connected by queues.
+
+    The source is iterated on its own thread and each stage runs on a pool
+    of threads. The queues between the stages hold at most `depth` items,
+    so a slow stage blocks the stages before it instead of letting items
+    pile up in memory. Results are yielded in the order of the source.
+    Results that finished before an earlier, slower item wait for it, so
+    the source also stops reading while `max_in_flight` items are read but
+    not yet yielded; by default, as many as fit into the queues and the
+    workers.
+
+    An exception raised by a stage function stops the pipeline and is
+    re-raised by `run` at the position of the item that caused it.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[PipelineStage],
+        depth: int = 4,
+        max_in_flight: Optional[int] = None,
+    ):
+        self.stages = stages
+        self.depth = depth
+        self.max_in_flight = max_in_flight or (
+            depth * (len(stages) + 1) + sum(stage.workers for stage in stages)
+        )
+        self.utilisation: Dict[str, StageUtilisation] = {}
+        self.wall_time = 0.0
+
+    def run(self, source: Iterable[Any]) -> Iterator[Any]:
+        start = time.perf_counter()
+        stop = threading.Event()
+        in_flight = threading.Semaphore(self.max_in_flight)
+        queues: List[queue.Queue] = [
+            queue.Queue(maxsize=self.depth)
+            for _ in range(len(self.stages) + 1)
+        ]
+        self.utilisation = {
+            'source': StageUtilisation(name='source', workers=1),
+            **{
+                stage.name: StageUtilisation(
+                    name=stage.name, workers=stage.workers
+                )
+                for stage in self.stages
+            },
+        }
+        threads = [
+            threading.Thread(
+                target=self._read_source,
+                args=(source, queues[0], in_flight, stop),
+                daemon=True,
+            )
+        ]
+        for i, stage in enumerate(self.stages):
+            n_running = [stage.workers]
+            lock = threading.Lock()
+            for _ in range(stage.workers):
+                threads.append(
+                    threading.Thread(
+                        target=self._run_stage,
+                        args=(
+                            stage,
+                            queues[i],
+                            queues[i + 1],
+                            (
+                                self.stages[i + 1].workers
+                                if i + 1 < len(self.stages)
+                                else 1
+                            ),
+                            n_running,
+                            lock,
+                            stop,
+                        ),
+                        daemon=True,
+                    )
+                )
+        for thread in threads:
+            thread.start()
+        try:
+            yield from self._reorder(queues[-1], in_flight, stop)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self.wall_time = time.perf_counter() - start
+
+    def _read_source(
+        self,
+        source: Iterable[Any],
+        output: queue.Queue,
+        in_flight: threading.Semaphore,
+        stop: threading.Event,
+    ):
+        utilisation = self.utilisation['source']
+        iterator = iter(source)
+        n_next_workers = self.stages[0].workers if self.stages else 1
+        i = 0
+        try:
+            while True:
+                wait_start = time.perf_counter()
+                while not in_flight.acquire(timeout=POLL_INTERVAL):
+                    if stop.is_set():
+                        return
+                waited = time.perf_counter() - wait_start
+                busy_start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    item = _Failure(e)
+                busy = time.perf_counter() - busy_start
+                if not self._put(output, (i, item), stop):
+                    return
+                utilisation.add(
+                    busy, time.perf_counter() - busy_start - busy + waited
+                )
+                i += 1
+                if isinstance(item, _Failure):
+                    break
+        finally:
+            for _ in range(n_next_workers):
+                self._put(output, _END, stop)
+
+    def _run_stage(
+        self,
+        stage: PipelineStage,
+        input: queue.Queue,
+        output: queue.Queue,
+        n_next_workers: int,
+        n_running: List[int],
+        lock: threading.Lock,
+        stop: threading.Event,
+    ):
+        utilisation = self.utilisation[stage.name]
+        try:
+            while True:
+                message = self._get(input, stop)
+                if message is None or message is _END:
+                    break
+                i, item = message
+                busy_start = time.perf_counter()
+                if not isinstance(item, _Failure):
+                    try:
+                        item = stage.func(item)
+                    except Exception as e:
+                        item = _Failure(e)
+                busy = time.perf_counter() - busy_start
+                if not self._put(output, (i, item), stop):
+                    break
+                utilisation.add(busy, time.perf_counter() - busy_start - busy)
+        finally:
+            with lock:
+                n_running[0] -= 1
+                is_last = n_running[0] == 0
+            if is_last:
+                for _ in range(n_next_workers):
+                    self._put(output, _END, stop)
+
+    def _reorder(
+        self,
+        input: queue.Queue,
+        in_flight: threading.Semaphore,
+        stop: threading.Event,
+    ) -> Iterator[Any]:
+        pending: Dict[int, Any] = {}
+        next_i = 0
+        while True:
+            message = self._get(input, stop)
+            if message is None or message is _END:
+                break
+            i, item = message
+            pending[i] = item
+            while next_i in pending:
+                item = pending.pop(next_i)
+                in_flight.release()
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+                next_i += 1
+
+    @staticmethod
+    def _put(q: queue.Queue, message: Any, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(message, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(q: queue.Queue, stop: threading.Event) -> Any:
+        while not stop.is_set():
+            try:
+                return q.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return None
+
+    def format_report(self) -> str:
+        """Format the share of the wall time that each stage was busy.
+
+        A stage whose workers are busy most of the time while the stages
+        before it are blocked on full queues is the bottleneck.
+        """
+        lines = [
+            f'{"stage":<16} {"workers":>8} {"items":>8} {"busy s":>9} '
+            f'{"blocked s":>10} {"utilisation":>12}'
+        ]
+        for utilisation in self.utilisation.values():
+            capacity = self.wall_time * utilisation.workers
+            share = utilisation.busy / capacity if capacity else 0.0
+            lines.append(
+                f'{utilisation.name:<16} {utilisation.workers:>8} '
+                f'{utilisation.items:>8} {utilisation.busy:>9.3f} '
+                f'{utilisation.blocked:>10.3f} {share:>11.0%}'
+            )
+        lines.append(
+            f'{"wall time":<16} {"":>8} {"":>8} {self.wall_time:>9.3f}'
+        )
+        return '\n'.join(lines)
@@ -0,0 +1,180 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import ContextManager, Dict, Iterator, List, Optional, Protocol
+
+
+@dataclass
+class StageStats:
+    count: int = 0
+    total: float = 0.0
+    min: float = float('inf')
+    max: float = 0.0
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+
+    def asdict(self) -> dict:
+        return {
+            'count': self.count,
+            'total': self.total,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+        }
+
+
+class ProfilerListener(Protocol):
+    def observe_duration(self, name: str, duration: float): ...
+
+    def observe_count(self, name: str, n: int): ...
+
+
+class Profiler:
+    stages: Dict[str, StageStats]
+    counters: Dict[str, int]
+    listeners: List[ProfilerListener]
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.listeners = []
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_duration(name, time.perf_counter() - start)
+
+    def add_duration(self, name: str, duration: float):
+        with self._lock:
+            if name not in self.stages:
+                self.stages[name] = StageStats()
+            self.stages[name].add(duration)
+        for listener in self.listeners:
+            listener.observe_duration(name, duration)
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+        for listener in self.listeners:
+            listener.observe_count(name, n)
+
+    def asdict(self) -> dict:
+        with self._lock:
+            return {
+                'wall_time': time.perf_counter() - self.start,
+                'stages': {
+                    name: stats.asdict()
+                    for name, stats in sorted(self.stages.items())
+                },
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def format_table(self) -> str:
+        data = self.asdict()
+        lines = [
+            f'{"stage":<40} {"count":>8} {"total s":>10} '
+            f'{"mean ms":>10} {"max ms":>10}'
+        ]
+        for name, stats in data['stages'].items():
+            mean = stats['total'] / stats['count'] if stats['count'] else 0
+            lines.append(
+                f'{name:<40} {stats["count"]:>8} {stats["total"]:>10.3f} '
+                f'{mean * 1000:>10.2f} {stats["max"] * 1000:>10.2f}'
+            )
+        lines.append('')
+        lines.append(f'{"counter":<40} {"value":>8}')
+        for name, value in data['counters'].items():
+            lines.append(f'{name:<40} {value:>8}')
+        lines.append('')
+        lines.append(f'{"wall time":<40} {data["wall_time"]:>8.3f}s')
+        return '\n'.join(lines)
+
+    def write_json(self, path: Path):
+        with path.open('w') as f:
+            json.dump(self.asdict(), f, indent=2)
+            f.write('\n')
+
+
+_profiler: Optional[Profiler] = None
+_null_context = nullcontext()
+
+
+def enable_profiler() -> Profiler:
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+def disable_profiler():
+    global _profiler
+    _profiler = None
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _profiler
+
+
+def stage(name: str) -> ContextManager:
+    """Time a block of code under the passed stage name.
+
+    When profiling is disabled, a shared no-op context manager is returned so
+    that instrumented code pays only for one global lookup.
+    """
+    if _profiler is None:
+        return _null_context
+    return _profiler.stage(name)
+
+
+def count(name: str, n: int = 1):
+    if _profiler is not None:
+        _profiler.count(name, n)
+
+
+@contextmanager
+def capture_profile(kind: Optional[str], output_path: Optional[Path]):
+    if kind == 'cprofile':
+        import cProfile
+        import pstats
+
+        cprofile_profiler = cProfile.Profile()
+        cprofile_profiler.enable()
+        try:
+            yield
+        finally:
+            cprofile_profiler.disable()
+            if output_path:
+                cprofile_profiler.dump_stats(output_path)
+            else:
+                pstats.Stats(cprofile_profiler, stream=sys.stderr).sort_stats(
+                    'cumulative'
+                ).print_stats(30)
+    elif kind == 'pyinstrument':
+        try:
+            import pyinstrument
+        except ImportError:
+            raise Exception('pyinstrument is not installed')
+
+        pyinstrument_profiler = pyinstrument.Profiler()
+        pyinstrument_profiler.start()
+        try:
+            yield
+        finally:
+            pyinstrument_profiler.stop()
+            if output_path:
+                output_path.write_text(pyinstrument_profiler.output_html())
+            else:
+                print(pyinstrument_profiler.output_text(), file=sys.stderr)
+    else:
+        yield
@@ -0,0 +1,157 @@
+import datetime
+import logging
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from covid_berlin_scraper import poll
+from covid_berlin_scraper.model import DailyStatsStore, PollEvent
+from covid_berlin_scraper.parse_press_releases import (
+    DistrictStats, list_daily_stats, refresh_daily_stats, write_district_csv,
+    write_outputs,
+)
+from covid_berlin_scraper.utils.profile_utils import count, stage
+
+logger = logging.getLogger(__name__)
+
+
+class Watcher:
+    """Keep the output files up to date with the database.
+
+    Each refresh merges only the rows changed since the previous refresh
+    into the daily_stats table and rewrites the outputs only if the stats
+    of some date changed. The per-district stats are kept in memory, so
+    that only the changed district tables are parsed for them too.
+
+    `latencies` are the seconds from detecting a change to having written
+    the outputs, not counting the first refresh, which catches up with
+    everything stored before.
+    """
+
+    def __init__(
+        self,
+        cache_path: Path,
+        config: dict,
+        output_path: Path,
+        output_hosp_path: Optional[Path] = None,
+        output_districts_path: Optional[Path] = None,
+    ):
+        self.cache_path = cache_path
+        self.config = config
+        self.db_path = cache_path / 'db.sqlite3'
+        self.output_path = output_path
+        self.output_hosp_path = output_hosp_path
+        self.output_districts_path = output_districts_path
+        self.district_stats_by_key: Dict[
+            Tuple[datetime.date, str], DistrictStats
+        ] = {}
+        self.latencies: List[float] = []
+        self.n_refreshes = 0
+
+    def refresh(self) -> bool:
+        """Refresh the outputs if the database changed since the last call.
+
+        The first call parses everything that is not yet merged and writes
+        the outputs unconditionally.
+        """
+        start = time.perf_counter()
+        first = self.n_refreshes == 0
+        if not first and not DailyStatsStore(self.db_path).has_changes():
+            return False
+        with stage('watch.refresh'):
+            district_stats_list: Optional[List[DistrictStats]] = (
+                [] if self.output_districts_path else None
+            )
+            changed_dates = refresh_daily_stats(
+                self.cache_path,
+                self.config,
+                full_sources=(
+                    ['district_tables']
+                    if first and self.output_districts_path
+                    else []
+                ),
+                source_kwargs={
+                    'district_tables': {
+                        'district_stats_list': district_stats_list
+                    }
+                },
+            )
+            self.n_refreshes += 1
+            if not first and not changed_dates and not district_stats_list:
+                logger.info('Database changed but no stats changed')
+                return False
+            self.write(district_stats_list)
+        latency = time.perf_counter() - start
+        if not first:
+            self.latencies.append(latency)
+            count('watch.refreshes')
+        logger.info(
+            'Wrote outputs %.3fs after detecting changes of %d dates',
+            latency,
+            len(changed_dates),
+        )
+        return True
+
+    def write(self, district_stats_list: Optional[List[DistrictStats]]):
+        write_outputs(
+            list_daily_stats(self.db_path),
+            self.output_path,
+            self.output_hosp_path,
+        )
+        if self.output_districts_path and district_stats_list is not None:
+            for district_stats in district_stats_list:
+                self.district_stats_by_key[
+                    (district_stats.date, district_stats.district)
+                ] = district_stats
+            write_district_csv(
+                self.district_stats_by_key.values(),
+                self.output_districts_path,
+            )
+
+    def format_latencies(self) -> str:
+        if not self.latencies:
+            return 'no refreshes'
+        return (
+            f'{len(self.latencies)} refreshes, latency median '
+            f'{statistics.median(self.latencies):.3f}s, '
+            f'max {max(self.latencies):.3f}s'
+        )
+
+
+def main(
+    cache_path: Path,
+    config: dict,
+    output_path: Path,
+    output_hosp_path: Optional[Path] = None,
+    output_districts_path: Optional[Path] = None,
+    history: datetime.timedelta = datetime.timedelta(days=28),
+    max_polls: Optional[int] = None,
+    **policy_kwargs,
+) -> Watcher:
+    """Poll the sources like `poll` and refresh the outputs after each poll
+    that changed the database."""
+    watcher = Watcher(
+        cache_path,
+        config,
+        output_path,
+        output_hosp_path=output_hosp_path,
+        output_districts_path=output_districts_path,
+    )
+    watcher.refresh()
+
+    def on_poll(poll_event: PollEvent):
+        watcher.refresh()
+
+    try:
+        poll.main(
+            cache_path,
+            config,
+            history=history,
+            max_polls=max_polls,
+            on_poll=on_poll,
+            **policy_kwargs,
+        )
+    finally:
+        logger.info('Watched: %s', watcher.format_latencies())
+    return watcher
@@ -0,0 +1,186 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from covid_berlin_scraper.model import (
+    Dashboard, DashboardStore, DistrictTable, DistrictTableStore, PressRelease,
+    PressReleasesStore,
+)
+from covid_berlin_scraper.utils.profile_utils import count, stage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 0.2
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_QUEUE_SIZE = 1000
+
+STORE_CLASSES = {
+    PressRelease: PressReleasesStore,
+    DistrictTable: DistrictTableStore,
+    Dashboard: DashboardStore,
+}
+
+_CLOSE = object()
+
+
+def get_writer_kwargs(config: dict) -> dict:
+    writer_config = config.get('db_writer', {})
+    return dict(
+        flush_interval=float(
+            writer_config.get('flush_interval', DEFAULT_FLUSH_INTERVAL)
+        ),
+        batch_size=int(writer_config.get('batch_size', DEFAULT_BATCH_SIZE)),
+    )
+
+
+class DatabaseWriter:
+    """Write the records of any number of producer threads on one thread.
+
+    Producers submit press releases, district tables and dashboards to a
+    queue. The writer thread collects them into batches of at most
+    `batch_size` records or of the records submitted within
+    `flush_interval` seconds after the first one and adds each batch in one
+    transaction per record type, so that SQLite's write lock is taken once
+    per batch instead of once per record. The future returned by `submit`
+    is resolved once its record is committed. The database runs in WAL
+    mode with synchronous=NORMAL, so a committed record survives a crash of
+    the program but may be lost on a power failure.
+
+    When a batch fails, its records are written again one per transaction
+    and only the futures of the records that still fail are set to the
+    exception.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> 'DatabaseWriter':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def submit(self, record: Any) -> Future:
+        if type(record) not in STORE_CLASSES:
+            raise Exception(f'Cannot write {type(record).__name__}')
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise Exception('Database writer is closed')
+            self._queue.put((record, future))
+        return future
+
+    def write(self, record: Any, timeout: Optional[float] = None):
+        """Submit a record and wait until it is committed."""
+        self.submit(record).result(timeout)
+
+    def write_all(self, records: Iterable[Any]) -> int:
+        """Submit records and wait until all of them are committed.
+
+        The first exception of a failed record is raised after all the
+        other records were written.
+        """
+        futures = [self.submit(record) for record in records]
+        error: Optional[BaseException] = None
+        for future in futures:
+            e = future.exception()
+            if e and not error:
+                error = e
+        if error:
+            raise error
+        return len(futures)
+
+    def close(self):
+        """Write all submitted records and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_CLOSE)
+        self._thread.join()
+
+    def _run(self):
+        stores: Dict[type, Any] = {
+            record_class: store_class(self.db_path)
+            for record_class, store_class in STORE_CLASSES.items()
+        }
+        closing = False
+        while not closing:
+            message = self._queue.get()
+            if message is _CLOSE:
+                break
+            batch = [message]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    message = (
+                        self._queue.get(timeout=timeout)
+                        if timeout > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if message is _CLOSE:
+                    closing = True
+                    break
+                batch.append(message)
+            self._write_batch(stores, batch)
+
+    def _write_batch(
+        self, stores: Dict[type, Any], batch: List[Tuple[Any, Future]]
+    ):
+        groups: Dict[type, List[Tuple[Any, Future]]] = {}
+        for record, future in batch:
+            groups.setdefault(type(record), []).append((record, future))
+        # Each store has its own session, so that each record type is
+        # committed in its own transaction.
+        for record_class, group in groups.items():
+            self._write_group(stores[record_class], group)
+
+    def _write_group(self, store: Any, group: List[Tuple[Any, Future]]):
+        try:
+            with stage('db.writer.batch'):
+                store.add_all([record for record, _ in group])
+                store.commit()
+        except Exception:
+            logger.exception(
+                'Failed to write a batch of %d records, retrying one by one',
+                len(group),
+            )
+            store.rollback()
+            for record, future in group:
+                self._write_record(store, record, future)
+            return
+        count('db.writer.batches')
+        count('db.writer.records', len(group))
+        for _, future in group:
+            future.set_result(None)
+
+    @staticmethod
+    def _write_record(store: Any, record: Any, future: Future):
+        try:
+            store.append(record)
+        except Exception as e:
+            store.rollback()
+            future.set_exception(e)
+        else:
+            count('db.writer.records')
+            future.set_result(None)